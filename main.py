@@ -1,15 +1,30 @@
 import anthropic
+import ast
+import csv
 import os
 import sys
 import json
 import html
 import io
+import difflib
+import hashlib
+import heapq
+import random
+import re
+import threading
+import time
+import tokenize
 import logging
 import subprocess
 import tempfile
 import shutil
+import sqlite3
+from collections import deque
+from collections.abc import MutableMapping
+from concurrent.futures import ThreadPoolExecutor, as_completed
 from datetime import datetime
 from pathlib import Path
+from types import SimpleNamespace
 
 # Bandit imports (pip로 설치된 버전 사용)
 from bandit.core import config as b_config
@@ -18,6 +33,587 @@ from bandit.core import constants as b_constants
 from bandit.formatters import json as json_formatter
 
 
+# 모델별 가격 (USD / 1M 토큰)
+MODEL_PRICING = {
+    'claude-sonnet-4-5-20250929': {'input': 3.00, 'output': 15.00},
+    'claude-haiku-4-5-20251001': {'input': 1.00, 'output': 5.00},
+    'claude-opus-4-1-20250805': {'input': 15.00, 'output': 75.00},
+    'default': {'input': 3.00, 'output': 15.00},
+}
+
+# LLM 결과 보고용 도구 스키마 (tool use로 구조화된 결과를 받음)
+VULNERABILITY_REPORT_TOOL = {
+    'name': 'report_vulnerabilities',
+    'description': '코드베이스에서 발견한 보안 취약점 목록과 종합 평가를 보고합니다.',
+    'input_schema': {
+        'type': 'object',
+        'properties': {
+            'vulnerabilities': {
+                'type': 'array',
+                'items': {
+                    'type': 'object',
+                    'properties': {
+                        'severity': {'type': 'string', 'enum': ['Critical', 'High', 'Medium', 'Low']},
+                        'category': {'type': 'string', 'description': 'SQL Injection, XSS, 인증 우회 등 (한글)'},
+                        'title': {'type': 'string', 'description': '명확한 취약점 제목 (한글)'},
+                        'description': {'type': 'string', 'description': '상세한 설명 (한글)'},
+                        'location': {'type': 'string', 'description': '파일명:라인번호'},
+                        'code_snippet': {'type': 'string', 'description': '실제 문제 코드'},
+                        'impact': {'type': 'string', 'description': '구체적인 보안 영향 (한글)'},
+                        'recommendation': {'type': 'string', 'description': '실행 가능한 수정 방안 (한글)'},
+                        'cwe_id': {'type': 'string', 'description': 'CWE-XXX (있는 경우)'},
+                        'source': {'type': 'string', 'enum': ['Semgrep', 'Bandit', 'LLM Analysis']},
+                    },
+                    'required': ['severity', 'category', 'title', 'description', 'location', 'source'],
+                },
+            },
+            'overall_assessment': {'type': 'string', 'description': '종합 평가 (한글)'},
+        },
+        'required': ['vulnerabilities', 'overall_assessment'],
+    },
+}
+
+# 고위험 도구 발견 트리아지용 도구 스키마
+TRIAGE_VERDICT_TOOL = {
+    'name': 'submit_triage_verdicts',
+    'description': '정적 분석 도구 발견 사항별로 실제 취약점인지 오탐인지 판정을 보고합니다.',
+    'input_schema': {
+        'type': 'object',
+        'properties': {
+            'verdicts': {
+                'type': 'array',
+                'items': {
+                    'type': 'object',
+                    'properties': {
+                        'id': {'type': 'string', 'description': '발견 사항 id (예: F3)'},
+                        'verdict': {'type': 'string', 'enum': ['true_positive', 'false_positive']},
+                        'reason': {'type': 'string', 'description': '판정 이유 한 문장 (한글)'},
+                    },
+                    'required': ['id', 'verdict', 'reason'],
+                },
+            },
+        },
+        'required': ['verdicts'],
+    },
+}
+
+# 모델 계층화용 1차 선별 도구 스키마 (파일별 위험도 + 확실한 취약점)
+RISK_SCREENING_TOOL = {
+    'name': 'report_file_risks',
+    'description': '파일별 보안 위험도와 바로 확인되는 취약점을 보고합니다.',
+    'input_schema': {
+        'type': 'object',
+        'properties': {
+            'file_risks': {
+                'type': 'array',
+                'items': {
+                    'type': 'object',
+                    'properties': {
+                        'file': {'type': 'string', 'description': '코드 블록 제목에 표시된 파일 경로 그대로'},
+                        'risk_score': {'type': 'number', 'minimum': 0, 'maximum': 1},
+                        'reason': {'type': 'string', 'description': '위험도 근거 한 문장 (한글)'},
+                    },
+                    'required': ['file', 'risk_score'],
+                },
+            },
+            'vulnerabilities': VULNERABILITY_REPORT_TOOL['input_schema']['properties']['vulnerabilities'],
+        },
+        'required': ['file_risks', 'vulnerabilities'],
+    },
+}
+
+# 맵-리듀스 분석용 모듈 보안 요약 스키마
+MODULE_SUMMARY_SCHEMA = {
+    'type': 'object',
+    'properties': {
+        'entry_points': {'type': 'array', 'items': {'type': 'string'}, 'description': '외부 입력을 받는 진입점'},
+        'trust_boundaries': {'type': 'array', 'items': {'type': 'string'}, 'description': '인증/권한/입력 검증 경계'},
+        'secrets_handling': {'type': 'array', 'items': {'type': 'string'}, 'description': '비밀정보 처리 방식'},
+        'data_flows': {'type': 'array', 'items': {'type': 'string'}, 'description': '다른 모듈과 주고받는 데이터/함수'},
+    },
+    'required': ['entry_points', 'trust_boundaries', 'secrets_handling', 'data_flows'],
+}
+
+# 맵 단계 도구 스키마 (모듈별 취약점 + 보안 요약)
+MAP_ANALYSIS_TOOL = {
+    'name': 'report_module_analysis',
+    'description': '모듈에서 발견한 취약점과 모듈 보안 요약을 보고합니다.',
+    'input_schema': {
+        'type': 'object',
+        'properties': {
+            'vulnerabilities': VULNERABILITY_REPORT_TOOL['input_schema']['properties']['vulnerabilities'],
+            'module_summary': MODULE_SUMMARY_SCHEMA,
+        },
+        'required': ['vulnerabilities', 'module_summary'],
+    },
+}
+
+# 리듀스 단계 도구 스키마 (모듈 간 취약점 + 종합 평가 또는 병합 요약)
+REDUCE_ANALYSIS_TOOL = {
+    'name': 'report_cross_module_analysis',
+    'description': '모듈 요약들로부터 모듈 간 취약점과 종합 평가(또는 병합된 요약)를 보고합니다.',
+    'input_schema': {
+        'type': 'object',
+        'properties': {
+            'vulnerabilities': VULNERABILITY_REPORT_TOOL['input_schema']['properties']['vulnerabilities'],
+            'overall_assessment': {'type': 'string', 'description': '프로젝트 종합 평가 (한글, 최종 단계)'},
+            'combined_summary': MODULE_SUMMARY_SCHEMA,
+        },
+        'required': ['vulnerabilities'],
+    },
+}
+
+# 압축 응답 모드 도구 스키마 (제목/설명/영향/권장사항은 CWE_TEMPLATES로 로컬에서 채움)
+COMPACT_REPORT_TOOL = {
+    'name': 'report_findings_compact',
+    'description': '발견한 취약점을 CWE, 심각도, 위치와 짧은 보충 설명으로만 보고합니다.',
+    'input_schema': {
+        'type': 'object',
+        'properties': {
+            'vulnerabilities': {
+                'type': 'array',
+                'items': {
+                    'type': 'object',
+                    'properties': {
+                        'cwe_id': {'type': 'string', 'description': 'CWE-XXX'},
+                        'severity': {'type': 'string', 'enum': ['Critical', 'High', 'Medium', 'Low']},
+                        'location': {'type': 'string', 'description': '파일명:라인번호'},
+                        'note': {'type': 'string', 'description': '카탈로그 설명에 덧붙일 이 코드만의 차이 (한 문장)'},
+                    },
+                    'required': ['cwe_id', 'severity', 'location'],
+                },
+            },
+            'overall_assessment': {'type': 'string', 'description': '종합 평가 (두세 문장)'},
+        },
+        'required': ['vulnerabilities'],
+    },
+}
+
+# 압축 응답을 보고서 문장으로 펼치는 CWE별 템플릿 (언어별)
+CWE_TEMPLATES = {
+    'CWE-78': {
+        'ko': {'category': 'Command Injection', 'title': 'OS 명령어 삽입',
+               'description': '외부 입력이 셸 명령어에 그대로 포함되어 실행됩니다.',
+               'impact': '공격자가 서버에서 임의의 명령을 실행하여 시스템을 장악할 수 있습니다.',
+               'recommendation': 'shell=True와 os.system 사용을 피하고, 인자 리스트로 subprocess를 호출하며 입력을 허용 목록으로 검증하세요.'},
+        'en': {'category': 'Command Injection', 'title': 'OS command injection',
+               'description': 'External input is embedded in a shell command and executed.',
+               'impact': 'An attacker can run arbitrary commands on the server and take over the system.',
+               'recommendation': 'Avoid shell=True and os.system, call subprocess with an argument list, and validate input against an allow list.'},
+    },
+    'CWE-79': {
+        'ko': {'category': 'XSS', 'title': '크로스 사이트 스크립팅(XSS)',
+               'description': '사용자 입력이 이스케이프 없이 HTML/스크립트에 출력됩니다.',
+               'impact': '공격자가 피해자 브라우저에서 스크립트를 실행하여 세션 탈취, 화면 변조를 할 수 있습니다.',
+               'recommendation': '출력 시 컨텍스트에 맞게 이스케이프하고, innerHTML 대신 textContent를 사용하며 CSP를 적용하세요.'},
+        'en': {'category': 'XSS', 'title': 'Cross-site scripting (XSS)',
+               'description': 'User input is written into HTML or script without escaping.',
+               'impact': 'An attacker can run script in the victim\'s browser to steal sessions or deface pages.',
+               'recommendation': 'Escape output for its context, use textContent instead of innerHTML, and apply a Content Security Policy.'},
+    },
+    'CWE-89': {
+        'ko': {'category': 'SQL Injection', 'title': 'SQL 삽입',
+               'description': '문자열 연결이나 포맷팅으로 만든 SQL 쿼리에 외부 입력이 포함됩니다.',
+               'impact': '공격자가 데이터베이스를 조회, 변조, 삭제하거나 인증을 우회할 수 있습니다.',
+               'recommendation': '파라미터 바인딩(placeholder)이나 ORM을 사용하고, 테이블/컬럼명은 허용 목록으로 제한하세요.'},
+        'en': {'category': 'SQL Injection', 'title': 'SQL injection',
+               'description': 'External input is included in a SQL query built by concatenation or formatting.',
+               'impact': 'An attacker can read, modify or delete data or bypass authentication.',
+               'recommendation': 'Use parameter binding or an ORM, and restrict table/column names to an allow list.'},
+    },
+    'CWE-22': {
+        'ko': {'category': 'Path Traversal', 'title': '경로 조작',
+               'description': '외부 입력으로 만든 파일 경로를 검증 없이 사용합니다.',
+               'impact': '공격자가 ../ 등을 이용해 허용되지 않은 파일을 읽거나 덮어쓸 수 있습니다.',
+               'recommendation': '경로를 정규화한 뒤 허용된 기준 디렉토리 안에 있는지 확인하고, 파일명은 허용 목록으로 제한하세요.'},
+        'en': {'category': 'Path Traversal', 'title': 'Path traversal',
+               'description': 'A file path built from external input is used without validation.',
+               'impact': 'An attacker can use ../ sequences to read or overwrite files outside the allowed area.',
+               'recommendation': 'Normalize the path, verify it stays inside an allowed base directory, and restrict file names to an allow list.'},
+    },
+    'CWE-94': {
+        'ko': {'category': '코드 삽입', 'title': '동적 코드 실행',
+               'description': 'eval/exec 등으로 외부 입력을 코드로 실행합니다.',
+               'impact': '공격자가 애플리케이션 권한으로 임의의 코드를 실행할 수 있습니다.',
+               'recommendation': 'eval/exec를 제거하고, 데이터 파싱에는 ast.literal_eval이나 JSON 파서를 사용하세요.'},
+        'en': {'category': 'Code Injection', 'title': 'Dynamic code execution',
+               'description': 'External input is executed as code via eval/exec or similar.',
+               'impact': 'An attacker can run arbitrary code with the application\'s privileges.',
+               'recommendation': 'Remove eval/exec and parse data with ast.literal_eval or a JSON parser.'},
+    },
+    'CWE-502': {
+        'ko': {'category': '안전하지 않은 역직렬화', 'title': '신뢰할 수 없는 데이터 역직렬화',
+               'description': 'pickle, yaml.load 등으로 신뢰할 수 없는 데이터를 역직렬화합니다.',
+               'impact': '조작된 데이터로 역직렬화 과정에서 임의의 코드가 실행될 수 있습니다.',
+               'recommendation': 'JSON 같은 안전한 형식을 사용하고, YAML은 safe_load를 사용하세요.'},
+        'en': {'category': 'Insecure Deserialization', 'title': 'Deserialization of untrusted data',
+               'description': 'Untrusted data is deserialized with pickle, yaml.load or similar.',
+               'impact': 'Crafted data can execute arbitrary code during deserialization.',
+               'recommendation': 'Use a safe format such as JSON, and yaml.safe_load for YAML.'},
+    },
+    'CWE-798': {
+        'ko': {'category': '민감정보 노출', 'title': '하드코딩된 자격 증명',
+               'description': '비밀번호, API 키, 토큰 등이 소스 코드에 직접 들어 있습니다.',
+               'impact': '소스 코드에 접근한 누구나 자격 증명을 얻어 시스템에 접근할 수 있습니다.',
+               'recommendation': '비밀정보는 환경 변수나 비밀 관리 서비스로 옮기고, 노출된 키는 즉시 교체하세요.'},
+        'en': {'category': 'Sensitive Data Exposure', 'title': 'Hard-coded credentials',
+               'description': 'Passwords, API keys or tokens are written directly in the source code.',
+               'impact': 'Anyone with access to the source can obtain the credentials and access the system.',
+               'recommendation': 'Move secrets to environment variables or a secret manager and rotate exposed keys immediately.'},
+    },
+    'CWE-327': {
+        'ko': {'category': '약한 암호화', 'title': '취약한 암호 알고리즘 사용',
+               'description': 'MD5, SHA1, DES, ECB 모드 등 안전하지 않은 암호 알고리즘을 사용합니다.',
+               'impact': '해시 충돌이나 복호화로 데이터 무결성과 기밀성이 깨질 수 있습니다.',
+               'recommendation': 'SHA-256 이상, AES-GCM을 사용하고 비밀번호는 bcrypt/scrypt/Argon2로 해시하세요.'},
+        'en': {'category': 'Weak Cryptography', 'title': 'Use of a broken cryptographic algorithm',
+               'description': 'An insecure algorithm such as MD5, SHA1, DES or ECB mode is used.',
+               'impact': 'Collisions or decryption can break data integrity and confidentiality.',
+               'recommendation': 'Use SHA-256 or stronger and AES-GCM, and hash passwords with bcrypt, scrypt or Argon2.'},
+    },
+    'CWE-330': {
+        'ko': {'category': '약한 난수', 'title': '예측 가능한 난수 사용',
+               'description': '보안 용도에 random 모듈 같은 예측 가능한 난수 생성기를 사용합니다.',
+               'impact': '토큰, 비밀번호 재설정 코드 등을 공격자가 추측할 수 있습니다.',
+               'recommendation': '보안 용도에는 secrets 모듈이나 os.urandom을 사용하세요.'},
+        'en': {'category': 'Weak Randomness', 'title': 'Predictable random values',
+               'description': 'A predictable generator such as the random module is used for security purposes.',
+               'impact': 'An attacker can guess tokens or password reset codes.',
+               'recommendation': 'Use the secrets module or os.urandom for security-sensitive values.'},
+    },
+    'CWE-295': {
+        'ko': {'category': '인증서 검증 누락', 'title': 'TLS 인증서 검증 비활성화',
+               'description': 'verify=False 등으로 TLS 인증서 검증을 끕니다.',
+               'impact': '중간자 공격으로 통신 내용이 도청되거나 변조될 수 있습니다.',
+               'recommendation': '인증서 검증을 켜고, 사설 인증서는 CA 번들로 지정하세요.'},
+        'en': {'category': 'Improper Certificate Validation', 'title': 'TLS certificate verification disabled',
+               'description': 'TLS certificate verification is turned off, e.g. with verify=False.',
+               'impact': 'A man-in-the-middle can read or modify the traffic.',
+               'recommendation': 'Keep certificate verification on and point private certificates at a CA bundle.'},
+    },
+    'CWE-352': {
+        'ko': {'category': 'CSRF', 'title': '사이트 간 요청 위조(CSRF)',
+               'description': '상태를 바꾸는 요청에 CSRF 토큰 검증이 없습니다.',
+               'impact': '공격자가 로그인한 사용자를 속여 원치 않는 작업을 실행시킬 수 있습니다.',
+               'recommendation': 'CSRF 토큰을 검증하고 SameSite 쿠키 속성을 설정하세요.'},
+        'en': {'category': 'CSRF', 'title': 'Cross-site request forgery (CSRF)',
+               'description': 'State-changing requests are not protected by CSRF token validation.',
+               'impact': 'An attacker can trick a logged-in user into performing unwanted actions.',
+               'recommendation': 'Validate CSRF tokens and set the SameSite cookie attribute.'},
+    },
+    'CWE-601': {
+        'ko': {'category': 'Open Redirect', 'title': '검증되지 않은 리다이렉트',
+               'description': '외부 입력으로 받은 URL로 검증 없이 리다이렉트합니다.',
+               'impact': '피싱 사이트로 사용자를 유도하는 데 악용될 수 있습니다.',
+               'recommendation': '리다이렉트 대상은 상대 경로나 허용된 도메인 목록으로 제한하세요.'},
+        'en': {'category': 'Open Redirect', 'title': 'Unvalidated redirect',
+               'description': 'The application redirects to a URL taken from external input without validation.',
+               'impact': 'It can be abused to send users to phishing sites.',
+               'recommendation': 'Restrict redirect targets to relative paths or an allow list of domains.'},
+    },
+    'CWE-611': {
+        'ko': {'category': 'XXE', 'title': 'XML 외부 엔티티(XXE)',
+               'description': '외부 엔티티 처리가 켜진 파서로 신뢰할 수 없는 XML을 파싱합니다.',
+               'impact': '서버 파일 노출, SSRF, 서비스 거부가 발생할 수 있습니다.',
+               'recommendation': 'defusedxml을 사용하거나 외부 엔티티와 DTD 처리를 비활성화하세요.'},
+        'en': {'category': 'XXE', 'title': 'XML external entity (XXE)',
+               'description': 'Untrusted XML is parsed with external entity processing enabled.',
+               'impact': 'It can expose server files, enable SSRF or cause denial of service.',
+               'recommendation': 'Use defusedxml or disable external entities and DTD processing.'},
+    },
+    'CWE-918': {
+        'ko': {'category': 'SSRF', 'title': '서버 측 요청 위조(SSRF)',
+               'description': '외부 입력으로 받은 URL로 서버가 직접 요청을 보냅니다.',
+               'impact': '내부 네트워크나 클라우드 메타데이터 서비스에 접근할 수 있습니다.',
+               'recommendation': '요청 대상 호스트를 허용 목록으로 제한하고 내부 IP 대역을 차단하세요.'},
+        'en': {'category': 'SSRF', 'title': 'Server-side request forgery (SSRF)',
+               'description': 'The server sends requests to a URL taken from external input.',
+               'impact': 'An attacker can reach internal networks or cloud metadata services.',
+               'recommendation': 'Restrict target hosts to an allow list and block internal IP ranges.'},
+    },
+    'CWE-732': {
+        'ko': {'category': '파일 권한 문제', 'title': '과도한 파일 권한',
+               'description': '파일이나 디렉토리에 0o777 등 지나치게 넓은 권한을 부여합니다.',
+               'impact': '다른 사용자가 파일을 읽거나 수정하여 정보 유출이나 코드 변조가 발생할 수 있습니다.',
+               'recommendation': '필요한 최소 권한(예: 0o600, 0o700)만 부여하세요.'},
+        'en': {'category': 'Incorrect Permissions', 'title': 'Overly permissive file permissions',
+               'description': 'A file or directory is given overly broad permissions such as 0o777.',
+               'impact': 'Other users can read or modify the file, leading to data leaks or tampering.',
+               'recommendation': 'Grant only the minimum permissions needed, e.g. 0o600 or 0o700.'},
+    },
+    'CWE-377': {
+        'ko': {'category': '안전하지 않은 임시 파일', 'title': '예측 가능한 임시 파일 경로',
+               'description': '/tmp 등 고정된 경로에 임시 파일을 만듭니다.',
+               'impact': '심볼릭 링크 공격으로 다른 파일을 덮어쓰거나 내용을 가로챌 수 있습니다.',
+               'recommendation': 'tempfile.mkstemp나 NamedTemporaryFile로 임시 파일을 만드세요.'},
+        'en': {'category': 'Insecure Temporary File', 'title': 'Predictable temporary file path',
+               'description': 'A temporary file is created at a fixed path such as /tmp.',
+               'impact': 'Symlink attacks can overwrite other files or intercept the contents.',
+               'recommendation': 'Create temporary files with tempfile.mkstemp or NamedTemporaryFile.'},
+    },
+    'CWE-200': {
+        'ko': {'category': '민감정보 노출', 'title': '민감한 정보 노출',
+               'description': '에러 메시지, 로그, 응답에 내부 정보나 민감한 데이터가 포함됩니다.',
+               'impact': '공격자가 시스템 구조나 사용자 정보를 얻어 추가 공격에 활용할 수 있습니다.',
+               'recommendation': '사용자에게는 일반적인 오류 메시지만 보여주고, 민감한 값은 로그에서 마스킹하세요.'},
+        'en': {'category': 'Sensitive Data Exposure', 'title': 'Exposure of sensitive information',
+               'description': 'Error messages, logs or responses include internal details or sensitive data.',
+               'impact': 'An attacker can learn about the system or users and use it for further attacks.',
+               'recommendation': 'Show users generic error messages and mask sensitive values in logs.'},
+    },
+    'CWE-489': {
+        'ko': {'category': '디버그 모드 활성화', 'title': '운영 환경 디버그 모드',
+               'description': 'debug=True 등 디버그 기능이 켜진 채로 실행됩니다.',
+               'impact': '디버거를 통해 임의 코드 실행이나 내부 정보 노출이 가능합니다.',
+               'recommendation': '운영 환경에서는 디버그 모드를 끄고 설정을 환경 변수로 분리하세요.'},
+        'en': {'category': 'Debug Mode Enabled', 'title': 'Debug mode in production',
+               'description': 'The application runs with debug features enabled, e.g. debug=True.',
+               'impact': 'The debugger can allow arbitrary code execution or leak internal details.',
+               'recommendation': 'Disable debug mode in production and move settings to environment variables.'},
+    },
+    'CWE-605': {
+        'ko': {'category': '네트워크 노출', 'title': '모든 인터페이스에 바인딩',
+               'description': '0.0.0.0에 바인딩하여 모든 네트워크 인터페이스에서 접근할 수 있습니다.',
+               'impact': '의도하지 않은 외부 네트워크에 서비스가 노출될 수 있습니다.',
+               'recommendation': '필요한 인터페이스(예: 127.0.0.1)에만 바인딩하거나 방화벽으로 제한하세요.'},
+        'en': {'category': 'Network Exposure', 'title': 'Binding to all interfaces',
+               'description': 'The service binds to 0.0.0.0 and is reachable on every network interface.',
+               'impact': 'The service may be exposed to unintended external networks.',
+               'recommendation': 'Bind only to the required interface (e.g. 127.0.0.1) or restrict it with a firewall.'},
+    },
+    'CWE-862': {
+        'ko': {'category': '인증/권한 검증 누락', 'title': '권한 검증 누락',
+               'description': '민감한 작업을 수행하기 전에 사용자 권한을 확인하지 않습니다.',
+               'impact': '권한 없는 사용자가 다른 사용자의 데이터나 관리자 기능에 접근할 수 있습니다.',
+               'recommendation': '모든 민감한 엔드포인트에서 서버 측 인증과 객체 단위 권한 검사를 수행하세요.'},
+        'en': {'category': 'Missing Authorization', 'title': 'Missing authorization check',
+               'description': 'User permissions are not checked before a sensitive operation.',
+               'impact': 'Unauthorized users can access other users\' data or admin functions.',
+               'recommendation': 'Enforce server-side authentication and per-object authorization on every sensitive endpoint.'},
+    },
+    'CWE-614': {
+        'ko': {'category': '쿠키 보안 설정 누락', 'title': '보안 속성 없는 쿠키',
+               'description': '세션 쿠키에 Secure, HttpOnly, SameSite 속성이 없습니다.',
+               'impact': '쿠키가 평문으로 전송되거나 스크립트로 탈취될 수 있습니다.',
+               'recommendation': '세션 쿠키에 Secure, HttpOnly, SameSite 속성을 설정하세요.'},
+        'en': {'category': 'Insecure Cookie', 'title': 'Cookie without security attributes',
+               'description': 'Session cookies lack the Secure, HttpOnly or SameSite attributes.',
+               'impact': 'Cookies may be sent in cleartext or stolen by scripts.',
+               'recommendation': 'Set Secure, HttpOnly and SameSite on session cookies.'},
+    },
+    'CWE-942': {
+        'ko': {'category': 'CORS 설정 오류', 'title': '과도하게 허용된 CORS 정책',
+               'description': '모든 출처(*)를 허용하거나 자격 증명과 함께 임의 출처를 허용합니다.',
+               'impact': '악성 사이트가 사용자 권한으로 API 응답을 읽을 수 있습니다.',
+               'recommendation': '허용 출처를 명시적인 목록으로 제한하세요.'},
+        'en': {'category': 'CORS Misconfiguration', 'title': 'Overly permissive CORS policy',
+               'description': 'All origins (*) are allowed, or arbitrary origins are allowed with credentials.',
+               'impact': 'Malicious sites can read API responses with the user\'s privileges.',
+               'recommendation': 'Restrict allowed origins to an explicit list.'},
+    },
+    'CWE-319': {
+        'ko': {'category': '평문 전송', 'title': '암호화되지 않은 통신',
+               'description': 'HTTP 등 암호화되지 않은 채널로 민감한 데이터를 전송합니다.',
+               'impact': '네트워크 도청으로 자격 증명이나 개인정보가 노출될 수 있습니다.',
+               'recommendation': '모든 통신에 HTTPS/TLS를 사용하세요.'},
+        'en': {'category': 'Cleartext Transmission', 'title': 'Unencrypted communication',
+               'description': 'Sensitive data is sent over an unencrypted channel such as HTTP.',
+               'impact': 'Credentials or personal data can be exposed by network sniffing.',
+               'recommendation': 'Use HTTPS/TLS for all communication.'},
+    },
+    'CWE-703': {
+        'ko': {'category': '예외 처리 부적절', 'title': '예외 무시',
+               'description': '예외를 잡은 뒤 아무 처리 없이 넘어갑니다 (except: pass).',
+               'impact': '보안 검사 실패나 오류가 드러나지 않아 잘못된 상태로 계속 실행될 수 있습니다.',
+               'recommendation': '구체적인 예외만 잡고, 기록하거나 안전한 기본 동작으로 처리하세요.'},
+        'en': {'category': 'Improper Exception Handling', 'title': 'Swallowed exception',
+               'description': 'An exception is caught and silently ignored (except: pass).',
+               'impact': 'Failed security checks or errors go unnoticed and execution continues in a bad state.',
+               'recommendation': 'Catch specific exceptions and log them or fall back to a safe default.'},
+    },
+    'CWE-400': {
+        'ko': {'category': '자원 고갈', 'title': '제한 없는 자원 사용',
+               'description': '시간 제한이나 크기 제한 없이 외부 요청, 입력, 자원을 처리합니다.',
+               'impact': '느린 응답이나 큰 입력으로 작업자가 묶여 서비스 거부가 발생할 수 있습니다.',
+               'recommendation': '네트워크 호출에 timeout을 지정하고, 입력 크기와 요청 빈도를 제한하세요.'},
+        'en': {'category': 'Resource Exhaustion', 'title': 'Uncontrolled resource consumption',
+               'description': 'External requests, input or resources are handled without time or size limits.',
+               'impact': 'Slow responses or large inputs can tie up workers and cause denial of service.',
+               'recommendation': 'Set timeouts on network calls and limit input size and request rate.'},
+    },
+    'default': {
+        'ko': {'category': '보안 취약점', 'title': '보안 취약점',
+               'description': '보안상 문제가 될 수 있는 코드입니다.',
+               'impact': '공격자가 이 코드를 악용하여 시스템의 기밀성, 무결성, 가용성을 해칠 수 있습니다.',
+               'recommendation': '해당 CWE 항목의 권장 대응 방안을 참고하여 수정하세요.'},
+        'en': {'category': 'Security Weakness', 'title': 'Security weakness',
+               'description': 'This code may cause a security problem.',
+               'impact': 'An attacker may exploit it to harm confidentiality, integrity or availability.',
+               'recommendation': 'Fix it following the mitigations for the referenced CWE.'},
+    },
+}
+
+# 보고서 언어 이름 (프롬프트 지시용)
+REPORT_LANGUAGE_NAMES = {'ko': '한국어', 'en': 'English'}
+
+# 도구 발견 변환 시 덧붙이는 고정 문구 (보고서 언어별)
+REPORT_FIXED_TEXT = {
+    'ko': {'severity': '심각도', 'confidence': '신뢰도', 'reference': '참고', 'python_category': 'Python 보안',
+           'fallback_recommendation': '코드를 검토하고 보안 모범 사례를 따르세요.'},
+    'en': {'severity': 'severity', 'confidence': 'confidence', 'reference': 'see', 'python_category': 'Python Security',
+           'fallback_recommendation': 'Review the code and follow security best practices.'},
+}
+
+# 같은 설명을 쓰는 CWE 별칭
+CWE_TEMPLATE_ALIASES = {
+    'CWE-77': 'CWE-78', 'CWE-80': 'CWE-79', 'CWE-95': 'CWE-94', 'CWE-259': 'CWE-798',
+    'CWE-321': 'CWE-798', 'CWE-328': 'CWE-327', 'CWE-326': 'CWE-327', 'CWE-338': 'CWE-330',
+    'CWE-209': 'CWE-200', 'CWE-215': 'CWE-489', 'CWE-284': 'CWE-862', 'CWE-285': 'CWE-862',
+    'CWE-287': 'CWE-862', 'CWE-639': 'CWE-862', 'CWE-1004': 'CWE-614', 'CWE-346': 'CWE-942',
+    'CWE-23': 'CWE-22', 'CWE-36': 'CWE-22', 'CWE-73': 'CWE-22', 'CWE-776': 'CWE-611',
+}
+
+# 엔진 신뢰도 등급별 정밀도 추정치 (상관 클러스터의 결합 신뢰도 계산용)
+ENGINE_CONFIDENCE_WEIGHTS = {'HIGH': 0.8, 'MEDIUM': 0.6, 'LOW': 0.4}
+
+SEVERITY_ORDER = {'Critical': 4, 'High': 3, 'Medium': 2, 'Low': 1}
+
+# 억제 주석 (Bandit 방식): 인라인은 발견 라인 또는 바로 윗줄, 파일 단위는 처음 20줄 안
+SUPPRESSION_FILE_PATTERN = re.compile(r"(?:#|//|/\*)\s*codescanner-ignore-file\b(.*)", re.IGNORECASE)
+SUPPRESSION_LINE_PATTERN = re.compile(r"(?:#|//|/\*)\s*(?:nosec|nosemgrep|codescanner-ignore)\b(.*)", re.IGNORECASE)
+
+# Bandit 테스트 ID별 CWE와 전용 권장사항 (권장사항이 없으면 CWE 템플릿 사용)
+BANDIT_REMEDIATION = {
+    'B101': {'cwe': 'CWE-703',
+             'ko': 'assert는 최적화 모드(-O)에서 제거되므로 보안 검사에는 if 문과 예외를 사용하세요.',
+             'en': 'assert is removed under optimization (-O); use an if statement and raise an exception for security checks.'},
+    'B102': {'cwe': 'CWE-94'},
+    'B103': {'cwe': 'CWE-732'},
+    'B104': {'cwe': 'CWE-605'},
+    'B105': {'cwe': 'CWE-798'},
+    'B106': {'cwe': 'CWE-798'},
+    'B107': {'cwe': 'CWE-798'},
+    'B108': {'cwe': 'CWE-377'},
+    'B110': {'cwe': 'CWE-703',
+             'ko': 'except: pass 대신 처리할 예외를 구체적으로 지정하고, 최소한 logging으로 기록하세요.',
+             'en': 'Instead of except: pass, catch specific exceptions and at least log them.'},
+    'B112': {'cwe': 'CWE-703'},
+    'B113': {'cwe': 'CWE-400',
+             'ko': 'requests 호출에 timeout 인자를 지정하세요 (예: timeout=10).',
+             'en': 'Pass a timeout argument to requests calls (e.g. timeout=10).'},
+    'B201': {'cwe': 'CWE-489',
+             'ko': 'app.run(debug=True)를 제거하고, FLASK_DEBUG 환경 변수로 개발 환경에서만 켜세요.',
+             'en': 'Remove app.run(debug=True) and enable debugging only in development via FLASK_DEBUG.'},
+    'B301': {'cwe': 'CWE-502'},
+    'B302': {'cwe': 'CWE-502'},
+    'B303': {'cwe': 'CWE-327'},
+    'B304': {'cwe': 'CWE-327'},
+    'B305': {'cwe': 'CWE-327'},
+    'B306': {'cwe': 'CWE-377',
+             'ko': 'tempfile.mktemp 대신 tempfile.mkstemp나 NamedTemporaryFile을 사용하세요.',
+             'en': 'Use tempfile.mkstemp or NamedTemporaryFile instead of tempfile.mktemp.'},
+    'B307': {'cwe': 'CWE-94',
+             'ko': 'eval 대신 ast.literal_eval이나 json.loads로 데이터를 파싱하세요.',
+             'en': 'Parse data with ast.literal_eval or json.loads instead of eval.'},
+    'B311': {'cwe': 'CWE-330'},
+    'B312': {'cwe': 'CWE-319'},
+    'B313': {'cwe': 'CWE-611'}, 'B314': {'cwe': 'CWE-611'}, 'B315': {'cwe': 'CWE-611'},
+    'B316': {'cwe': 'CWE-611'}, 'B317': {'cwe': 'CWE-611'}, 'B318': {'cwe': 'CWE-611'},
+    'B319': {'cwe': 'CWE-611'}, 'B320': {'cwe': 'CWE-611'},
+    'B321': {'cwe': 'CWE-319'},
+    'B323': {'cwe': 'CWE-295'},
+    'B324': {'cwe': 'CWE-327',
+             'ko': 'hashlib.sha256 이상을 사용하고, 보안 용도가 아니면 usedforsecurity=False를 지정하세요.',
+             'en': 'Use hashlib.sha256 or stronger, or pass usedforsecurity=False for non-security uses.'},
+    'B403': {'cwe': 'CWE-502'},
+    'B404': {'cwe': 'CWE-78',
+             'ko': 'subprocess 호출마다 shell=False와 인자 리스트를 사용하고, 외부 입력을 검증하세요.',
+             'en': 'Use shell=False and an argument list for every subprocess call, and validate external input.'},
+    'B405': {'cwe': 'CWE-611'}, 'B406': {'cwe': 'CWE-611'}, 'B407': {'cwe': 'CWE-611'},
+    'B408': {'cwe': 'CWE-611'}, 'B409': {'cwe': 'CWE-611'}, 'B410': {'cwe': 'CWE-611'},
+    'B413': {'cwe': 'CWE-327'},
+    'B501': {'cwe': 'CWE-295'},
+    'B502': {'cwe': 'CWE-327'}, 'B503': {'cwe': 'CWE-327'}, 'B504': {'cwe': 'CWE-327'},
+    'B505': {'cwe': 'CWE-326'},
+    'B506': {'cwe': 'CWE-502',
+             'ko': 'yaml.load 대신 yaml.safe_load를 사용하세요.',
+             'en': 'Use yaml.safe_load instead of yaml.load.'},
+    'B507': {'cwe': 'CWE-295'},
+    'B601': {'cwe': 'CWE-78'}, 'B602': {'cwe': 'CWE-78'}, 'B603': {'cwe': 'CWE-78'},
+    'B604': {'cwe': 'CWE-78'}, 'B605': {'cwe': 'CWE-78'}, 'B606': {'cwe': 'CWE-78'},
+    'B607': {'cwe': 'CWE-78',
+             'ko': '실행 파일은 절대 경로로 지정하여 PATH 조작을 막으세요.',
+             'en': 'Invoke executables by absolute path to prevent PATH manipulation.'},
+    'B608': {'cwe': 'CWE-89'},
+    'B609': {'cwe': 'CWE-78'},
+    'B610': {'cwe': 'CWE-89'}, 'B611': {'cwe': 'CWE-89'},
+    'B701': {'cwe': 'CWE-79',
+             'ko': 'jinja2.Environment(autoescape=True) 또는 select_autoescape()를 사용하세요.',
+             'en': 'Use jinja2.Environment(autoescape=True) or select_autoescape().'},
+    'B702': {'cwe': 'CWE-79'}, 'B703': {'cwe': 'CWE-79'},
+}
+
+# Semgrep 규칙 ID(점으로 구분된 접두사 또는 규칙 이름)별 CWE (메타데이터에 CWE가 없는 규칙 보완)
+SEMGREP_RULE_REMEDIATION = {
+    'python.lang.security.audit.formatted-sql-query': {'cwe': 'CWE-89'},
+    'python.django.security.injection.sql': {'cwe': 'CWE-89'},
+    'python.sqlalchemy.security': {'cwe': 'CWE-89'},
+    'python.lang.security.audit.subprocess-shell-true': {'cwe': 'CWE-78'},
+    'python.lang.security.audit.dangerous-system-call': {'cwe': 'CWE-78'},
+    'python.lang.security.audit.eval-detected': {'cwe': 'CWE-94'},
+    'python.lang.security.audit.exec-detected': {'cwe': 'CWE-94'},
+    'python.lang.security.deserialization': {'cwe': 'CWE-502'},
+    'python.lang.security.insecure-hash-algorithms': {'cwe': 'CWE-327'},
+    'python.flask.security.audit.debug-enabled': {'cwe': 'CWE-489'},
+    'python.flask.security.injection.ssrf-requests': {'cwe': 'CWE-918'},
+    'python.flask.security.open-redirect': {'cwe': 'CWE-601'},
+    'python.requests.security.disabled-cert-validation': {'cwe': 'CWE-295'},
+    'javascript.browser.security.insecure-document-method': {'cwe': 'CWE-79'},
+    'javascript.browser.security.eval-detected': {'cwe': 'CWE-94'},
+    'javascript.lang.security.audit.path-traversal': {'cwe': 'CWE-22'},
+    'javascript.express.security.audit.xss': {'cwe': 'CWE-79'},
+    'javascript.jsonwebtoken.security': {'cwe': 'CWE-798'},
+    'generic.secrets': {'cwe': 'CWE-798'},
+    # 규칙 이름만으로 찾는 항목
+    'formatted-sql-query': {'cwe': 'CWE-89'},
+    'sql-injection': {'cwe': 'CWE-89'},
+    'tainted-sql-string': {'cwe': 'CWE-89'},
+    'subprocess-shell-true': {'cwe': 'CWE-78'},
+    'command-injection': {'cwe': 'CWE-78'},
+    'eval-detected': {'cwe': 'CWE-94'},
+    'insecure-document-method': {'cwe': 'CWE-79'},
+    'path-traversal': {'cwe': 'CWE-22'},
+    'hardcoded-secret': {'cwe': 'CWE-798'},
+    'detected-generic-secret': {'cwe': 'CWE-798'},
+    'avoid-pickle': {'cwe': 'CWE-502'},
+    'insecure-hash-algorithm-md5': {'cwe': 'CWE-327'},
+    'insecure-hash-algorithm-sha1': {'cwe': 'CWE-327'},
+    'debug-enabled': {'cwe': 'CWE-489'},
+    'ssrf-requests': {'cwe': 'CWE-918'},
+    'open-redirect': {'cwe': 'CWE-601'},
+    'cors-misconfiguration': {'cwe': 'CWE-942'},
+    'insecure-cookie': {'cwe': 'CWE-614'},
+}
+
+# Message Batches 요청 가격 비율 (동기 호출 대비)
+MESSAGE_BATCHES_DISCOUNT = 0.5
+
+# 사전 계획용 응답 시간 모델 (요청당 고정 지연 + 토큰 처리 속도)
+LLM_LATENCY_PROFILE = {
+    'overhead_seconds': 2.0,
+    'input_tokens_per_second': 8000.0,
+    'output_tokens_per_second': 60.0,
+}
+
+# 사전 계획용 출력 토큰 추정치
+LLM_OUTPUT_ESTIMATE = {
+    'base_tokens': 400,          # summary, overall_assessment 등 고정 부분
+    'tokens_per_finding': 350,   # 도구 발견 1건을 한글로 재서술하는 비용
+    'tokens_per_file': 150,      # 파일당 LLM 추가 발견 여유분
+    'tokens_per_verdict': 60,    # 트리아지 판정 1건 (id, verdict, 한 문장 이유)
+}
+
+
 class UnclosableStringIO(io.StringIO):
     """StringIO wrapper that prevents closing (for Bandit formatter compatibility)"""
     def close(self):
@@ -29,978 +625,5758 @@ class UnclosableStringIO(io.StringIO):
         super().close()
 
 
-class IntegratedSecurityAnalyzer:
-    def __init__(self, api_key):
+class CircuitOpenError(Exception):
+    """서킷 브레이커가 열려 있어 요청을 보내지 않고 즉시 실패"""
+    pass
+
+
+class LLMRequestScheduler:
+    """
+    Claude API 호출 스케줄러
+    
+    - AIMD 동시성 제어: 성공이 이어지면 동시 요청 한도를 1씩 늘리고, 429/529 응답을 받으면 절반으로 줄임
+    - 재시도: retry-after 헤더를 우선 따르고, 없으면 지터를 준 지수 백오프
+    - 서킷 브레이커: 서버 오류/연결 실패가 연속되면 일정 시간 동안 요청 없이 즉시 실패
+      쿨다운이 지나면 반열림 상태에서 시험 요청 하나만 보내고, 나머지는 그 결과를 기다립니다.
+      시험 요청이 성공하면(또는 서버가 응답하면) 닫히고, 다시 장애면 열립니다.
+    """
+    
+    THROTTLE_STATUS = {429, 529}
+    RETRYABLE_STATUS = {408, 409, 429, 500, 502, 503, 504, 529}
+    
+    def __init__(self, initial_concurrency=1, max_concurrency=8, max_retries=5,
+                 base_delay=1.0, max_delay=60.0, failure_threshold=5, cooldown_seconds=30.0):
+        self.max_concurrency = max(1, max_concurrency)
+        self.limit = float(min(max(1, initial_concurrency), self.max_concurrency))
+        self.max_retries = max_retries
+        self.base_delay = base_delay
+        self.max_delay = max_delay
+        self.failure_threshold = failure_threshold
+        self.cooldown_seconds = cooldown_seconds
+        
+        self._cond = threading.Condition()
+        self._active = 0
+        self._consecutive_failures = 0
+        self._opened_at = None
+        self._half_open = False
+        self._probe_in_flight = False
+        
+        # 통계
+        self.started_at = time.monotonic()
+        self.requests = 0
+        self.successes = 0
+        self.failures = 0
+        self.retries = 0
+        self.throttled = 0
+        self.circuit_rejections = 0
+        self.peak_concurrency = 0
+    
+    def call(self, func):
         """
-        Bandit + LLM을 사용한 통합 보안 취약점 분석기 초기화
+        동시성 한도 안에서 func를 실행하고, 재시도 가능한 오류면 백오프 후 재시도
         
         Args:
-            api_key: Anthropic API 키
+            func: 인자 없는 API 호출 함수
+            
+        Returns:
+            func의 반환값
         """
-        self.client = anthropic.Anthropic(api_key=api_key)
-        self.model = "claude-sonnet-4-5-20250929"
-        
-        # 지원하는 파일 확장자
-        self.supported_extensions = {
-            # 프론트엔드
-            '.js', '.jsx', '.ts', '.tsx', '.vue', '.html', '.css', '.scss', '.sass',
-            # 백엔드
-            '.py', '.java', '.php', '.go', '.rb', '.cs', '.cpp', '.c', '.h', '.rs', '.swift',
-            # 설정 파일
-            '.json', '.yml', '.yaml', '.xml', '.env', '.config'
-        }
-        
-        # 제외할 디렉토리
-        self.exclude_dirs = {
-            'node_modules', '.git', '__pycache__', 'venv', 'env', 
-            'dist', 'build', '.next', '.nuxt', 'coverage', '.pytest_cache',
-            'target', 'bin', 'obj', 'vendor', 'bower_components'
-        }
-        
-        # 제외할 파일 패턴
-        self.exclude_files = {
-            '.min.js', '.min.css', '.map', '.lock', 
-            'package-lock.json', 'yarn.lock', 'Pipfile.lock'
-        }
-        
-        # 분석 결과 저장
-        self.bandit_results = None
-        self.semgrep_results = None
+        attempt = 0
+        while True:
+            try:
+                probe = self._acquire()
+            except CircuitOpenError:
+                with self._cond:
+                    self.failures += 1
+                raise
+            try:
+                result = func()
+            except Exception as e:
+                status = getattr(e, 'status_code', None)
+                retryable = status in self.RETRYABLE_STATUS or isinstance(e, anthropic.APIConnectionError)
+                self._release(success=False, status=status, retryable=retryable, probe=probe)
+                if not retryable or attempt >= self.max_retries:
+                    with self._cond:
+                        self.failures += 1
+                    raise
+                delay = self._retry_delay(e, attempt)
+                attempt += 1
+                with self._cond:
+                    self.retries += 1
+                time.sleep(delay)
+                continue
+            self._release(success=True, probe=probe)
+            return result
     
-    def scan_directory(self, directory_path):
+    def _acquire(self):
         """
-        디렉토리를 스캔하여 모든 코드 파일 찾기
+        동시 실행 슬롯 확보 (서킷이 열려 있으면 CircuitOpenError)
         
-        Args:
-            directory_path: 스캔할 디렉토리 경로
-            
         Returns:
-            파일 경로 리스트
+            반열림 상태의 시험 요청이면 True
         """
-        code_files = []
-        directory = Path(directory_path)
-        
-        if not directory.exists():
-            print(f"✗ 디렉토리를 찾을 수 없습니다: {directory_path}")
-            return []
-        
-        print(f"\n📂 디렉토리 스캔 중: {directory_path}")
-        
-        for root, dirs, files in os.walk(directory):
-            # 제외할 디렉토리 필터링
-            dirs[:] = [d for d in dirs if d not in self.exclude_dirs and not d.startswith('.')]
-            
-            for file in files:
-                # 파일 확장자 확인
-                if any(file.endswith(ext) for ext in self.supported_extensions):
-                    # 제외할 파일 패턴 확인
-                    if not any(pattern in file for pattern in self.exclude_files):
-                        file_path = Path(root) / file
-                        code_files.append(str(file_path))
+        with self._cond:
+            while True:
+                if self._opened_at is not None:
+                    if time.monotonic() - self._opened_at < self.cooldown_seconds:
+                        self.circuit_rejections += 1
+                        raise CircuitOpenError("API 엔드포인트 장애로 서킷 브레이커가 열려 있습니다")
+                    # 쿨다운이 지나면 반열림 상태로 요청 하나만 시험
+                    self._opened_at = None
+                    self._half_open = True
+                    self._probe_in_flight = False
+                if self._half_open:
+                    if not self._probe_in_flight and self._active < int(self.limit):
+                        self._probe_in_flight = True
+                        probe = True
+                        break
+                elif self._active < int(self.limit):
+                    probe = False
+                    break
+                # 슬롯이 없거나 시험 요청 결과를 기다리는 중
+                self._cond.wait()
+            self._active += 1
+            self.requests += 1
+            self.peak_concurrency = max(self.peak_concurrency, self._active)
+            return probe
+    
+    def _release(self, success, status=None, retryable=False, probe=False):
+        with self._cond:
+            self._active -= 1
+            if success:
+                self.successes += 1
+                self._consecutive_failures = 0
+                # 가산 증가: 현재 한도만큼 성공하면 한도 +1
+                self.limit = min(self.max_concurrency, self.limit + 1.0 / self.limit)
+            elif status in self.THROTTLE_STATUS:
+                self.throttled += 1
+                # 승산 감소
+                self.limit = max(1.0, self.limit / 2)
+            outage = not success and retryable and status != 429
+            if probe:
+                # 시험 요청 결과로 서킷을 닫거나 다시 엶
+                self._half_open = False
+                self._probe_in_flight = False
+                if outage:
+                    self._opened_at = time.monotonic()
+                else:
+                    self._consecutive_failures = 0
+            elif outage and not self._half_open:
+                self._consecutive_failures += 1
+                if self._consecutive_failures >= self.failure_threshold:
+                    self._opened_at = time.monotonic()
+            self._cond.notify_all()
+    
+    def _retry_delay(self, error, attempt):
+        """
+        재시도 대기 시간 계산 (retry-after 헤더 우선, 없으면 지터를 준 지수 백오프)
+        """
+        response = getattr(error, 'response', None)
+        headers = getattr(response, 'headers', None) or {}
+        try:
+            if headers.get('retry-after-ms'):
+                return min(self.max_delay, float(headers['retry-after-ms']) / 1000)
+            if headers.get('retry-after'):
+                return min(self.max_delay, float(headers['retry-after']))
+        except (TypeError, ValueError):
+            pass
+        return random.uniform(0, min(self.max_delay, self.base_delay * (2 ** attempt)))
+    
+    def stats(self):
+        """
+        스케줄러 통계 반환
         
-        print(f"✓ {len(code_files)}개의 코드 파일 발견")
-        return code_files
+        Returns:
+            요청 수, 성공/실패/재시도/스로틀 횟수, 달성 처리량(req/s), 현재 동시성 한도 딕셔너리
+        """
+        with self._cond:
+            elapsed = max(time.monotonic() - self.started_at, 1e-9)
+            return {
+                'requests': self.requests,
+                'successes': self.successes,
+                'failures': self.failures,
+                'retries': self.retries,
+                'throttled': self.throttled,
+                'circuit_rejections': self.circuit_rejections,
+                'requests_per_second': self.successes / elapsed,
+                'concurrency_limit': int(self.limit),
+                'peak_concurrency': self.peak_concurrency,
+                'elapsed_seconds': elapsed,
+            }
     
-    def categorize_files(self, file_paths):
+    def print_stats(self):
         """
-        파일들을 프론트엔드/백엔드/설정 파일로 분류
+        스케줄러 통계 출력
+        """
+        stats = self.stats()
+        print(f"   🚦 요청 통계: 성공 {stats['successes']}개, 실패 {stats['failures']}개, "
+              f"재시도 {stats['retries']}회 (429/529: {stats['throttled']}회)")
+        print(f"      처리량 {stats['requests_per_second']:.2f} req/s, "
+              f"동시 실행 최대 {stats['peak_concurrency']}개 (현재 한도 {stats['concurrency_limit']}개)")
+        if stats['circuit_rejections']:
+            print(f"      ⚠ 서킷 브레이커로 차단된 요청: {stats['circuit_rejections']}개")
+
+
+class RemediationKnowledgeBase:
+    """
+    오프라인 조치 지식 베이스 (LLM 없이 도구 발견의 영향/권장사항 작성)
+    
+    CWE ID, Bandit 테스트 ID, Semgrep 규칙 ID 접두사로 찾으며, 모든 조회는 딕셔너리 검색입니다.
+    """
+    
+    def __init__(self, templates=None, aliases=None, bandit_index=None, semgrep_index=None):
+        self.templates = templates if templates is not None else CWE_TEMPLATES
+        self.aliases = aliases if aliases is not None else CWE_TEMPLATE_ALIASES
+        self.bandit_index = bandit_index if bandit_index is not None else BANDIT_REMEDIATION
+        self.semgrep_index = semgrep_index if semgrep_index is not None else SEMGREP_RULE_REMEDIATION
+    
+    @staticmethod
+    def normalize_cwe_id(cwe_id):
+        """
+        "89", "CWE-89", "CWE-89: SQL Injection" 등을 "CWE-89" 형식으로 정규화 (숫자가 없으면 빈 문자열)
+        """
+        match = re.search(r"\d+", str(cwe_id or ''))
+        return f"CWE-{int(match.group())}" if match else ''
+    
+    def template(self, cwe_id, language='ko'):
+        """
+        CWE 템플릿 (카탈로그에 없으면 None)
+        """
+        cwe = self.normalize_cwe_id(cwe_id)
+        entry = self.templates.get(self.aliases.get(cwe, cwe))
+        if entry is None:
+            return None
+        return entry.get(language) or entry['ko']
+    
+    def default_template(self, language='ko'):
+        """
+        카탈로그에 없는 CWE에 쓰는 기본 템플릿
+        """
+        entry = self.templates['default']
+        return entry.get(language) or entry['ko']
+    
+    def semgrep_entry(self, rule_id):
+        """
+        Semgrep 규칙 ID의 가장 긴 접두사, 그다음 규칙 이름(마지막 구간)으로 항목 조회
+        """
+        parts = str(rule_id or '').split('.')
+        for end in range(len(parts), 0, -1):
+            entry = self.semgrep_index.get('.'.join(parts[:end]))
+            if entry:
+                return entry
+        return self.semgrep_index.get(parts[-1])
+    
+    def lookup(self, cwe_id=None, bandit_test_id=None, semgrep_rule_id=None, language='ko'):
+        """
+        도구 발견에 대한 조치 정보 조회
+        
+        우선순위: 도구 규칙 전용 권장사항 > 발견의 CWE 템플릿 > 규칙에 매핑된 CWE 템플릿
         
         Args:
-            file_paths: 파일 경로 리스트
+            cwe_id: 발견에 붙은 CWE (없으면 규칙 매핑 사용)
+            bandit_test_id: Bandit 테스트 ID (예: B608)
+            semgrep_rule_id: Semgrep 규칙 ID
+            language: 템플릿 언어 (ko, en)
             
         Returns:
-            카테고리별로 분류된 딕셔너리
+            {'cwe_id', 'category', 'impact', 'recommendation'} 딕셔너리 (찾지 못하면 None)
         """
-        categories = {
-            'frontend': [],
-            'backend': [],
-            'config': [],
-            'python': []  # Python 파일 별도 추적
-        }
-        
-        frontend_exts = {'.js', '.jsx', '.ts', '.tsx', '.vue', '.html', '.css', '.scss', '.sass'}
-        backend_exts = {'.py', '.java', '.php', '.go', '.rb', '.cs', '.cpp', '.c', '.h', '.rs', '.swift'}
-        config_exts = {'.json', '.yml', '.yaml', '.xml', '.env', '.config'}
-        
-        for file_path in file_paths:
-            ext = Path(file_path).suffix
-            if ext in frontend_exts:
-                categories['frontend'].append(file_path)
-            elif ext in backend_exts:
-                categories['backend'].append(file_path)
-                if ext == '.py':
-                    categories['python'].append(file_path)
-            elif ext in config_exts:
-                categories['config'].append(file_path)
+        rule_entry = None
+        if bandit_test_id:
+            rule_entry = self.bandit_index.get(bandit_test_id)
+        elif semgrep_rule_id:
+            rule_entry = self.semgrep_entry(semgrep_rule_id)
+        
+        cwe = self.normalize_cwe_id(cwe_id) or self.normalize_cwe_id((rule_entry or {}).get('cwe'))
+        template = self.template(cwe, language)
+        if template is None and rule_entry and rule_entry.get('cwe'):
+            template = self.template(rule_entry['cwe'], language)
+        if template is None:
+            return None
         
-        print(f"\n📊 파일 분류:")
-        print(f"  - 프론트엔드: {len(categories['frontend'])}개")
-        print(f"  - 백엔드: {len(categories['backend'])}개")
-        print(f"  - Python 파일: {len(categories['python'])}개")
-        print(f"  - 설정 파일: {len(categories['config'])}개")
+        recommendation = (rule_entry or {}).get(language) or (rule_entry or {}).get('ko') or template['recommendation']
+        return {
+            'cwe_id': cwe,
+            'category': template['category'],
+            'impact': template['impact'],
+            'recommendation': recommendation,
+        }
+
+
+class FindingIndex:
+    """
+    발견 지문 인덱스 (도구/배치 간 중복 제거를 해시 조회로 처리)
+    
+    지문은 (정규화한 전체 경로, 라인 버킷, CWE 또는 규칙 계열, 정규화한 스니펫 해시)입니다.
+    다른 출처의 발견은 지문이 같거나, 이웃 버킷에서 line_bucket줄 이내이거나, 스니펫이 같으면 같은 발견으로 봅니다.
+    스니펫 일치는 한쪽에 라인이 없거나 두 라인이 snippet_bucket_window 버킷 이내일 때만 인정합니다
+    (`cursor.execute(query)` 같은 흔한 한 줄 스니펫이 멀리 떨어진 서로 다른 발견을 합치지 않도록).
+    같은 출처의 발견은 같은 라인일 때만 같은 발견입니다 (연속된 줄의 같은 규칙 발견을 합치지 않도록).
+    """
+    
+    def __init__(self, paths=(), line_bucket=3, snippet_bucket_window=3):
+        self.line_bucket = max(1, line_bucket)
+        self.snippet_bucket_window = max(0, snippet_bucket_window)
+        # "파일명"/표시 경로로만 위치를 보고한 발견(LLM)을 전체 경로로 해석하기 위한 맵
+        self.path_names = {}
+        for path in paths:
+            self.path_names.setdefault(path, path)
+            self.path_names.setdefault(Path(path).name, path)
+        self.normalized_paths = {}
+        self.by_line = {}       # (출처, 경로, 계열, 라인) -> 발견
+        self.by_key = {}        # 지문 키 -> {출처: 발견}
+        self.by_snippet = {}    # (경로, 계열, 스니펫 해시) -> {출처: [발견]}
+        self.by_bucket = {}     # (경로, 계열, 버킷) -> [발견] (라인이 있는 발견만)
+    
+    def normalize_path(self, vuln):
+        """
+        발견의 전체 경로 (file_path가 없으면 location의 파일 부분을 알려진 경로로 해석)
+        """
+        path = vuln.get('file_path')
+        if not path:
+            file_part = str(vuln.get('location') or '').rpartition(':')[0]
+            path = self.path_names.get(file_part) or self.path_names.get(Path(file_part).name) or file_part
+        if path not in self.normalized_paths:
+            self.normalized_paths[path] = os.path.normcase(os.path.abspath(path)) if path else ''
+        return self.normalized_paths[path]
+    
+    @staticmethod
+    def line_of(vuln):
+        """
+        발견의 라인 번호 (line 필드, 없으면 location에서 추출, 모르면 None)
+        """
+        line = vuln.get('line')
+        if isinstance(line, int):
+            return line
+        line_part = str(vuln.get('location') or '').rpartition(':')[2].strip()
+        return int(line_part) if line_part.isdigit() else None
+    
+    @staticmethod
+    def family(vuln):
+        """
+        CWE (없으면 규칙 이름, 그것도 없으면 제목)로 정한 발견 계열 (호환 CWE는 대표 CWE로)
+        """
+        cwe = RemediationKnowledgeBase.normalize_cwe_id(vuln.get('cwe_id'))
+        if cwe:
+            # 호환되는 CWE(예: CWE-77/CWE-78)는 같은 계열
+            return CWE_TEMPLATE_ALIASES.get(cwe, cwe)
+        rule_id = str(vuln.get('rule_id') or '')
+        if rule_id:
+            return rule_id.rsplit('.', 1)[-1].lower()
+        return " ".join(str(vuln.get('title') or '').lower().split())
+    
+    @staticmethod
+    def clean_snippet(snippet):
+        """
+        코드 스니펫에서 줄마다 붙은 라인 번호 접두사(Bandit 형식 "16 ...")를 제거
+        """
+        return "\n".join(re.sub(r"^\s*\d+\s", "", line) for line in str(snippet or '').splitlines())
+    
+    @staticmethod
+    def snippet_hash(vuln):
+        """
+        라인 번호 접두사와 공백 차이를 없앤 코드 스니펫의 해시 (스니펫이 없으면 빈 문자열)
+        """
+        normalized = " ".join(FindingIndex.clean_snippet(vuln.get('code_snippet')).split())
+        return hashlib.sha1(normalized.encode('utf-8')).hexdigest()[:12] if normalized else ''
+    
+    @staticmethod
+    def origin(vuln):
+        """
+        같은 출처 판단용 키 (도구 원본은 도구 이름, LLM이 작성한 항목은 'LLM')
+        """
+        return vuln.get('source') if vuln.get('rule_id') else 'LLM'
+    
+    def key(self, vuln):
+        """
+        발견의 지문 키 (경로, 라인 버킷, 계열, 스니펫 해시)
+        """
+        line = self.line_of(vuln)
+        bucket = line // self.line_bucket if line is not None else None
+        return (self.normalize_path(vuln), bucket, self.family(vuln), self.snippet_hash(vuln))
+    
+    def fingerprint(self, vuln):
+        """
+        보고서/내보내기에 쓰는 지문 문자열 (지문 키의 SHA-1 앞 16자리)
+        """
+        return hashlib.sha1("|".join(str(part) for part in self.key(vuln)).encode('utf-8')).hexdigest()[:16]
+    
+    def find(self, vuln, key=None):
+        """
+        이미 색인된 같은 발견 (없으면 None)
+        """
+        key = key or self.key(vuln)
+        path, bucket, family, snippet = key
+        origin = self.origin(vuln)
+        line = self.line_of(vuln)
+        
+        if line is not None and (origin, path, family, line) in self.by_line:
+            return self.by_line[(origin, path, family, line)]
+        for other_origin, other in (self.by_key.get(key) or {}).items():
+            if other_origin != origin:
+                return other
+        if snippet:
+            for other_origin, others in (self.by_snippet.get((path, family, snippet)) or {}).items():
+                if other_origin == origin:
+                    continue
+                for other in others:
+                    other_line = self.line_of(other)
+                    if (line is None or other_line is None
+                            or abs(other_line // self.line_bucket - bucket) <= self.snippet_bucket_window):
+                        return other
+        if line is not None:
+            for neighbor in (bucket - 1, bucket, bucket + 1):
+                for other in self.by_bucket.get((path, family, neighbor), ()):
+                    if self.origin(other) != origin and abs(self.line_of(other) - line) <= self.line_bucket:
+                        return other
+        return None
+    
+    def add(self, vuln):
+        """
+        발견을 색인하고 지문을 붙임
         
-        return categories
+        Returns:
+            같은 발견이 이미 있으면 그 발견, 새 발견이면 None
+        """
+        key = self.key(vuln)
+        existing = self.find(vuln, key)
+        if existing is not None:
+            return existing
+        vuln['fingerprint'] = self.fingerprint(vuln)
+        path, bucket, family, snippet = key
+        origin = self.origin(vuln)
+        self.by_key.setdefault(key, {}).setdefault(origin, vuln)
+        if snippet:
+            self.by_snippet.setdefault((path, family, snippet), {}).setdefault(origin, []).append(vuln)
+        if bucket is not None:
+            self.by_line[(origin, path, family, self.line_of(vuln))] = vuln
+            self.by_bucket.setdefault((path, family, bucket), []).append(vuln)
+        return None
+
+
+class Finding(MutableMapping):
+    """
+    발견 한 건의 레코드 (__slots__ 기반, 딕셔너리와 같은 방식으로 읽고 쓸 수 있음)
     
-    def run_semgrep_analysis(self, target_path):
+    자주 쓰는 필드는 슬롯에, 나머지(트리아지 판정, 상관 정보 등)는 extra 딕셔너리에 저장합니다.
+    경로, 규칙 ID, CWE, 출처 같은 범주형 문자열은 intern하여 같은 값을 한 번만 보관합니다.
+    """
+    
+    FIELDS = ('severity', 'category', 'title', 'description', 'location', 'code_snippet', 'impact',
+              'recommendation', 'cwe_id', 'source', 'file_path', 'line', 'rule_id', 'confidence', 'fingerprint')
+    INTERNED = frozenset(('severity', 'category', 'cwe_id', 'source', 'file_path', 'rule_id', 'confidence'))
+    FIELD_SET = frozenset(FIELDS)
+    __slots__ = FIELDS + ('extra',)
+    
+    def __init__(self, data=(), **fields):
+        self.extra = None
+        self.update(data, **fields)
+    
+    def __getitem__(self, key):
+        if key in self.FIELD_SET:
+            try:
+                return getattr(self, key)
+            except AttributeError:
+                raise KeyError(key) from None
+        if self.extra is None:
+            raise KeyError(key)
+        return self.extra[key]
+    
+    def __setitem__(self, key, value):
+        if key in self.FIELD_SET:
+            if key in self.INTERNED and type(value) is str:
+                value = sys.intern(value)
+            setattr(self, key, value)
+        else:
+            if self.extra is None:
+                self.extra = {}
+            self.extra[key] = value
+    
+    def __delitem__(self, key):
+        if key in self.FIELD_SET:
+            try:
+                delattr(self, key)
+            except AttributeError:
+                raise KeyError(key) from None
+        elif self.extra is not None:
+            del self.extra[key]
+        else:
+            raise KeyError(key)
+    
+    def __iter__(self):
+        for key in self.FIELDS:
+            if hasattr(self, key):
+                yield key
+        if self.extra:
+            yield from self.extra
+    
+    def __len__(self):
+        return sum(1 for _ in self)
+    
+    def __repr__(self):
+        return f"Finding({self.to_dict()!r})"
+    
+    def to_dict(self):
         """
-        Semgrep을 사용하여 다양한 언어의 코드 분석 (OWASP Top 10 포함)
+        JSON 직렬화용 일반 딕셔너리
+        """
+        return dict(self)
+
+
+class FindingStore:
+    """
+    발견 레코드 저장소 (심각도/출처/파일/CWE 보조 인덱스와 조회 API)
+    
+    요약 통계는 인덱스 크기에서 바로 계산하므로 발견 목록을 여러 번 훑지 않습니다.
+    반복 발견 묶음(occurrences)은 카드 하나로 저장하되, 요약 통계는 묶인 개별 발견 기준으로 셉니다.
+    추가한 뒤 인덱스 필드(심각도 등)를 바꾸면 reindex()를 호출해야 합니다.
+    """
+    
+    INDEXED = ('severity', 'source', 'file_path', 'cwe_id')
+    
+    def __init__(self, findings=()):
+        self.records = []
+        self.indexes = {field: {} for field in self.INDEXED}
+        self.occurrence_counts = {field: {} for field in self.INDEXED}
+        self.occurrence_total = 0
+        self.extend(findings)
+    
+    def add(self, finding):
+        """
+        발견을 레코드로 변환(이미 Finding이면 그대로)해 추가하고 인덱스 갱신
         
-        Args:
-            target_path: 분석할 디렉토리 또는 파일 경로
-            
         Returns:
-            Semgrep 분석 결과 (JSON 형식)
+            추가된 Finding
         """
-        print(f"\n🔍 Semgrep으로 보안 분석 중 (OWASP Top 10 포함)...")
+        record = finding if isinstance(finding, Finding) else Finding(finding)
+        position = len(self.records)
+        self.records.append(record)
+        for field, index in self.indexes.items():
+            index.setdefault(getattr(record, field, None) or '', []).append(position)
+        for occurrence in record.get('occurrences') or (record,):
+            self.occurrence_total += 1
+            for field, counts in self.occurrence_counts.items():
+                value = occurrence.get(field) or ''
+                counts[value] = counts.get(value, 0) + 1
+        return record
+    
+    def extend(self, findings):
+        for finding in findings:
+            self.add(finding)
+    
+    def reindex(self):
+        """
+        레코드의 인덱스 필드가 바뀐 뒤 보조 인덱스를 다시 만듦
+        """
+        records = self.records
+        self.records = []
+        self.indexes = {field: {} for field in self.INDEXED}
+        self.occurrence_counts = {field: {} for field in self.INDEXED}
+        self.occurrence_total = 0
+        self.extend(records)
+    
+    def __len__(self):
+        return len(self.records)
+    
+    def __iter__(self):
+        return iter(self.records)
+    
+    def count(self, field, value):
+        """
+        인덱스 필드 값이 value인 발견 수 (딕셔너리 조회 한 번)
+        """
+        return len(self.indexes[field].get(value, ()))
+    
+    def occurrences(self, field, value):
+        """
+        인덱스 필드 값이 value인 개별 발견 수 (반복 발견 묶음은 묶인 발견마다 셈)
+        """
+        return self.occurrence_counts[field].get(value, 0)
+    
+    def query(self, **criteria):
+        """
+        인덱스 필드 조건(예: severity='High', source='Bandit')을 모두 만족하는 발견 목록
+        
+        가장 작은 인덱스 목록부터 교집합을 구하므로 결과가 작으면 조회도 빠릅니다.
+        값으로 리스트/튜플/집합을 주면 그중 하나와 같은 발견을 찾습니다.
+        """
+        if not criteria:
+            return list(self.records)
+        candidates = []
+        for field, value in criteria.items():
+            values = value if isinstance(value, (list, tuple, set, frozenset)) else (value,)
+            positions = set()
+            for item in values:
+                positions.update(self.indexes[field].get(item, ()))
+            candidates.append(positions)
+        candidates.sort(key=len)
+        matched = candidates[0].intersection(*candidates[1:])
+        return [self.records[position] for position in sorted(matched)]
+    
+    def values(self, field):
+        """
+        인덱스 필드의 값별 발견 수 {값: 개수}
+        """
+        return {value: len(positions) for value, positions in self.indexes[field].items()}
+    
+    def occurrence_values(self, field):
+        """
+        인덱스 필드의 값별 개별 발견 수 {값: 개수} (반복 발견 묶음은 묶인 발견마다 셈)
+        """
+        return dict(self.occurrence_counts[field])
+    
+    def summary(self):
+        """
+        보고서 요약 통계 (개별 발견 기준, 카드 수는 cards)
+        """
+        return {
+            'total_vulnerabilities': self.occurrence_total,
+            'cards': len(self.records),
+            'critical': self.occurrences('severity', 'Critical'),
+            'high': self.occurrences('severity', 'High'),
+            'medium': self.occurrences('severity', 'Medium'),
+            'low': self.occurrences('severity', 'Low'),
+            'semgrep_issues': self.occurrences('source', 'Semgrep'),
+            'bandit_issues': self.occurrences('source', 'Bandit'),
+            'llm_found_issues': self.occurrences('source', 'LLM Analysis'),
+        }
+
+
+class BaselineStore:
+    """
+    로컬 기준선 저장소 (수용한 발견 지문과 직전 스캔 지문, JSON 파일)
+    
+    파일 형식: {"version": 1, "accepted": {지문: 메타데이터}, "last_scan": [지문, ...], "updated": 시각}
+    """
+    
+    VERSION = 1
+    
+    def __init__(self, path):
+        self.path = path
+        self.accepted = {}
+        self.previous = set()
+        self.updated = None
+        self.load()
+    
+    def load(self):
+        """
+        기준선 파일을 읽음 (파일이 없거나 손상되면 빈 기준선)
+        """
+        data = {}
+        if self.path and os.path.exists(self.path):
+            try:
+                with open(self.path, 'r', encoding='utf-8') as f:
+                    data = json.load(f)
+            except (OSError, json.JSONDecodeError) as e:
+                print(f"⚠ 기준선 파일을 읽을 수 없습니다 ({e}) - 빈 기준선으로 시작합니다")
+                data = {}
+        self.accepted = dict(data.get('accepted') or {})
+        self.previous = set(data.get('last_scan') or [])
+        self.updated = data.get('updated')
+    
+    def is_accepted(self, fingerprint):
+        return fingerprint in self.accepted
+    
+    def is_known(self, fingerprint):
+        """
+        수용했거나 직전 스캔에 있던 지문인지 (딕셔너리/집합 해시 조회)
+        """
+        return fingerprint in self.accepted or fingerprint in self.previous
+    
+    def diff(self, fingerprints):
+        """
+        이번 스캔 지문을 기준선과 비교
+        
+        Args:
+            fingerprints: 이번 스캔의 지문 집합
+            
+        Returns:
+            {'new': 집합, 'unchanged': 집합, 'fixed': 집합}
+        """
+        new = {fp for fp in fingerprints if not self.is_known(fp)}
+        return {
+            'new': new,
+            'unchanged': set(fingerprints) - new,
+            'fixed': (set(self.accepted) | self.previous) - set(fingerprints),
+        }
+    
+    def accept(self, findings):
+        """
+        발견들을 수용한 기준선에 추가 ({지문: 메타데이터})
+        """
+        now = datetime.now().isoformat(timespec='seconds')
+        for fingerprint, meta in findings.items():
+            self.accepted.setdefault(fingerprint, dict(meta, accepted_at=now))
+    
+    def save(self, last_scan):
+        """
+        직전 스캔 지문을 갱신하고 파일에 저장
+        """
+        self.previous = set(last_scan)
+        self.updated = datetime.now().isoformat(timespec='seconds')
+        try:
+            with open(self.path, 'w', encoding='utf-8') as f:
+                json.dump({
+                    'version': self.VERSION,
+                    'updated': self.updated,
+                    'accepted': self.accepted,
+                    'last_scan': sorted(self.previous),
+                }, f, ensure_ascii=False, indent=2)
+        except OSError as e:
+            print(f"⚠ 기준선 파일 저장 실패: {e}")
+
+
+class ScanHistoryStore:
+    """
+    로컬 SQLite 스캔 이력 저장소 (스캔별 발견 지문, 심각도별 신규/해결/전체 개수, 단계별 실행 시간)
+    
+    스캔마다 발견 행은 트랜잭션 하나에 일괄 삽입하고, 심각도별 개수는 기록 시점에 미리 계산해 두므로
+    추이 조회는 발견 테이블을 읽지 않고 (project, scanned_at) 인덱스와 작은 집계 테이블만 읽습니다.
+    """
+    
+    SCHEMA = """
+        CREATE TABLE IF NOT EXISTS scans (
+            id INTEGER PRIMARY KEY,
+            project TEXT NOT NULL,
+            path TEXT,
+            scanned_at TEXT NOT NULL,
+            total INTEGER NOT NULL
+        );
+        CREATE INDEX IF NOT EXISTS scans_project_time ON scans (project, scanned_at);
+        CREATE TABLE IF NOT EXISTS findings (
+            scan_id INTEGER NOT NULL REFERENCES scans (id),
+            fingerprint TEXT NOT NULL,
+            severity TEXT,
+            source TEXT,
+            rule_id TEXT,
+            cwe_id TEXT,
+            file_path TEXT,
+            line INTEGER,
+            title TEXT
+        );
+        CREATE INDEX IF NOT EXISTS findings_scan_fingerprint ON findings (scan_id, fingerprint);
+        CREATE INDEX IF NOT EXISTS findings_fingerprint ON findings (fingerprint);
+        CREATE INDEX IF NOT EXISTS findings_severity ON findings (severity, scan_id);
+        CREATE TABLE IF NOT EXISTS severity_counts (
+            scan_id INTEGER NOT NULL REFERENCES scans (id),
+            severity TEXT NOT NULL,
+            total INTEGER NOT NULL,
+            new INTEGER NOT NULL,
+            fixed INTEGER NOT NULL,
+            PRIMARY KEY (scan_id, severity)
+        );
+        CREATE TABLE IF NOT EXISTS stage_times (
+            scan_id INTEGER NOT NULL REFERENCES scans (id),
+            stage TEXT NOT NULL,
+            seconds REAL NOT NULL,
+            PRIMARY KEY (scan_id, stage)
+        );
+    """
+    
+    def __init__(self, path):
+        self.path = path
+        self.connection = sqlite3.connect(path)
+        self.connection.execute("PRAGMA journal_mode=WAL")
+        self.connection.execute("PRAGMA synchronous=NORMAL")
+        self.connection.executescript(self.SCHEMA)
+    
+    def close(self):
+        self.connection.close()
+    
+    def previous_scan(self, project):
+        """
+        프로젝트의 가장 최근 스캔 ID (없으면 None)
+        """
+        row = self.connection.execute(
+            "SELECT id FROM scans WHERE project = ? ORDER BY scanned_at DESC, id DESC LIMIT 1", (project,)).fetchone()
+        return row[0] if row else None
+    
+    def record_scan(self, project, path, records, stage_times=None):
+        """
+        스캔 한 번을 기록 (직전 스캔과 지문을 비교해 심각도별 신규/해결 개수 계산)
+        
+        Args:
+            project: 프로젝트 이름
+            path: 스캔한 디렉토리
+            records: 발견 레코드 (fingerprint, severity 등을 가진 딕셔너리) 이터러블
+            stage_times: {단계: 초}
+            
+        Returns:
+            (스캔 ID, {심각도: {'total', 'new', 'fixed'}})
+        """
+        connection = self.connection
+        with connection:
+            previous_id = self.previous_scan(project)
+            previous = {}
+            if previous_id is not None:
+                previous = dict(connection.execute(
+                    "SELECT fingerprint, severity FROM findings WHERE scan_id = ?", (previous_id,)))
+            
+            scanned_at = datetime.now().isoformat(timespec='seconds')
+            scan_id = connection.execute("INSERT INTO scans (project, path, scanned_at, total) VALUES (?, ?, ?, 0)",
+                                         (project, path, scanned_at)).lastrowid
+            rows = []
+            current = {}
+            for record in records:
+                fingerprint = record.get('fingerprint', '')
+                current.setdefault(fingerprint, record.get('severity'))
+                line = record.get('line')
+                rows.append((scan_id, fingerprint, record.get('severity'), record.get('source'), record.get('rule_id'),
+                             record.get('cwe_id'), record.get('full_path') or record.get('file_path'),
+                             line if isinstance(line, int) else None, record.get('title')))
+            connection.executemany("INSERT INTO findings VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)", rows)
+            connection.execute("UPDATE scans SET total = ? WHERE id = ?", (len(rows), scan_id))
+            
+            counts = {}
+            for row in rows:
+                counts.setdefault(row[2] or '', {'total': 0, 'new': 0, 'fixed': 0})['total'] += 1
+            for fingerprint, severity in current.items():
+                if previous_id is not None and fingerprint not in previous:
+                    counts.setdefault(severity or '', {'total': 0, 'new': 0, 'fixed': 0})['new'] += 1
+            for fingerprint, severity in previous.items():
+                if fingerprint not in current:
+                    counts.setdefault(severity or '', {'total': 0, 'new': 0, 'fixed': 0})['fixed'] += 1
+            connection.executemany("INSERT INTO severity_counts VALUES (?, ?, ?, ?, ?)",
+                                   [(scan_id, severity, c['total'], c['new'], c['fixed']) for severity, c in counts.items()])
+            if stage_times:
+                connection.executemany("INSERT INTO stage_times VALUES (?, ?, ?)",
+                                       [(scan_id, stage, seconds) for stage, seconds in stage_times.items()])
+        return scan_id, counts
+    
+    def record_stage(self, scan_id, stage, seconds):
+        """
+        기록한 스캔에 단계 실행 시간 추가 (보고서 생성처럼 기록 이후에 끝나는 단계용)
+        """
+        with self.connection:
+            self.connection.execute("INSERT OR REPLACE INTO stage_times VALUES (?, ?, ?)", (scan_id, stage, seconds))
+    
+    def trend(self, project, limit=30):
+        """
+        프로젝트의 최근 스캔 추이 (오래된 순)
+        
+        Args:
+            project: 프로젝트 이름
+            limit: 최근 스캔 수
+            
+        Returns:
+            [{'scan_id', 'scanned_at', 'total', 'severities': {심각도: {'total', 'new', 'fixed'}}, 'stages': {단계: 초}}, ...]
+        """
+        scans = self.connection.execute(
+            "SELECT id, scanned_at, total FROM scans WHERE project = ? ORDER BY scanned_at DESC, id DESC LIMIT ?",
+            (project, limit)).fetchall()
+        if not scans:
+            return []
+        trend = {scan_id: {'scan_id': scan_id, 'scanned_at': scanned_at, 'total': total, 'severities': {}, 'stages': {}}
+                 for scan_id, scanned_at, total in reversed(scans)}
+        placeholders = ",".join("?" * len(trend))
+        for scan_id, severity, total, new, fixed in self.connection.execute(
+                f"SELECT scan_id, severity, total, new, fixed FROM severity_counts WHERE scan_id IN ({placeholders})",
+                tuple(trend)):
+            trend[scan_id]['severities'][severity] = {'total': total, 'new': new, 'fixed': fixed}
+        for scan_id, stage, seconds in self.connection.execute(
+                f"SELECT scan_id, stage, seconds FROM stage_times WHERE scan_id IN ({placeholders})", tuple(trend)):
+            trend[scan_id]['stages'][stage] = seconds
+        return list(trend.values())
+
+
+class FindingExporter:
+    """
+    발견 스트리밍 내보내기 기본 클래스 (발견을 한 건씩 받아 바로 파일에 씀)
+    
+    경로가 '-'이면 표준 출력에 씁니다. 하위 클래스는 write_header/write_record/write_footer를 구현합니다.
+    """
+    
+    FORMAT = None
+    
+    def __init__(self, path):
+        self.path = path
+        self.count = 0
+        if path == '-':
+            self.file = sys.__stdout__
+        else:
+            self.file = open(path, 'w', encoding='utf-8', newline='', buffering=REPORT_WRITE_BUFFER)
+        self.write_header()
+    
+    def write(self, record):
+        self.write_record(record)
+        self.count += 1
+    
+    def close(self):
+        try:
+            self.write_footer()
+            self.file.flush()
+        finally:
+            if self.file is not sys.__stdout__:
+                self.file.close()
+    
+    def write_header(self):
+        pass
+    
+    def write_record(self, record):
+        raise NotImplementedError
+    
+    def write_footer(self):
+        pass
+
+
+class NdjsonExporter(FindingExporter):
+    """
+    JSON Lines 내보내기 (발견 한 건이 한 줄, 파이프라인용)
+    """
+    
+    FORMAT = 'NDJSON'
+    
+    def write_record(self, record):
+        self.file.write(json.dumps(record, ensure_ascii=False, default=str) + "\n")
+
+
+class CsvExporter(FindingExporter):
+    """
+    CSV 내보내기 (스프레드시트용, 엑셀에서 한글이 깨지지 않도록 BOM 포함)
+    """
+    
+    FORMAT = 'CSV'
+    FIELDS = ('fingerprint', 'severity', 'source', 'engines', 'rule_id', 'cwe_id', 'category', 'title',
+              'full_path', 'line', 'location', 'description', 'impact', 'recommendation', 'code_snippet',
+              'confidence', 'combined_confidence')
+    
+    def write_header(self):
+        if self.file is not sys.__stdout__:
+            self.file.write('\ufeff')
+        self.writer = csv.writer(self.file)
+        self.writer.writerow(self.FIELDS)
+    
+    def write_record(self, record):
+        row = []
+        for field in self.FIELDS:
+            value = record.get(field)
+            if isinstance(value, (list, tuple)):
+                value = ", ".join(str(item) for item in value)
+            row.append('' if value is None else value)
+        self.writer.writerow(row)
+
+
+class SarifExporter(FindingExporter):
+    """
+    SARIF 2.1.0 내보내기 (코드 스캐닝 UI용)
+    
+    결과(results)를 한 건씩 쓰고, 규칙 목록(tool.driver.rules)은 결과를 다 쓴 뒤 run 객체 끝에 씁니다.
+    JSON 객체의 키 순서는 의미가 없으므로 유효한 SARIF입니다.
+    """
+    
+    FORMAT = 'SARIF'
+    LEVELS = {'Critical': 'error', 'High': 'error', 'Medium': 'warning', 'Low': 'note'}
+    
+    def __init__(self, path, root=None):
+        self.root = os.path.abspath(root) if root else None
+        self.rules = {}
+        super().__init__(path)
+    
+    def write_header(self):
+        self.file.write('{"$schema":"https://json.schemastore.org/sarif-2.1.0.json","version":"2.1.0","runs":[{')
+        if self.root:
+            base_ids = {'SRCROOT': {'uri': Path(self.root).as_uri() + '/'}}
+            self.file.write('"originalUriBaseIds":' + json.dumps(base_ids, ensure_ascii=False) + ',')
+        self.file.write('"results":[')
+    
+    def write_record(self, record):
+        rule_id = record.get('rule_id') or record.get('cwe_id') or record.get('category') or 'codescanner'
+        if rule_id not in self.rules:
+            rule = {'id': rule_id, 'shortDescription': {'text': record.get('category') or rule_id}}
+            if record.get('cwe_id'):
+                rule['properties'] = {'tags': [record['cwe_id']]}
+            self.rules[rule_id] = rule
+        
+        location = {}
+        full_path = record.get('full_path')
+        if full_path:
+            if self.root and os.path.normcase(full_path).startswith(os.path.normcase(self.root) + os.sep):
+                location['artifactLocation'] = {'uri': Path(os.path.relpath(full_path, self.root)).as_posix(),
+                                                'uriBaseId': 'SRCROOT'}
+            else:
+                location['artifactLocation'] = {'uri': Path(full_path).as_uri()}
+        region = {}
+        if isinstance(record.get('line'), int) and record['line'] > 0:
+            region['startLine'] = record['line']
+        if record.get('code_snippet'):
+            region['snippet'] = {'text': record['code_snippet']}
+        if region and location:
+            location['region'] = region
+        
+        message = record.get('title') or rule_id
+        if record.get('description'):
+            message = f"{message}: {record['description']}"
+        result = {
+            'ruleId': rule_id,
+            'level': self.LEVELS.get(record.get('severity'), 'warning'),
+            'message': {'text': message},
+            'partialFingerprints': {'codescanner/v1': record.get('fingerprint', '')},
+            'properties': {key: record[key] for key in ('severity', 'source', 'engines', 'cwe_id', 'confidence',
+                                                        'combined_confidence', 'recommendation') if record.get(key)},
+        }
+        if location:
+            result['locations'] = [{'physicalLocation': location}]
+        self.file.write(("," if self.count else "") + json.dumps(result, ensure_ascii=False, default=str))
+    
+    def write_footer(self):
+        driver = {'name': 'CodeScanner', 'fullName': 'Semgrep + Bandit + Claude AI 통합 보안 분석',
+                  'rules': list(self.rules.values())}
+        self.file.write('],"tool":' + json.dumps({'driver': driver}, ensure_ascii=False) + '}]}\n')
+
+
+class SimulatedAPIError(Exception):
+    """스텁/재생 백엔드가 흉내 내는 API 오류 (status_code와 retry-after 헤더 포함)"""
+    
+    def __init__(self, status_code, retry_after=None):
+        super().__init__(f"시뮬레이션된 API 오류 (HTTP {status_code})")
+        self.status_code = status_code
+        headers = {'retry-after': str(retry_after)} if retry_after is not None else {}
+        self.response = SimpleNamespace(headers=headers)
+
+
+class LLMBackend:
+    """
+    LLM 백엔드 인터페이스
+    
+    IntegratedSecurityAnalyzer는 이 인터페이스로만 Claude를 호출하므로,
+    실제 API 대신 녹화/재생/스텁 백엔드로 바꿔 오프라인에서 재현 가능하게 벤치마크할 수 있습니다.
+    """
+    
+    def create_message(self, **params):
+        raise NotImplementedError
+    
+    def create_batch(self, requests):
+        raise NotImplementedError
+    
+    def retrieve_batch(self, batch_id):
+        raise NotImplementedError
+    
+    def batch_results(self, batch_id):
+        raise NotImplementedError
+    
+    @staticmethod
+    def request_key(params):
+        """
+        요청 파라미터의 안정적인 해시 (녹화/재생 매칭용)
+        """
+        return hashlib.sha256(json.dumps(params, ensure_ascii=False, sort_keys=True).encode('utf-8')).hexdigest()
+
+
+class AnthropicBackend(LLMBackend):
+    """실제 Anthropic API 백엔드"""
+    
+    def __init__(self, api_key, base_url=None):
+        # 재시도는 LLMRequestScheduler가 담당하므로 SDK 자체 재시도는 끔
+        self.client = anthropic.Anthropic(api_key=api_key, base_url=base_url, max_retries=0)
+    
+    def create_message(self, **params):
+        return self.client.messages.create(**params)
+    
+    def create_batch(self, requests):
+        return self.client.messages.batches.create(requests=requests)
+    
+    def retrieve_batch(self, batch_id):
+        return self.client.messages.batches.retrieve(batch_id)
+    
+    def batch_results(self, batch_id):
+        return list(self.client.messages.batches.results(batch_id))
+
+
+class RecordingBackend(LLMBackend):
+    """
+    다른 백엔드를 감싸서 요청/응답 쌍을 JSON Lines 파일에 저장하는 백엔드
+    """
+    
+    def __init__(self, inner, path):
+        self.inner = inner
+        self.path = path
+        self._lock = threading.Lock()
+        self._batch_params = {}
+    
+    def _record(self, params, message):
+        record = {
+            'key': self.request_key(params),
+            'params': params,
+            'response': message.model_dump(mode='json') if hasattr(message, 'model_dump') else message,
+        }
+        with self._lock:
+            with open(self.path, 'a', encoding='utf-8') as f:
+                f.write(json.dumps(record, ensure_ascii=False) + "\n")
+    
+    def create_message(self, **params):
+        message = self.inner.create_message(**params)
+        self._record(params, message)
+        return message
+    
+    def create_batch(self, requests):
+        batch = self.inner.create_batch(requests)
+        self._batch_params[batch.id] = {r['custom_id']: r['params'] for r in requests}
+        return batch
+    
+    def retrieve_batch(self, batch_id):
+        return self.inner.retrieve_batch(batch_id)
+    
+    def batch_results(self, batch_id):
+        entries = self.inner.batch_results(batch_id)
+        # 이전 실행에서 제출한 작업이면 요청 파라미터를 모르므로 녹화하지 않음
+        params_by_id = self._batch_params.get(batch_id, {})
+        for entry in entries:
+            if entry.result.type == 'succeeded' and entry.custom_id in params_by_id:
+                self._record(params_by_id[entry.custom_id], entry.result.message)
+        return entries
+
+
+class StubBackend(LLMBackend):
+    """
+    네트워크 없이 결정적인 응답을 돌려주는 스텁 백엔드
+    
+    지연 시간은 정규분포(latency_mean, latency_stddev), 오류는 상태 코드별 확률(error_rates)로
+    흉내 내며, 같은 seed면 같은 순서의 지연/오류가 재현됩니다.
+    """
+    
+    def __init__(self, latency_mean=0.0, latency_stddev=0.0, error_rates=None, retry_after=None,
+                 output_tokens=200, seed=0):
+        self.latency_mean = latency_mean
+        self.latency_stddev = latency_stddev
+        self.error_rates = error_rates or {}
+        self.retry_after = retry_after
+        self.output_tokens = output_tokens
+        self._rng = random.Random(seed)
+        self._lock = threading.Lock()
+        self._batches = {}
+        self._counter = 0
+    
+    def _simulate(self):
+        """
+        설정된 분포에 따라 지연시키고, 확률적으로 API 오류 발생
+        """
+        with self._lock:
+            delay = max(0.0, self._rng.gauss(self.latency_mean, self.latency_stddev)) if self.latency_mean else 0.0
+            roll = self._rng.random()
+        if delay:
+            time.sleep(delay)
+        threshold = 0.0
+        for status, rate in sorted(self.error_rates.items()):
+            threshold += rate
+            if roll < threshold:
+                raise SimulatedAPIError(status, self.retry_after)
+    
+    def _schema_default(self, schema):
+        """
+        JSON 스키마의 필수 필드를 빈 값으로 채운 기본 인자 생성
+        """
+        kind = schema.get('type')
+        if kind == 'object':
+            return {
+                name: self._schema_default(schema['properties'][name])
+                for name in schema.get('required', []) if name in schema.get('properties', {})
+            }
+        if kind == 'array':
+            return []
+        if kind in ('number', 'integer'):
+            return 0
+        if 'enum' in schema:
+            return schema['enum'][0]
+        return ""
+    
+    def respond(self, params):
+        """
+        요청 파라미터에 대한 결정적 응답 (강제된 도구가 있으면 그 스키마의 빈 인자)
+        """
+        tool_choice = params.get('tool_choice') or {}
+        if tool_choice.get('type') == 'tool':
+            tool = next(t for t in params.get('tools', []) if t['name'] == tool_choice['name'])
+            content = [{
+                'type': 'tool_use',
+                'id': f"toolu_stub_{self.request_key(params)[:12]}",
+                'name': tool['name'],
+                'input': self._schema_default(tool['input_schema']),
+            }]
+        else:
+            content = [{'type': 'text', 'text': json.dumps({'vulnerabilities': [], 'overall_assessment': ''})}]
+        
+        return anthropic.types.Message.model_validate({
+            'id': f"msg_stub_{self.request_key(params)[:12]}",
+            'type': 'message',
+            'role': 'assistant',
+            'model': params.get('model', ''),
+            'content': content,
+            'stop_reason': 'tool_use' if tool_choice.get('type') == 'tool' else 'end_turn',
+            'stop_sequence': None,
+            'usage': {
+                'input_tokens': len(json.dumps(params, ensure_ascii=False)) // 4,
+                'output_tokens': self.output_tokens,
+            },
+        })
+    
+    def create_message(self, **params):
+        self._simulate()
+        return self.respond(params)
+    
+    def create_batch(self, requests):
+        self._simulate()
+        with self._lock:
+            self._counter += 1
+            batch_id = f"msgbatch_stub_{self._counter:04d}"
+        self._batches[batch_id] = requests
+        return self.retrieve_batch(batch_id)
+    
+    def retrieve_batch(self, batch_id):
+        count = len(self._batches.get(batch_id, []))
+        return SimpleNamespace(
+            id=batch_id,
+            processing_status='ended',
+            request_counts=SimpleNamespace(processing=0, succeeded=count, errored=0, canceled=0, expired=0),
+        )
+    
+    def batch_results(self, batch_id):
+        self._simulate()
+        return [
+            SimpleNamespace(custom_id=r['custom_id'], result=SimpleNamespace(type='succeeded', message=self.respond(r['params'])))
+            for r in self._batches.get(batch_id, [])
+        ]
+
+
+class ReplayBackend(StubBackend):
+    """
+    RecordingBackend가 저장한 응답을 재생하는 백엔드
+    
+    녹화에 없는 요청은 strict가 False면 스텁 응답으로 대신하고, True면 오류를 냅니다.
+    지연 시간/오류 분포 설정은 StubBackend와 같습니다.
+    """
+    
+    def __init__(self, path, strict=False, **kwargs):
+        super().__init__(**kwargs)
+        self.strict = strict
+        self.misses = 0
+        self._responses = {}
+        with open(path, 'r', encoding='utf-8') as f:
+            for line in f:
+                if line.strip():
+                    record = json.loads(line)
+                    self._responses[record['key']] = record['response']
+    
+    def respond(self, params):
+        response = self._responses.get(self.request_key(params))
+        if response is not None:
+            return anthropic.types.Message.model_validate(response)
+        if self.strict:
+            raise KeyError(f"녹화된 응답이 없는 요청입니다: {self.request_key(params)[:12]}")
+        with self._lock:
+            self.misses += 1
+        return super().respond(params)
+
+
+def parse_error_rates(text):
+    """
+    "429:0.05,529:0.02" 형식의 오류 확률 설정 파싱
+    
+    Args:
+        text: 상태코드:확률 쌍을 쉼표로 구분한 문자열
+        
+    Returns:
+        {상태코드: 확률} 딕셔너리
+    """
+    rates = {}
+    for item in text.split(','):
+        if item.strip():
+            status, rate = item.split(':')
+            rates[int(status)] = float(rate)
+    return rates
+
+
+# HTML 보고서 스타일
+REPORT_CSS = """
+        * {
+            margin: 0;
+            padding: 0;
+            box-sizing: border-box;
+        }
+        
+        body {
+            font-family: 'Segoe UI', Tahoma, Geneva, Verdana, sans-serif;
+            line-height: 1.6;
+            color: #333;
+            background-color: #f5f5f5;
+            padding: 20px;
+        }
+        
+        .container {
+            max-width: 1200px;
+            margin: 0 auto;
+            background-color: white;
+            box-shadow: 0 0 20px rgba(0,0,0,0.1);
+            border-radius: 8px;
+            overflow: hidden;
+        }
+        
+        .header {
+            background: linear-gradient(135deg, #667eea 0%, #764ba2 100%);
+            color: white;
+            padding: 40px;
+            text-align: center;
+        }
+        
+        .header h1 {
+            font-size: 2.5em;
+            margin-bottom: 10px;
+        }
+        
+        .header .subtitle {
+            font-size: 1.2em;
+            opacity: 0.9;
+            margin-bottom: 10px;
+        }
+        
+        .header .date {
+            opacity: 0.9;
+            font-size: 0.9em;
+        }
+        
+        .semgrep-summary {
+            padding: 30px;
+            background: linear-gradient(135deg, #4facfe 0%, #00f2fe 100%);
+            color: white;
+        }
+        
+        .semgrep-summary h2 {
+            margin-bottom: 20px;
+            font-size: 1.5em;
+        }
+        
+        .bandit-summary {
+            padding: 30px;
+            background: linear-gradient(135deg, #f093fb 0%, #f5576c 100%);
+            color: white;
+        }
+        
+        .bandit-summary h2 {
+            margin-bottom: 20px;
+            font-size: 1.5em;
+        }
+        
+        .tool-stats {
+            display: grid;
+            grid-template-columns: repeat(auto-fit, minmax(150px, 1fr));
+            gap: 15px;
+        }
+        
+        .stat-item {
+            background: rgba(255, 255, 255, 0.2);
+            padding: 15px;
+            border-radius: 8px;
+            text-align: center;
+            backdrop-filter: blur(10px);
+        }
+        
+        .stat-label {
+            display: block;
+            font-size: 0.9em;
+            margin-bottom: 5px;
+            opacity: 0.9;
+        }
+        
+        .stat-value {
+            display: block;
+            font-size: 1.8em;
+            font-weight: bold;
+        }
+        
+        .project-info {
+            padding: 30px;
+            background-color: #f8f9fa;
+            border-bottom: 1px solid #e0e0e0;
+        }
+        
+        .project-info h2 {
+            color: #667eea;
+            margin-bottom: 20px;
+            font-size: 1.5em;
+        }
+        
+        .info-grid {
+            display: grid;
+            grid-template-columns: repeat(auto-fit, minmax(250px, 1fr));
+            gap: 15px;
+        }
+        
+        .info-item {
+            background: white;
+            padding: 15px;
+            border-radius: 6px;
+            box-shadow: 0 2px 4px rgba(0,0,0,0.05);
+        }
+        
+        .info-label {
+            font-weight: bold;
+            color: #666;
+            display: block;
+            margin-bottom: 5px;
+            font-size: 0.9em;
+        }
+        
+        .info-value {
+            color: #333;
+            font-size: 1.1em;
+        }
+        
+        .summary {
+            display: grid;
+            grid-template-columns: repeat(auto-fit, minmax(200px, 1fr));
+            gap: 20px;
+            padding: 30px;
+            background-color: #f8f9fa;
+        }
+        
+        .summary-card {
+            background: white;
+            padding: 20px;
+            border-radius: 8px;
+            text-align: center;
+            box-shadow: 0 2px 4px rgba(0,0,0,0.1);
+        }
+        
+        .summary-card .number {
+            font-size: 2.5em;
+            font-weight: bold;
+            margin: 10px 0;
+        }
+        
+        .summary-card .label {
+            color: #666;
+            font-size: 0.9em;
+        }
+        
+        .summary-card.critical .number { color: #dc3545; }
+        .summary-card.high .number { color: #fd7e14; }
+        .summary-card.medium .number { color: #ffc107; }
+        .summary-card.low .number { color: #28a745; }
+        .summary-card.total .number { color: #667eea; }
+        
+        .assessment {
+            padding: 30px;
+            background-color: #fff3cd;
+            border-left: 4px solid #ffc107;
+            margin: 20px 30px;
+            white-space: pre-line;
+        }
+        
+        .assessment h2 {
+            color: #856404;
+            margin-bottom: 15px;
+        }
+        
+        .content {
+            padding: 30px;
+        }
+        
+        .vulnerability-card {
+            background: white;
+            border: 1px solid #e0e0e0;
+            border-radius: 8px;
+            margin-bottom: 20px;
+            overflow: hidden;
+            transition: box-shadow 0.3s;
+        }
+        
+        .vulnerability-card:hover {
+            box-shadow: 0 4px 12px rgba(0,0,0,0.15);
+        }
+        
+        .vulnerability-header {
+            background-color: #f8f9fa;
+            padding: 20px;
+            display: flex;
+            justify-content: space-between;
+            align-items: center;
+            border-bottom: 1px solid #e0e0e0;
+        }
+        
+        .vulnerability-header h3 {
+            color: #333;
+            font-size: 1.3em;
+            margin-bottom: 8px;
+        }
+        
+        .severity-badge {
+            padding: 5px 15px;
+            border-radius: 20px;
+            color: white;
+            font-weight: bold;
+            font-size: 0.9em;
+        }
+        
+        .source-badge {
+            padding: 3px 10px;
+            border-radius: 12px;
+            color: white;
+            font-size: 0.75em;
+            font-weight: bold;
+            display: inline-block;
+            margin-left: 10px;
+        }
+        
+        .vulnerability-body {
+            padding: 20px;
+        }
+        
+        .section {
+            margin: 15px 0;
+        }
+        
+        .section h4 {
+            color: #667eea;
+            margin-bottom: 8px;
+            font-size: 1.1em;
+        }
+        
+        .correlation {
+            background-color: #eef4ff;
+            padding: 15px;
+            border-radius: 4px;
+            border-left: 4px solid #4a6cf7;
+        }
+        
+        .correlation ul {
+            margin-left: 20px;
+            font-size: 0.9em;
+        }
+        
+        .recommendation {
+            background-color: #d4edda;
+            padding: 15px;
+            border-radius: 4px;
+            border-left: 4px solid #28a745;
+        }
+        
+        .recommendation h4 {
+            color: #155724;
+        }
+        
+        code {
+            background-color: #f4f4f4;
+            padding: 2px 6px;
+            border-radius: 3px;
+            font-family: 'Courier New', monospace;
+        }
+        
+        pre {
+            background-color: #282c34;
+            color: #abb2bf;
+            padding: 15px;
+            border-radius: 4px;
+            overflow-x: auto;
+            margin: 10px 0;
+        }
+        
+        pre code {
+            background: none;
+            padding: 0;
+            color: inherit;
+        }
+        
+        .cwe {
+            margin-top: 10px;
+            color: #666;
+            font-size: 0.9em;
+        }
+        
+        .footer {
+            background-color: #f8f9fa;
+            padding: 20px;
+            text-align: center;
+            color: #666;
+            border-top: 1px solid #e0e0e0;
+        }
+        
+        .shard-table, .history-table {
+            border-collapse: collapse;
+            margin: 10px 0 25px;
+        }
+        
+        .shard-table th, .shard-table td, .history-table th, .history-table td {
+            border: 1px solid #e0e0e0;
+            padding: 6px 12px;
+            text-align: left;
+        }
+        
+        .shard-table th, .history-table th {
+            background-color: #f8f9ff;
+        }
+        
+        .shard-nav {
+            margin-bottom: 20px;
+        }
+        
+        @media print {
+            body {
+                background-color: white;
+            }
+            .container {
+                box-shadow: none;
+            }
+        }
+"""
+
+# 보고서 심각도/출처 뱃지 색상
+REPORT_SEVERITY_COLORS = {
+    "Critical": "#dc3545",
+    "High": "#fd7e14",
+    "Medium": "#ffc107",
+    "Low": "#28a745"
+}
+REPORT_SOURCE_COLORS = {
+    "Semgrep": "#00d4ff",
+    "Bandit": "#ff4785",
+    "LLM Analysis": "#6f42c1"
+}
+
+# 보고서 파일 쓰기 버퍼 크기 (바이트)
+REPORT_WRITE_BUFFER = 1 << 20
+
+# 가상 스크롤 보고서: 발견 데이터 열 (JSON 행의 순서)
+VIRTUAL_REPORT_FIELDS = ('severity', 'source', 'title', 'location', 'file_path', 'cwe_id', 'category',
+                         'description', 'impact', 'recommendation', 'code_snippet', 'engines', 'repeat_lines')
+
+VIRTUAL_REPORT_CSS = """
+        .filter-bar {
+            display: flex;
+            flex-wrap: wrap;
+            gap: 10px;
+            margin-bottom: 15px;
+        }
+        
+        .filter-bar select, .filter-bar input {
+            padding: 6px 10px;
+            border: 1px solid #ccc;
+            border-radius: 4px;
+        }
+        
+        .filter-count {
+            align-self: center;
+            color: #666;
+            font-size: 0.9em;
+        }
+        
+        .finding-viewport {
+            height: 600px;
+            overflow-y: auto;
+            border: 1px solid #e0e0e0;
+            border-radius: 4px;
+            position: relative;
+        }
+        
+        .finding-row {
+            position: absolute;
+            left: 0;
+            right: 0;
+            height: 44px;
+            padding: 0 15px;
+            display: flex;
+            align-items: center;
+            gap: 10px;
+            border-bottom: 1px solid #f0f0f0;
+            cursor: pointer;
+            white-space: nowrap;
+            overflow: hidden;
+        }
+        
+        .finding-row:hover {
+            background-color: #f8f9ff;
+        }
+        
+        .finding-row .row-title {
+            flex: 1;
+            overflow: hidden;
+            text-overflow: ellipsis;
+        }
+        
+        .finding-row code {
+            color: #666;
+        }
+        
+        .finding-detail {
+            margin-top: 20px;
+        }
+"""
+
+# 가상 스크롤 보고서 스크립트: 보이는 행만 DOM에 만들고, 필터는 메모리의 행 배열에서 바로 계산
+VIRTUAL_REPORT_SCRIPT = r"""
+(function () {
+    var blob = JSON.parse(document.getElementById('findings-data').textContent);
+    var fields = blob.fields, strings = blob.strings;
+    var col = {};
+    fields.forEach(function (name, i) { col[name] = i; });
+    var rows = blob.rows;
+    var colors = blob.colors;
+    var ROW_HEIGHT = 44;
+    var viewport = document.getElementById('finding-viewport');
+    var spacer = document.getElementById('finding-spacer');
+    var detail = document.getElementById('finding-detail');
+    var filters = {
+        severity: document.getElementById('filter-severity'),
+        source: document.getElementById('filter-source'),
+        cwe: document.getElementById('filter-cwe'),
+        path: document.getElementById('filter-path')
+    };
+    var visible = [];
+    
+    function value(row, name) { return strings[row[col[name]]]; }
+    function escapeHtml(text) {
+        return String(text).replace(/[&<>"']/g, function (c) {
+            return {'&': '&amp;', '<': '&lt;', '>': '&gt;', '"': '&quot;', "'": '&#39;'}[c];
+        });
+    }
+    function fillOptions(select, name) {
+        var seen = {};
+        rows.forEach(function (row) { seen[value(row, name)] = true; });
+        Object.keys(seen).sort().forEach(function (item) {
+            if (!item) { return; }
+            var option = document.createElement('option');
+            option.value = item;
+            option.textContent = item;
+            select.appendChild(option);
+        });
+    }
+    function applyFilters() {
+        var severity = filters.severity.value, source = filters.source.value;
+        var cwe = filters.cwe.value, path = filters.path.value.toLowerCase();
+        visible = [];
+        for (var i = 0; i < rows.length; i++) {
+            var row = rows[i];
+            if (severity && value(row, 'severity') !== severity) { continue; }
+            if (source && value(row, 'source') !== source && value(row, 'engines').split(', ').indexOf(source) < 0) { continue; }
+            if (cwe && value(row, 'cwe_id') !== cwe) { continue; }
+            if (path && value(row, 'file_path').toLowerCase().indexOf(path) < 0 &&
+                value(row, 'location').toLowerCase().indexOf(path) < 0) { continue; }
+            visible.push(i);
+        }
+        document.getElementById('filter-count').textContent = visible.length + ' / ' + rows.length + '개';
+        spacer.style.height = (visible.length * ROW_HEIGHT) + 'px';
+        viewport.scrollTop = 0;
+        render();
+    }
+    function render() {
+        var first = Math.max(0, Math.floor(viewport.scrollTop / ROW_HEIGHT) - 10);
+        var last = Math.min(visible.length, first + Math.ceil(viewport.clientHeight / ROW_HEIGHT) + 20);
+        var html = [];
+        for (var n = first; n < last; n++) {
+            var row = rows[visible[n]];
+            var severity = value(row, 'severity');
+            html.push('<div class="finding-row" data-index="' + visible[n] + '" style="top:' + (n * ROW_HEIGHT) + 'px">' +
+                '<span class="severity-badge" style="background-color:' + (colors[severity] || '#6c757d') + '">' + escapeHtml(severity) + '</span>' +
+                '<span class="row-title">#' + (visible[n] + 1) + ' ' + escapeHtml(value(row, 'title')) + '</span>' +
+                '<code>' + escapeHtml(value(row, 'location')) + '</code>' +
+                '<span>' + escapeHtml(value(row, 'source')) + '</span></div>');
+        }
+        spacer.innerHTML = html.join('');
+    }
+    function showDetail(index) {
+        var row = rows[index];
+        var section = function (title, text, cls) {
+            return text ? '<div class="section' + (cls ? ' ' + cls : '') + '"><h4>' + title + '</h4><p>' + escapeHtml(text) + '</p></div>' : '';
+        };
+        detail.innerHTML = '<div class="vulnerability-card"><div class="vulnerability-header"><div><h3>#' + (index + 1) + ' ' +
+            escapeHtml(value(row, 'title')) + '</h3><span class="source-badge" style="background-color:#6f42c1">' +
+            escapeHtml(value(row, 'engines') || value(row, 'source')) + '</span></div>' +
+            '<span class="severity-badge" style="background-color:' + (colors[value(row, 'severity')] || '#6c757d') + '">' +
+            escapeHtml(value(row, 'severity')) + '</span></div><div class="vulnerability-body">' +
+            '<p><strong>카테고리:</strong> ' + escapeHtml(value(row, 'category')) + '</p>' +
+            '<p><strong>위치:</strong> <code>' + escapeHtml(value(row, 'location')) + '</code></p>' +
+            (value(row, 'repeat_lines') ? '<p><strong>반복 위치:</strong> 라인 ' + escapeHtml(value(row, 'repeat_lines')) + '</p>' : '') +
+            section('설명', value(row, 'description')) + section('영향', value(row, 'impact')) +
+            '<div class="section"><h4>문제 코드</h4><pre><code>' + escapeHtml(value(row, 'code_snippet')) + '</code></pre></div>' +
+            section('수정 방안', value(row, 'recommendation'), 'recommendation') +
+            (value(row, 'cwe_id') ? '<p class="cwe"><strong>CWE ID:</strong> ' + escapeHtml(value(row, 'cwe_id')) + '</p>' : '') +
+            '</div></div>';
+        detail.scrollIntoView({behavior: 'smooth', block: 'nearest'});
+    }
+    
+    fillOptions(filters.source, 'source');
+    fillOptions(filters.cwe, 'cwe_id');
+    viewport.addEventListener('scroll', function () { window.requestAnimationFrame(render); });
+    spacer.addEventListener('click', function (event) {
+        var target = event.target.closest('.finding-row');
+        if (target) { showDetail(Number(target.getAttribute('data-index'))); }
+    });
+    ['severity', 'source', 'cwe'].forEach(function (name) { filters[name].addEventListener('change', applyFilters); });
+    filters.path.addEventListener('input', applyFilters);
+    applyFilters();
+})();
+"""
+
+
+class IntegratedSecurityAnalyzer:
+    def __init__(self, api_key, base_url=None, backend=None):
+        """
+        Bandit + LLM을 사용한 통합 보안 취약점 분석기 초기화
+        
+        Args:
+            api_key: Anthropic API 키
+            base_url: API 엔드포인트 (None이면 ANTHROPIC_BASE_URL 환경 변수 또는 기본값)
+            backend: LLM 백엔드 (None이면 AnthropicBackend)
+        """
+        self.backend = backend or AnthropicBackend(api_key, base_url)
+        self.model = "claude-sonnet-4-5-20250929"
+        self.max_output_tokens = 16000
+        
+        # LLM 요청 계획 설정
+        self.max_prompt_tokens = None   # 요청당 코드 토큰 한도 (None이면 단일 요청)
+        self.llm_concurrency = 1        # 동시 LLM 요청 수 (AIMD 시작값)
+        self.max_llm_concurrency = 8    # AIMD가 늘릴 수 있는 최대 동시 요청 수
+        self.llm_max_retries = 5        # 429/529/5xx/연결 오류 재시도 횟수
+        self.scheduler = LLMRequestScheduler(self.llm_concurrency, self.max_llm_concurrency, self.llm_max_retries)
+        self.budget_usd = None          # 예상 비용이 이 값을 넘으면 LLM 분석 중단
+        self.dry_run = False            # True면 계획만 출력하고 LLM 호출 안 함
+        self.token_usage_log_path = None  # 추정 오차 기록 파일 (JSON Lines)
+        self.token_usage_records = []
+        self.max_continuations = 3      # max_tokens로 잘린 응답의 최대 이어받기 횟수
+        self.structured_output = True   # 도구 사용(tool use)으로 스키마에 맞는 결과 받기
+        
+        # LLM 분석 모드: 'full' (전체 분석), 'triage' (고위험 도구 발견만 검증), 'mapreduce' (모듈별 맵-리듀스)
+        self.llm_mode = 'full'
+        self.triage_batch_size = 20         # 트리아지 요청당 발견 수
+        self.triage_context_lines = 5       # 발견 라인 앞뒤로 보여줄 문맥 줄 수
+        self.triage_drop_false_positives = True
+        
+        # 발견 지문 인덱스 설정 (도구/배치 간 중복 제거)
+        self.fingerprint_line_bucket = 3        # 다른 출처의 같은 발견으로 볼 라인 차이
+        self.known_paths = []                   # LLM이 파일명만 보고한 위치를 전체 경로로 해석할 때 사용
+        self.agreement_log_path = None          # 상관 클러스터의 엔진 합의 기록 파일 (JSON Lines)
+        
+        # 같은 파일, 같은 규칙 반복 발견 묶음 (프롬프트와 보고서 카드)
+        self.aggregate_min_repeats = 3          # 이 횟수 이상 반복되면 묶음 (0이면 묶지 않음)
+        self.aggregate_snippet_count = 2        # 묶음에 남기는 대표 스니펫 수
+        self.aggregate_max_lines = 30           # 프롬프트에 나열하는 라인 수 한도
+        self.aggregation_stats = None
+        
+        # HTML 보고서 스트리밍: 카드를 이 개수만큼 모아 파일에 씀
+        self.report_chunk_cards = 200
+        self.report_template = 'cards'          # cards | virtual (JSON 데이터 + 가상 스크롤, 대규모 결과용)
+        self.report_shards = None               # None | directory | severity (색인 페이지 + 샤드 페이지로 분할)
+        self.report_shard_workers = 4           # 샤드 페이지 동시 작성 스레드 수
+        # 기계 판독용 내보내기 경로 (None이면 끔, NDJSON은 '-'이면 표준 출력)
+        self.export_sarif_path = None
+        self.export_ndjson_path = None
+        self.export_csv_path = None
+        
+        # 기준선/억제: 수용한 발견과 직전 스캔 지문을 저장해 신규 발견만 트리아지/보고
+        self.baseline_path = None               # 기준선 파일 (JSON), 없으면 비교하지 않음
+        self.baseline_update = False            # True면 이번 스캔의 발견을 모두 수용
+        self.suppressions_enabled = True        # nosec/nosemgrep/codescanner-ignore 주석 반영
+        self.scan_root = None                   # 기준선 지문의 상대 경로 기준 디렉토리
+        self.baseline = None
+        self.baseline_stats = None
+        self._baseline_index = None
+        self._suppression_cache = {}
+        self.active_findings = None             # 억제 주석 반영 후, 기준선 필터 전 발견 (이력 기록용)
+        
+        # 스캔 이력: 실행마다 발견과 단계별 실행 시간을 SQLite에 기록하고 보고서에 추이 표시
+        self.history_path = None                # SQLite 파일, 없으면 기록하지 않음
+        self.history_trend_limit = 30           # 보고서에 표시할 최근 스캔 수
+        self.scan_history = None
+        self.history_scan_id = None
+        
+        # 오프라인 조치 지식 베이스 (도구 발견의 영향/권장사항을 변환 시점에 채움)
+        self.remediation_kb = RemediationKnowledgeBase()
+        
+        # 압축 응답 모드: LLM은 CWE/심각도/위치/짧은 보충만 반환, 문장은 CWE_TEMPLATES로 로컬에서 펼침
+        self.compact_response = False
+        self.report_language = 'ko'             # 템플릿과 보충 설명 언어 (ko, en)
+        self.output_token_stats = None
+        
+        # 도구 발견 압축 표기 (규칙 표 + 발견당 한 줄, 도구 발견은 LLM이 다시 출력하지 않음)
+        self.compact_tool_findings = True
+        
+        # 교차 파일 문맥: import 그래프로 닿는 파일의 호출 대상 정의만 프롬프트에 추가
+        self.cross_file_context = False
+        self.cross_file_max_definitions = 12    # 프롬프트당 추가할 정의 수 한도
+        self.cross_file_max_tokens = 3000       # 프롬프트당 추가 정의 토큰 한도
+        self.code_index = None                  # build_code_index() 결과
+        
+        # 프롬프트용 소스 축소 (주석/독스트링/빈 줄 제거, 라인 맵으로 원본 위치 복원)
+        self.minify_prompts = False
+        self.minified_sources = {}              # {파일: (원본 라인 번호를 붙인 축소본, 라인 맵)}
+        self.minify_stats = None
+        
+        # 유사 파일 클러스터링 (MinHash/LSH): 멤버 파일은 대표 파일과의 차이만 전송
+        self.near_duplicate_detection = False
+        self.near_duplicate_threshold = 0.8     # 추정 Jaccard 유사도 기준
+        self.minhash_num_perm = 64
+        self.minhash_bands = 16
+        self.duplicate_of = {}                  # {멤버 파일: 대표 파일}
+        self.near_duplicate_stats = None
+        
+        # 맵-리듀스 모드 설정 (llm_mode='mapreduce')
+        self.map_chunk_chars = 40000            # 이보다 큰 파일은 라인 범위별 조각으로 나눔
+        self.map_tokens_per_request = 30000     # 맵 요청당 코드 토큰 한도
+        self.reduce_token_limit = 20000         # 리듀스 요청당 요약 토큰 한도 (넘으면 계층적으로 리듀스)
+        
+        # 모델 계층화: 빠른 모델로 선별 후 위험 파일만 self.model로 재분석
+        self.tiered_routing = False
+        self.screening_model = "claude-haiku-4-5-20251001"
+        self.screening_max_output_tokens = 8000
+        self.escalation_threshold = 0.5     # 이 위험도 이상인 파일을 재분석
+        self.tier_metrics = {}
+        self._metrics_lock = threading.Lock()
+        
+        # Message Batches 모드 설정 (지연 시간 대신 처리량/비용 우선)
+        self.use_message_batches = False
+        self.batch_state_path = "llm_batch_state.json"  # 중단 후 재개를 위한 작업 ID 저장 파일
+        self.batch_poll_initial_seconds = 10.0
+        self.batch_poll_max_seconds = 300.0
+        self.batch_max_wait_seconds = 24 * 60 * 60
+        
+        # 지원하는 파일 확장자
+        self.supported_extensions = {
+            # 프론트엔드
+            '.js', '.jsx', '.ts', '.tsx', '.vue', '.html', '.css', '.scss', '.sass',
+            # 백엔드
+            '.py', '.java', '.php', '.go', '.rb', '.cs', '.cpp', '.c', '.h', '.rs', '.swift',
+            # 설정 파일
+            '.json', '.yml', '.yaml', '.xml', '.env', '.config'
+        }
+        
+        # 제외할 디렉토리
+        self.exclude_dirs = {
+            'node_modules', '.git', '__pycache__', 'venv', 'env', 
+            'dist', 'build', '.next', '.nuxt', 'coverage', '.pytest_cache',
+            'target', 'bin', 'obj', 'vendor', 'bower_components'
+        }
+        
+        # 제외할 파일 패턴
+        self.exclude_files = {
+            '.min.js', '.min.css', '.map', '.lock', 
+            'package-lock.json', 'yarn.lock', 'Pipfile.lock'
+        }
+        
+        # 분석 결과 저장
+        self.bandit_results = None
+        self.semgrep_results = None
+    
+    def scan_directory(self, directory_path):
+        """
+        디렉토리를 스캔하여 모든 코드 파일 찾기
+        
+        Args:
+            directory_path: 스캔할 디렉토리 경로
+            
+        Returns:
+            파일 경로 리스트
+        """
+        code_files = []
+        directory = Path(directory_path)
+        
+        if not directory.exists():
+            print(f"✗ 디렉토리를 찾을 수 없습니다: {directory_path}")
+            return []
+        
+        print(f"\n📂 디렉토리 스캔 중: {directory_path}")
+        
+        for root, dirs, files in os.walk(directory):
+            # 제외할 디렉토리 필터링
+            dirs[:] = [d for d in dirs if d not in self.exclude_dirs and not d.startswith('.')]
+            
+            for file in files:
+                # 파일 확장자 확인
+                if any(file.endswith(ext) for ext in self.supported_extensions):
+                    # 제외할 파일 패턴 확인
+                    if not any(pattern in file for pattern in self.exclude_files):
+                        file_path = Path(root) / file
+                        code_files.append(str(file_path))
+        
+        print(f"✓ {len(code_files)}개의 코드 파일 발견")
+        return code_files
+    
+    def categorize_files(self, file_paths):
+        """
+        파일들을 프론트엔드/백엔드/설정 파일로 분류
+        
+        Args:
+            file_paths: 파일 경로 리스트
+            
+        Returns:
+            카테고리별로 분류된 딕셔너리
+        """
+        categories = {
+            'frontend': [],
+            'backend': [],
+            'config': [],
+            'python': []  # Python 파일 별도 추적
+        }
+        
+        frontend_exts = {'.js', '.jsx', '.ts', '.tsx', '.vue', '.html', '.css', '.scss', '.sass'}
+        backend_exts = {'.py', '.java', '.php', '.go', '.rb', '.cs', '.cpp', '.c', '.h', '.rs', '.swift'}
+        config_exts = {'.json', '.yml', '.yaml', '.xml', '.env', '.config'}
+        
+        for file_path in file_paths:
+            ext = Path(file_path).suffix
+            if ext in frontend_exts:
+                categories['frontend'].append(file_path)
+            elif ext in backend_exts:
+                categories['backend'].append(file_path)
+                if ext == '.py':
+                    categories['python'].append(file_path)
+            elif ext in config_exts:
+                categories['config'].append(file_path)
+        
+        print(f"\n📊 파일 분류:")
+        print(f"  - 프론트엔드: {len(categories['frontend'])}개")
+        print(f"  - 백엔드: {len(categories['backend'])}개")
+        print(f"  - Python 파일: {len(categories['python'])}개")
+        print(f"  - 설정 파일: {len(categories['config'])}개")
+        
+        return categories
+    
+    def run_semgrep_analysis(self, target_path):
+        """
+        Semgrep을 사용하여 다양한 언어의 코드 분석 (OWASP Top 10 포함)
+        
+        Args:
+            target_path: 분석할 디렉토리 또는 파일 경로
+            
+        Returns:
+            Semgrep 분석 결과 (JSON 형식)
+        """
+        print(f"\n🔍 Semgrep으로 보안 분석 중 (OWASP Top 10 포함)...")
         
         # Semgrep 실행 파일 찾기
         semgrep_exe = None
         
-        # 방법 1: PATH에서 semgrep 찾기 (shutil.which)
-        semgrep_exe = shutil.which('semgrep')
+        # 방법 1: PATH에서 semgrep 찾기 (shutil.which)
+        semgrep_exe = shutil.which('semgrep')
+        
+        # 방법 2: Python Scripts 폴더에서 직접 찾기
+        if not semgrep_exe:
+            scripts_dir = os.path.join(os.path.dirname(sys.executable), 'Scripts')
+            possible_path = os.path.join(scripts_dir, 'semgrep.exe')
+            if os.path.exists(possible_path):
+                semgrep_exe = possible_path
+        
+        # 방법 3: Python 모듈로 실행 (fallback)
+        if not semgrep_exe:
+            print(f"  ℹ️ Semgrep 실행 파일을 찾지 못해 python -m semgrep 사용")
+            semgrep_cmd = [sys.executable, '-m', 'semgrep']
+        else:
+            print(f"  ✓ Semgrep 실행 파일: {semgrep_exe}")
+            semgrep_cmd = [semgrep_exe]
+        
+        try:
+            # UTF-8 인코딩 강제 설정 (Windows cp949 문제 해결)
+            env = os.environ.copy()
+            env['PYTHONUTF8'] = '1'
+            env['PYTHONIOENCODING'] = 'utf-8'
+            env['LANG'] = 'en_US.UTF-8'
+            
+            # 버전 확인
+            version_result = subprocess.run(
+                semgrep_cmd + ['--version'],
+                capture_output=True,
+                text=True,
+                timeout=10,
+                encoding='utf-8',
+                errors='ignore',
+                env=env
+            )
+            
+            if version_result.returncode == 0:
+                # 버전 정보 출력 (경고 메시지 제외)
+                for line in version_result.stdout.split('\n'):
+                    if line and not line.startswith('Using') and not line.startswith('  '):
+                        print(f"  ✓ Semgrep 버전: {line.strip()}")
+                        break
+            
+            # Semgrep 실행
+            print(f"  ⏳ 분석 시작... (최대 10분 소요)")
+            
+            # 규칙 선택 로직
+            script_dir = os.path.dirname(os.path.abspath(__file__))
+            downloaded_rules_dir = os.path.join(script_dir, 'semgrep-rules')
+            
+            # 1순위: 다운로드된 규칙 (semgrep-rules 폴더)
+            if os.path.exists(downloaded_rules_dir):
+                print(f"  ✓ 다운로드된 Semgrep 규칙 사용")
+                
+                # 주요 보안 규칙 경로들
+                security_paths = [
+                    os.path.join(downloaded_rules_dir, 'python', 'django', 'security'),
+                    os.path.join(downloaded_rules_dir, 'python', 'flask', 'security'),
+                    os.path.join(downloaded_rules_dir, 'python', 'lang', 'security'),
+                    os.path.join(downloaded_rules_dir, 'javascript', 'express', 'security'),
+                    os.path.join(downloaded_rules_dir, 'javascript', 'react', 'security'),
+                    os.path.join(downloaded_rules_dir, 'javascript', 'lang', 'security'),
+                    os.path.join(downloaded_rules_dir, 'generic', 'secrets'),
+                    os.path.join(downloaded_rules_dir, 'generic', 'security'),
+                ]
+                
+                # 존재하는 경로만 추가
+                config_args = []
+                for path in security_paths:
+                    if os.path.exists(path):
+                        config_args.extend(['--config', path])
+                
+                if not config_args:
+                    # 폴더는 있지만 규칙이 없으면 전체 폴더 사용
+                    config_args = ['--config', downloaded_rules_dir]
+                
+                cmd = semgrep_cmd + config_args + [
+                    '--json',
+                    '--no-git-ignore',
+                    '--metrics', 'off',
+                    '--max-target-bytes', '5000000',
+                    '--timeout', '60',
+                    target_path
+                ]
+                
+            # 2순위: Semgrep 레지스트리 (p/...)
+            else:
+                print(f"  ℹ️ Semgrep 레지스트리 규칙 사용")
+                print(f"  💡 더 많은 규칙을 사용하려면: python download_semgrep_rules.py")
+                
+                cmd = semgrep_cmd + [
+                    '--config', 'p/owasp-top-ten',
+                    '--config', 'p/security-audit',
+                    '--config', 'p/python',
+                    '--json',
+                    '--no-git-ignore',
+                    '--metrics', 'off',
+                    '--verbose',
+                    '--max-target-bytes', '5000000',
+                    '--timeout', '60',
+                    target_path
+                ]
+            
+            # env는 이미 위에서 정의됨 (UTF-8 설정 포함)
+            result = subprocess.run(
+                cmd,
+                capture_output=True,  # stdout, stderr 자동 캡처
+                text=True,
+                timeout=600,  # 10분 타임아웃
+                encoding='utf-8',
+                errors='ignore',  # 인코딩 에러 무시
+                env=env  # UTF-8 환경 변수 전달
+            )
+            
+            # stderr 출력 확인 (디버그용)
+            if result.stderr:
+                stderr_lines = result.stderr.strip().split('\n')
+                for line in stderr_lines[:5]:  # 처음 5줄만 출력
+                    if line and not line.startswith('Scanning'):
+                        print(f"  ℹ️ {line}")
+            
+            # Semgrep은 발견이 있으면 exit code 1을 반환
+            # returncode 0 또는 1은 정상 (2 이상이 실제 오류)
+            if result.returncode >= 2:
+                print(f"  ✗ Semgrep 실행 실패 (Return Code: {result.returncode})")
+                print(f"  ℹ️ Stderr: {result.stderr}")
+                return None
+            
+            # JSON 파싱
+            if not result.stdout or not result.stdout.strip():
+                print(f"  ⚠ Semgrep 출력이 비어있습니다.")
+                print(f"  ℹ️ Stderr 전체: {result.stderr}")
+                return None
+            
+            try:
+                semgrep_data = json.loads(result.stdout)
+            except json.JSONDecodeError as e:
+                print(f"  ✗ JSON 파싱 실패: {e}")
+                print(f"  ℹ️ 출력 미리보기: {result.stdout[:200]}")
+                return None
+            
+            # 통계 출력
+            results = semgrep_data.get('results', [])
+            errors = semgrep_data.get('errors', [])
+            paths = semgrep_data.get('paths', {})
+            
+            # 스캔된 파일 정보
+            scanned_files = paths.get('scanned', []) if paths else []
+            skipped_files = paths.get('skipped', []) if paths else []
+            
+            print(f"  📁 스캔 정보:")
+            print(f"    - 스캔된 파일: {len(scanned_files)}개")
+            if skipped_files:
+                print(f"    - 건너뛴 파일: {len(skipped_files)}개")
+            
+            # 심각도별 통계
+            severity_count = {
+                'ERROR': 0,
+                'WARNING': 0,
+                'INFO': 0
+            }
+            
+            for finding in results:
+                severity = finding.get('extra', {}).get('severity', 'INFO').upper()
+                if severity in severity_count:
+                    severity_count[severity] += 1
+            
+            print(f"  ✓ Semgrep 분석 완료")
+            print(f"    - 발견된 이슈: {len(results)}개")
+            print(f"    - ERROR: {severity_count['ERROR']}개")
+            print(f"    - WARNING: {severity_count['WARNING']}개")
+            print(f"    - INFO: {severity_count['INFO']}개")
+            
+            if errors:
+                print(f"    - 분석 오류: {len(errors)}개")
+                for err in errors[:3]:  # 처음 3개만 표시
+                    print(f"      ⚠ {err.get('message', 'Unknown error')}")
+            
+            self.semgrep_results = semgrep_data
+            return semgrep_data
+            
+        except subprocess.TimeoutExpired as e:
+            print(f"  ✗ Semgrep 실행 타임아웃 (10분 초과)")
+            print(f"  💡 분석 대상이 너무 큽니다. 작은 폴더로 시도하거나 Semgrep을 건너뛰세요.")
+            return None
+        except FileNotFoundError as e:
+            print(f"  ✗ Semgrep을 찾을 수 없습니다: {e}")
+            print(f"  💡 설치 방법: pip install semgrep")
+            return None
+        except json.JSONDecodeError as e:
+            print(f"  ✗ Semgrep 결과 파싱 실패: {e}")
+            return None
+        except PermissionError as e:
+            print(f"  ✗ 권한 오류: {e}")
+            print(f"  💡 관리자 권한으로 실행하거나 다른 폴더를 시도하세요.")
+            return None
+        except Exception as e:
+            print(f"  ✗ Semgrep 분석 중 예상치 못한 오류: {type(e).__name__}: {e}")
+            print(f"  💡 상세 정보:")
+            import traceback
+            traceback.print_exc()
+            return None
+    
+    def run_bandit_analysis(self, target_path):
+        """
+        Bandit을 사용하여 Python 코드 분석
+        
+        Args:
+            target_path: 분석할 디렉토리 또는 파일 경로
+            
+        Returns:
+            Bandit 분석 결과 (JSON 형식)
+        """
+        print(f"\n🔍 Bandit으로 Python 코드 분석 중...")
+        
+        try:
+            # Bandit 설정 초기화
+            b_conf = b_config.BanditConfig()
+            
+            # BanditManager 초기화
+            b_mgr = b_manager.BanditManager(
+                b_conf,
+                'file',
+                debug=False,
+                verbose=False,
+                quiet=True,
+                ignore_nosec=False
+            )
+            
+            # 파일 검색
+            b_mgr.discover_files([target_path], True, None)
+            
+            if not b_mgr.files_list:
+                print("  ⚠ 분석할 Python 파일이 없습니다.")
+                return None
+            
+            print(f"  📁 {len(b_mgr.files_list)}개의 Python 파일 발견")
+            
+            # 테스트 실행
+            b_mgr.run_tests()
+            
+            # 결과를 JSON으로 변환
+            output = UnclosableStringIO()
+            output.name = '<string>'  # StringIO에 name 속성 추가 (Bandit formatter 호환)
+            json_formatter.report(
+                b_mgr,
+                output,
+                b_constants.LOW,
+                b_constants.LOW,
+                lines=-1
+            )
+            
+            json_output = output.getvalue()
+            bandit_data = json.loads(json_output)
+            output.real_close()  # 이제 실제로 닫기
+            
+            # 통계 출력
+            results_count = len(bandit_data.get('results', []))
+            metrics = bandit_data.get('metrics', {}).get('_totals', {})
+            
+            print(f"  ✓ Bandit 분석 완료")
+            print(f"    - 발견된 이슈: {results_count}개")
+            print(f"    - HIGH 심각도: {metrics.get('SEVERITY.HIGH', 0)}개")
+            print(f"    - MEDIUM 심각도: {metrics.get('SEVERITY.MEDIUM', 0)}개")
+            print(f"    - LOW 심각도: {metrics.get('SEVERITY.LOW', 0)}개")
+            
+            self.bandit_results = bandit_data
+            return bandit_data
+            
+        except Exception as e:
+            print(f"  ✗ Bandit 분석 중 오류 발생: {e}")
+            import traceback
+            traceback.print_exc()
+            return None
+    
+    def format_semgrep_results_for_llm(self, semgrep_data):
+        """
+        Semgrep 결과를 LLM이 이해하기 쉬운 형식으로 변환
+        
+        Args:
+            semgrep_data: Semgrep JSON 결과
+            
+        Returns:
+            포맷된 텍스트
+        """
+        if not semgrep_data or not semgrep_data.get('results'):
+            return "Semgrep 분석 결과: 발견된 이슈가 없습니다."
+        
+        parts = ["=" * 70, "🔍 SEMGREP 정적 분석 결과 (OWASP Top 10 포함)", "=" * 70, ""]
+        
+        results = semgrep_data.get('results', [])
+        
+        # 같은 파일의 같은 규칙 반복은 한 항목으로 묶음
+        groups = self.group_repeats(results, lambda f: (f.get('path'), f.get('check_id')))
+        for idx, group in enumerate(groups, 1):
+            finding = group[0]
+            extra = finding.get('extra', {})
+            metadata = extra.get('metadata', {})
+            
+            parts.append(f"\n[이슈 #{idx}]")
+            parts.append(f"파일: {finding.get('path', 'N/A')}")
+            parts.append(f"라인: {self.format_repeat_lines([f.get('start', {}).get('line', 'N/A') for f in group])}")
+            parts.append(f"규칙 ID: {finding.get('check_id', 'N/A')}")
+            parts.append(f"심각도: {extra.get('severity', 'INFO')}")
+            
+            # OWASP 태그
+            if metadata.get('owasp'):
+                parts.append(f"OWASP: {', '.join(metadata['owasp'])}")
+            
+            # CWE
+            if metadata.get('cwe'):
+                parts.append(f"CWE: {', '.join(metadata['cwe'])}")
+            
+            parts.append(f"설명: {extra.get('message', 'N/A')}")
+            
+            # 코드 (반복이면 대표 스니펫만)
+            for member in group[:self.aggregate_snippet_count]:
+                if member.get('extra', {}).get('lines'):
+                    parts.append(f"코드:\n{member['extra']['lines']}")
+            
+            parts.append("-" * 70)
+        
+        # 통계 요약
+        severity_count = {'ERROR': 0, 'WARNING': 0, 'INFO': 0}
+        for finding in results:
+            severity = finding.get('extra', {}).get('severity', 'INFO').upper()
+            if severity in severity_count:
+                severity_count[severity] += 1
+        
+        parts.append(f"\n통계 요약:")
+        parts.append(f"  - 총 이슈: {len(results)}개")
+        parts.append(f"  - ERROR: {severity_count['ERROR']}개")
+        parts.append(f"  - WARNING: {severity_count['WARNING']}개")
+        parts.append(f"  - INFO: {severity_count['INFO']}개")
+        parts.append("=" * 70)
+        
+        return "\n".join(parts) + "\n"
+    
+    def format_bandit_results_for_llm(self, bandit_data):
+        """
+        Bandit 결과를 LLM이 이해하기 쉬운 형식으로 변환
+        
+        Args:
+            bandit_data: Bandit JSON 결과
+            
+        Returns:
+            포맷된 텍스트
+        """
+        if not bandit_data or not bandit_data.get('results'):
+            return "Bandit 분석 결과: 발견된 이슈가 없습니다."
+        
+        parts = ["=" * 70, "🔍 BANDIT 정적 분석 결과 (Python 코드)", "=" * 70, ""]
+        
+        results = bandit_data.get('results', [])
+        
+        # 같은 파일의 같은 테스트 반복은 한 항목으로 묶음
+        groups = self.group_repeats(results, lambda i: (i.get('filename'), i.get('test_id')))
+        for idx, group in enumerate(groups, 1):
+            issue = group[0]
+            parts.append(f"\n[이슈 #{idx}]")
+            parts.append(f"파일: {issue.get('filename', 'N/A')}")
+            parts.append(f"라인: {self.format_repeat_lines([i.get('line_number', 'N/A') for i in group])}")
+            parts.append(f"테스트 ID: {issue.get('test_id', 'N/A')}")
+            parts.append(f"심각도: {issue.get('issue_severity', 'N/A')}")
+            parts.append(f"신뢰도: {issue.get('issue_confidence', 'N/A')}")
+            
+            if issue.get('issue_cwe'):
+                cwe = issue['issue_cwe']
+                parts.append(f"CWE: CWE-{cwe.get('id', 'N/A')} ({cwe.get('link', 'N/A')})")
+            
+            parts.append(f"설명: {issue.get('issue_text', 'N/A').strip()}")
+            
+            for member in group[:self.aggregate_snippet_count]:
+                if member.get('code'):
+                    parts.append(f"코드:\n{member['code']}")
+            
+            parts.append("-" * 70)
+        
+        # 통계 요약
+        metrics = bandit_data.get('metrics', {}).get('_totals', {})
+        parts.append(f"\n통계 요약:")
+        parts.append(f"  - 총 이슈: {len(results)}개")
+        parts.append(f"  - HIGH: {metrics.get('SEVERITY.HIGH', 0)}개")
+        parts.append(f"  - MEDIUM: {metrics.get('SEVERITY.MEDIUM', 0)}개")
+        parts.append(f"  - LOW: {metrics.get('SEVERITY.LOW', 0)}개")
+        parts.append("=" * 70)
+        
+        return "\n".join(parts) + "\n"
+    
+    def format_tool_findings_compact(self, semgrep_data, bandit_data, code_text=""):
+        """
+        Semgrep + Bandit 결과를 압축 표기로 변환
+        
+        규칙(메시지, CWE, OWASP)과 파일 경로는 표로 한 번만 나열하고, 발견마다
+        "ID|파일|라인|규칙|스니펫" 한 줄만 씁니다. 코드 문맥(code_text)에 이미 있는 스니펫은 "="로,
+        없는 스니펫은 해시로 표시하고 스니펫 표에 한 번만 적습니다.
+        
+        Args:
+            semgrep_data: Semgrep JSON 결과
+            bandit_data: Bandit JSON 결과
+            code_text: 같은 프롬프트에 들어가는 코드 텍스트 (스니펫 중복 제거용)
+            
+        Returns:
+            압축된 텍스트 (발견이 없으면 빈 문자열)
+        """
+        rules = {}
+        files = {}
+        snippets = {}
+        rows = []
+        
+        rule_counts = {'R': 0, 'B': 0}
+        
+        def add_row(prefix, index, path, lines, rule_key, snippet):
+            if rule_key not in rules:
+                rule_counts[prefix] += 1
+                rules[rule_key] = f"{prefix}{rule_counts[prefix]}"
+            rule_ref = rules[rule_key]
+            file_ref = files.setdefault(path, f"F{len(files) + 1}")
+            # Bandit 코드 스니펫의 "라인번호 코드" 형식에서 라인 번호 제거
+            snippet = "\n".join(re.sub(r"^\d+\s", "", part) for part in (snippet or "").strip().splitlines())
+            if not snippet:
+                snippet_ref = "-"
+            elif all(part.strip() in code_text for part in snippet.splitlines() if part.strip()):
+                snippet_ref = "="
+            else:
+                snippet_ref = "#" + hashlib.sha1(snippet.encode('utf-8')).hexdigest()[:6]
+                snippets.setdefault(snippet_ref, snippet)
+            rows.append(f"{prefix[0]}{index}|{file_ref}|{self.format_repeat_lines(lines, ',')}|{rule_ref}|{snippet_ref}")
+        
+        # 같은 파일의 같은 규칙 반복은 한 줄로 (라인 목록 + 대표 스니펫), ID는 첫 발견 번호
+        semgrep_results = (semgrep_data or {}).get('results', [])
+        positions = {id(finding): idx for idx, finding in enumerate(semgrep_results, 1)}
+        for group in self.group_repeats(semgrep_results, lambda f: (f.get('path'), f.get('check_id'))):
+            finding = group[0]
+            idx = positions[id(finding)]
+            extra = finding.get('extra', {})
+            metadata = extra.get('metadata', {})
+            rule_key = (
+                'Semgrep',
+                finding.get('check_id', 'N/A'),
+                extra.get('severity', 'INFO'),
+                ", ".join(metadata.get('cwe', [])),
+                ", ".join(metadata.get('owasp', [])),
+                extra.get('message', 'N/A').strip(),
+            )
+            add_row('R', idx, finding.get('path', 'N/A'), [f.get('start', {}).get('line', 'N/A') for f in group],
+                    rule_key, extra.get('lines'))
+        
+        bandit_results = (bandit_data or {}).get('results', [])
+        positions = {id(issue): idx for idx, issue in enumerate(bandit_results, 1)}
+        for group in self.group_repeats(bandit_results, lambda i: (i.get('filename'), i.get('test_id'))):
+            issue = group[0]
+            idx = positions[id(issue)]
+            cwe = issue.get('issue_cwe') or {}
+            rule_key = (
+                'Bandit',
+                issue.get('test_id', 'N/A'),
+                f"{issue.get('issue_severity', 'N/A')}/{issue.get('issue_confidence', 'N/A')}",
+                f"CWE-{cwe['id']}" if cwe.get('id') else "",
+                "",
+                issue.get('issue_text', 'N/A').strip(),
+            )
+            add_row('B', idx, issue.get('filename', 'N/A'), [i.get('line_number', 'N/A') for i in group],
+                    rule_key, issue.get('code'))
+        
+        if not rows:
+            return ""
+        
+        parts = ["[규칙] 참조|도구|규칙 ID|심각도|CWE|OWASP|설명"]
+        parts.extend("|".join((ref,) + key) for key, ref in rules.items())
+        parts.append("\n[파일] 참조|경로")
+        parts.extend(f"{ref}|{path}" for path, ref in files.items())
+        parts.append("\n[발견] ID|파일|라인(반복이면 쉼표 목록)|규칙|스니펫 (=: 코드 본문에 있음, #해시: 아래 스니펫 표)")
+        parts.extend(rows)
+        if snippets:
+            parts.append("\n[스니펫]")
+            parts.extend(f"{ref}:\n{snippet}" for ref, snippet in snippets.items())
+        return "\n".join(parts)
+    
+    def read_code_files(self, file_paths, max_file_size=500000):
+        """
+        코드 파일들을 읽어서 딕셔너리로 반환
+        
+        Args:
+            file_paths: 분석할 파일 경로 리스트
+            max_file_size: 최대 파일 크기 (바이트, 기본 500KB)
+            
+        Returns:
+            파일명과 내용을 담은 딕셔너리
+        """
+        code_files = {}
+        skipped_files = []
+        
+        for file_path in file_paths:
+            try:
+                file_size = os.path.getsize(file_path)
+                
+                # 파일 크기 체크
+                if file_size > max_file_size:
+                    skipped_files.append(f"{file_path} (크기: {file_size // 1024}KB)")
+                    continue
+                
+                with open(file_path, 'r', encoding='utf-8') as f:
+                    code_files[file_path] = f.read()
+                    
+            except UnicodeDecodeError:
+                # 바이너리 파일 건너뛰기
+                skipped_files.append(f"{file_path} (바이너리)")
+            except Exception as e:
+                skipped_files.append(f"{file_path} (오류: {str(e)})")
+        
+        if skipped_files:
+            print(f"\n⚠ 건너뛴 파일 ({len(skipped_files)}개):")
+            for skipped in skipped_files[:5]:  # 최대 5개만 표시
+                print(f"  - {skipped}")
+            if len(skipped_files) > 5:
+                print(f"  ... 외 {len(skipped_files) - 5}개")
+        
+        print(f"\n✓ {len(code_files)}개 파일 읽기 완료")
+        return code_files
+    
+    @property
+    def response_language(self):
+        # LLM 응답 언어 이름 (report_language 기준, 프롬프트 지시용)
+        return REPORT_LANGUAGE_NAMES.get(self.report_language, self.report_language)
+    
+    @property
+    def system_prompt(self):
+        # 시스템 프롬프트 (응답 언어는 report_language를 따름)
+        language = self.response_language
+        return f"당신은 {language}로 소통하는 보안 전문가입니다. 모든 응답은 반드시 {language}로 작성해야 합니다."
+    
+    @property
+    def fixed_text(self):
+        # 도구 발견 변환용 고정 문구 (report_language 기준, 없으면 한국어)
+        return REPORT_FIXED_TEXT.get(self.report_language, REPORT_FIXED_TEXT['ko'])
+    
+    def convert_semgrep_to_vulnerabilities(self, semgrep_results):
+        """
+        Semgrep 결과를 취약점 리스트로 변환
+        
+        Args:
+            semgrep_results: Semgrep JSON 결과
+            
+        Returns:
+            취약점 딕셔너리 리스트
+        """
+        vulnerabilities = []
+        
+        if not semgrep_results or not semgrep_results.get('results'):
+            return vulnerabilities
+        
+        # 심각도 매핑
+        severity_map = {
+            'ERROR': 'High',
+            'WARNING': 'Medium',
+            'INFO': 'Low'
+        }
+        
+        for finding in semgrep_results.get('results', []):
+            extra = finding.get('extra', {})
+            
+            # 카테고리 추출 (OWASP 등)
+            metadata = extra.get('metadata', {})
+            owasp_tags = [tag for tag in metadata.get('owasp', [])] if metadata.get('owasp') else []
+            category = metadata.get('category', 'Security')
+            
+            # CWE 추출
+            cwe_list = metadata.get('cwe', [])
+            cwe_id = f"CWE-{cwe_list[0].split('-')[1]}" if cwe_list else ''
+            
+            # 지식 베이스로 영향/권장사항 작성 (규칙의 fix가 있으면 우선, 참고 URL은 덧붙임)
+            remediation = self.remediation_kb.lookup(
+                cwe_id=cwe_id, semgrep_rule_id=finding.get('check_id', ''), language=self.report_language
+            )
+            references = metadata.get('references') or []
+            text = self.fixed_text
+            severity_note = f"{text['severity']}: {extra.get('severity', 'INFO')}, {text['confidence']}: High"
+            if remediation:
+                cwe_id = cwe_id or remediation['cwe_id']
+                impact = f"{remediation['impact']} ({severity_note})"
+                recommendation = metadata.get('fix') or remediation['recommendation']
+                if references:
+                    recommendation += f" ({text['reference']}: {references[0]})"
+            else:
+                impact = severity_note
+                recommendation = metadata.get('fix', references[0] if references else text['fallback_recommendation'])
+            
+            vuln = {
+                'severity': severity_map.get(extra.get('severity', 'INFO').upper(), 'Medium'),
+                'category': f"{category} ({', '.join(owasp_tags[:2])})" if owasp_tags else category,
+                'title': f"{extra.get('message', 'Security Issue')}",
+                'description': extra.get('message', '') + '\n' + metadata.get('description', ''),
+                'location': f"{Path(finding.get('path', '')).name}:{finding.get('start', {}).get('line', 'N/A')}",
+                'code_snippet': finding.get('extra', {}).get('lines', '').strip(),
+                'impact': impact,
+                'recommendation': recommendation,
+                'cwe_id': cwe_id,
+                'source': 'Semgrep',
+                'file_path': finding.get('path', ''),
+                'line': finding.get('start', {}).get('line'),
+                'rule_id': finding.get('check_id', ''),
+                'confidence': str(metadata.get('confidence') or 'MEDIUM').upper(),
+            }
+            vulnerabilities.append(Finding(vuln))
+        
+        return vulnerabilities
+    
+    def convert_bandit_to_vulnerabilities(self, bandit_results):
+        """
+        Bandit 결과를 취약점 리스트로 변환
+        
+        Args:
+            bandit_results: Bandit JSON 결과
+            
+        Returns:
+            취약점 딕셔너리 리스트
+        """
+        vulnerabilities = []
+        
+        if not bandit_results or not bandit_results.get('results'):
+            return vulnerabilities
+        
+        # 심각도 매핑
+        severity_map = {
+            'HIGH': 'High',
+            'MEDIUM': 'Medium',
+            'LOW': 'Low'
+        }
+        
+        for issue in bandit_results.get('results', []):
+            cwe_id = f"CWE-{issue['issue_cwe']['id']}" if issue.get('issue_cwe') else ''
+            text = self.fixed_text
+            severity_note = (f"{text['severity']}: {issue.get('issue_severity', 'N/A')}, "
+                             f"{text['confidence']}: {issue.get('issue_confidence', 'N/A')}")
+            remediation = self.remediation_kb.lookup(
+                cwe_id=cwe_id, bandit_test_id=issue.get('test_id', ''), language=self.report_language
+            )
+            
+            vuln = {
+                'severity': severity_map.get(issue.get('issue_severity', 'MEDIUM'), 'Medium'),
+                'category': text['python_category'],
+                'title': f"{issue.get('test_name', 'Security Issue')} - {issue.get('test_id', '')}",
+                'description': issue.get('issue_text', '').strip(),
+                'location': f"{Path(issue.get('filename', '')).name}:{issue.get('line_number', 'N/A')}",
+                'code_snippet': issue.get('code', '').strip(),
+                'impact': f"{remediation['impact']} ({severity_note})" if remediation else severity_note,
+                'recommendation': remediation['recommendation'] if remediation else text['fallback_recommendation'],
+                'cwe_id': cwe_id or (remediation['cwe_id'] if remediation else ''),
+                'source': 'Bandit',
+                'file_path': issue.get('filename', ''),
+                'line': issue.get('line_number'),
+                'rule_id': issue.get('test_id', ''),
+                'confidence': str(issue.get('issue_confidence') or 'MEDIUM').upper(),
+            }
+            vulnerabilities.append(Finding(vuln))
+        
+        return vulnerabilities
+    
+    def estimate_tokens(self, text):
+        """
+        텍스트의 토큰 수를 API 호출 없이 추정
+
+        ASCII 문자는 약 3.5자당 1토큰, 한글 등 비ASCII 문자는 약 1.2자당 1토큰으로 계산합니다.
+
+        Args:
+            text: 추정할 텍스트
+
+        Returns:
+            추정 토큰 수 (정수)
+        """
+        if not text:
+            return 0
+        ascii_chars = sum(1 for ch in text if ord(ch) < 128)
+        non_ascii_chars = len(text) - ascii_chars
+        return int(ascii_chars / 3.5 + non_ascii_chars / 1.2) + 1
+    
+    def display_path(self, file_path):
+        """
+        프롬프트에 표시할 파일 경로 (경로가 너무 길면 파일명만)
+        
+        Args:
+            file_path: 파일 경로
+            
+        Returns:
+            표시용 경로 문자열
+        """
+        return Path(file_path).name if len(file_path) > 60 else file_path
+    
+    def format_code_context(self, code_files):
+        """
+        코드 파일들을 프롬프트에 포함할 형식으로 변환
+        
+        Args:
+            code_files: 파일명과 코드 내용을 담은 딕셔너리
+            
+        Returns:
+            프롬프트용 코드 텍스트
+        """
+        code_context = []
+        for file_path, content in code_files.items():
+            # 유사 파일 클러스터 멤버는 대표 파일이 같은 프롬프트에 있으면 차이만 표시
+            if self.duplicate_of.get(file_path) in code_files:
+                code_context.append(self.format_duplicate_diff(file_path, code_files))
+                continue
+            rel_path = self.display_path(file_path)
+            if file_path in self.minified_sources:
+                content = self.minified_sources[file_path][0]
+                rel_path += " (주석/빈 줄 제거본, 각 줄 앞 번호는 원본 라인 번호)"
+            # 파일 크기 제한 (너무 큰 파일은 일부만)
+            if len(content) > 10000:
+                content = content[:10000] + "\n\n... (파일이 너무 커서 일부만 표시)"
+            code_context.append(f"\n## 파일: {rel_path}\n```\n{content}\n```")
+        
+        return "\n".join(code_context)
+    
+    def minify_source(self, file_path, content):
+        """
+        프롬프트용 소스 축소 (주석, 독스트링, 라이선스 헤더, 빈 줄 제거)
+        
+        Python은 tokenize로, JS/TS는 문자열/정규식 리터럴을 구분하는 간단한 렉서로 주석을 지우고,
+        그 외 언어는 빈 줄과 줄 끝 공백만 제거합니다.
+        
+        Args:
+            file_path: 파일 경로 (확장자로 언어 판단)
+            content: 파일 내용
+            
+        Returns:
+            (축소된 텍스트, 라인 맵) 튜플 - 라인 맵의 i번째 값은 축소본 i+1번째 줄의 원본 라인 번호
+        """
+        extension = Path(file_path).suffix.lower()
+        lines = None
+        if extension == '.py':
+            lines = self.strip_python_comments(content)
+        elif extension in ('.js', '.jsx', '.ts', '.tsx', '.mjs', '.cjs'):
+            lines = self.strip_js_comments(content)
+        if lines is None:
+            lines = content.splitlines()
+        
+        kept = []
+        line_map = []
+        for line_no, line in enumerate(lines, 1):
+            line = line.rstrip()
+            if line.strip():
+                kept.append(line)
+                line_map.append(line_no)
+        return "\n".join(kept), line_map
+    
+    def strip_python_comments(self, content):
+        """
+        Python 소스에서 주석과 독스트링(단독 문자열 문장)을 공백으로 바꿈 (라인 수 유지)
+        
+        Args:
+            content: 파일 내용
+            
+        Returns:
+            라인 리스트 (토큰화 실패 시 None)
+        """
+        lines = content.splitlines()
+        removals = []
+        previous = tokenize.NEWLINE
+        try:
+            tokens = list(tokenize.generate_tokens(io.StringIO(content).readline))
+        except (tokenize.TokenError, IndentationError, SyntaxError):
+            return None
+        
+        for idx, token in enumerate(tokens):
+            if token.type == tokenize.COMMENT:
+                removals.append((token.start, token.end))
+            elif token.type == tokenize.STRING and previous in (tokenize.NEWLINE, tokenize.INDENT, tokenize.DEDENT):
+                following = next((t for t in tokens[idx + 1:] if t.type not in (tokenize.COMMENT, tokenize.NL)), None)
+                if following is None or following.type in (tokenize.NEWLINE, tokenize.ENDMARKER):
+                    removals.append((token.start, token.end))
+            if token.type not in (tokenize.COMMENT, tokenize.NL):
+                previous = token.type
+        
+        # 뒤에서부터 지워야 앞쪽 위치가 바뀌지 않음
+        for (start_row, start_col), (end_row, end_col) in reversed(removals):
+            if start_row == end_row:
+                line = lines[start_row - 1]
+                lines[start_row - 1] = line[:start_col] + line[end_col:]
+            else:
+                lines[start_row - 1] = lines[start_row - 1][:start_col]
+                for row in range(start_row, end_row - 1):
+                    lines[row] = ""
+                lines[end_row - 1] = lines[end_row - 1][end_col:]
+        return lines
+    
+    def strip_js_comments(self, content):
+        """
+        JS/TS 소스에서 // 및 /* */ 주석을 제거 (문자열, 템플릿, 정규식 리터럴은 유지, 라인 수 유지)
+        
+        Args:
+            content: 파일 내용
+            
+        Returns:
+            라인 리스트
+        """
+        out = []
+        i = 0
+        length = len(content)
+        last_significant = ''
+        while i < length:
+            ch = content[i]
+            nxt = content[i + 1] if i + 1 < length else ''
+            if ch == '/' and nxt == '/':
+                end = content.find('\n', i)
+                i = length if end == -1 else end
+                continue
+            if ch == '/' and nxt == '*':
+                end = content.find('*/', i + 2)
+                end = length if end == -1 else end + 2
+                # 라인 번호 유지를 위해 주석 안의 줄바꿈은 남김
+                out.append('\n' * content.count('\n', i, end))
+                i = end
+                continue
+            if ch in '"\'`' or (ch == '/' and (not last_significant or last_significant in '(,=:[!&|?{};+-*%<>~^')):
+                quote = ch
+                start = i
+                i += 1
+                in_class = False
+                while i < length:
+                    c = content[i]
+                    if c == '\\':
+                        i += 2
+                        continue
+                    if quote == '/':
+                        if c == '[':
+                            in_class = True
+                        elif c == ']':
+                            in_class = False
+                        elif c == '/' and not in_class:
+                            break
+                        elif c == '\n':
+                            break
+                    elif c == quote or (c == '\n' and quote != '`'):
+                        break
+                    i += 1
+                i += 1
+                out.append(content[start:i])
+                last_significant = quote
+                continue
+            out.append(ch)
+            if not ch.isspace():
+                last_significant = ch
+            i += 1
+        return "".join(out).splitlines()
+    
+    def prepare_prompt_sources(self, code_files):
+        """
+        프롬프트용 소스 준비 (유사 파일 클러스터, 소스 축소)
+        
+        클러스터를 먼저 정해야 축소에서 클러스터 파일을 제외할 수 있으므로 이 순서로 호출합니다.
+        
+        Args:
+            code_files: 파일명과 코드 내용을 담은 딕셔너리
+        """
+        if self.near_duplicate_detection:
+            self.prepare_near_duplicates(code_files)
+        if self.minify_prompts:
+            self.prepare_minified_sources(code_files)
+    
+    def prepare_minified_sources(self, code_files):
+        """
+        파일의 축소본과 라인 맵을 만들고 압축률을 집계
+        
+        이후 format_code_context()는 축소본을 사용합니다. 축소본의 각 줄에는 format_related_definitions()와 같은
+        형식으로 원본 라인 번호를 붙이므로, 도구 결과와 LLM 추가 발견이 한 프롬프트에서 원본 라인 번호 하나로 통일됩니다.
+        유사 파일 클러스터(대표와 멤버)는 축소하지 않습니다.
+        멤버의 diff는 원본 라인 번호로 만들어지므로, 클러스터 전체를 원본 기준으로 두어야 한 프롬프트 안에서
+        라인 번호 체계가 섞이지 않습니다. 따라서 prepare_near_duplicates() 다음에 호출해야 합니다.
+        
+        Args:
+            code_files: 파일명과 코드 내용을 담은 딕셔너리
+        """
+        self.minified_sources = {}
+        clustered = set(self.duplicate_of) | set(self.duplicate_of.values())
+        original_tokens = 0
+        minified_tokens = 0
+        for path, content in code_files.items():
+            if path in clustered:
+                continue
+            minified, line_map = self.minify_source(path, content)
+            minified = "\n".join(f"{n:5d} | {line}" for n, line in zip(line_map, minified.split("\n")))
+            self.minified_sources[path] = (minified, line_map)
+            original_tokens += self.estimate_tokens(content)
+            minified_tokens += self.estimate_tokens(minified)
+        
+        self.minify_stats = {
+            'files': len(self.minified_sources),
+            'original_tokens': original_tokens,
+            'minified_tokens': minified_tokens,
+            'tokens_saved': max(0, original_tokens - minified_tokens),
+            'ratio': minified_tokens / original_tokens if original_tokens else 1.0,
+        }
+        print(f"   🗜️ 소스 축소: 토큰 ~{original_tokens:,} → ~{minified_tokens:,} "
+              f"(압축률 {self.minify_stats['ratio']:.0%}, ~{self.minify_stats['tokens_saved']:,} 절감)")
+    
+    def split_location(self, location, paths):
+        """
+        "파일명:라인번호" 위치 문자열을 (파일 경로, 라인 번호)로 해석
+        
+        Args:
+            location: 위치 문자열
+            paths: 파일 경로 집합 (경로, 표시 경로, 파일명으로 매칭)
+            
+        Returns:
+            (파일 경로, 라인 번호) 튜플 (해석할 수 없으면 (None, None))
+        """
+        file_part, _, line_part = str(location or '').rpartition(':')
+        line_part = line_part.strip()
+        if not line_part.isdigit():
+            return None, None
+        for path in paths:
+            if file_part in (path, self.display_path(path)):
+                return path, int(line_part)
+        for path in paths:
+            if file_part and Path(path).name == Path(file_part).name:
+                return path, int(line_part)
+        return None, None
+    
+    def normalize_cwe_id(self, cwe_id):
+        """
+        "89", "CWE-89", "CWE-89: SQL Injection" 등을 "CWE-89" 형식으로 정규화
+        
+        Args:
+            cwe_id: CWE 문자열
+            
+        Returns:
+            정규화된 CWE ID (숫자가 없으면 빈 문자열)
+        """
+        return RemediationKnowledgeBase.normalize_cwe_id(cwe_id)
+    
+    def finding_template(self, cwe_id):
+        """
+        CWE에 해당하는 보고서 문장 템플릿 (report_language 기준, 없으면 한국어)
+        
+        Args:
+            cwe_id: CWE 문자열
+            
+        Returns:
+            category, title, description, impact, recommendation 딕셔너리
+        """
+        return (self.remediation_kb.template(cwe_id, self.report_language)
+                or self.remediation_kb.default_template(self.report_language))
+    
+    def expand_finding_text(self, vuln):
+        """
+        압축 응답으로 받은 취약점의 빈 문장 필드를 CWE 템플릿으로 채움 (보고서 렌더링 시 호출)
+        
+        Args:
+            vuln: 취약점 딕셔너리
+            
+        Returns:
+            문장 필드가 채워진 새 딕셔너리 (압축 응답이 아니면 그대로)
+        """
+        if not vuln.get('compact'):
+            return vuln
+        template = self.finding_template(vuln.get('cwe_id'))
+        expanded = dict(vuln)
+        for field in ('category', 'title', 'impact', 'recommendation'):
+            if not expanded.get(field):
+                expanded[field] = template[field]
+        if template is self.finding_template(None) and vuln.get('cwe_id') and not vuln.get('title'):
+            # 카탈로그에 없는 CWE는 제목에 ID를 붙여 구분
+            expanded['title'] = f"{template['title']} ({vuln['cwe_id']})"
+        if not expanded.get('description'):
+            note = (vuln.get('note') or '').strip()
+            expanded['description'] = f"{template['description']} {note}".strip()
+        return expanded
+    
+    def finalize_compact_findings(self, vulnerabilities, code_files):
+        """
+        압축 응답 취약점에 출처, CWE 정규화, 원본 코드 라인을 채움 (문장은 렌더링 시 펼침)
+        
+        Args:
+            vulnerabilities: 취약점 리스트 (제자리에서 수정)
+            code_files: 파일명과 코드 내용을 담은 딕셔너리
+        """
+        for vuln in vulnerabilities:
+            vuln['compact'] = True
+            vuln.setdefault('source', 'LLM Analysis')
+            vuln['cwe_id'] = self.normalize_cwe_id(vuln.get('cwe_id'))
+            if not vuln.get('code_snippet'):
+                path, line = self.split_location(vuln.get('location'), code_files)
+                if path is not None:
+                    lines = code_files[path].splitlines()
+                    if 1 <= line <= len(lines):
+                        vuln['code_snippet'] = lines[line - 1].strip()
+    
+    def record_output_token_stats(self, vulnerabilities):
+        """
+        이번 실행의 LLM 출력 토큰과 LLM 추가 발견 수로 발견당 출력 토큰 집계
+        
+        Args:
+            vulnerabilities: LLM 응답의 취약점 리스트
+        """
+        output_tokens = sum(record['actual_output_tokens'] for record in self.token_usage_records)
+        findings = sum(1 for v in vulnerabilities if v.get('source', 'LLM Analysis') == 'LLM Analysis')
+        self.output_token_stats = {
+            'output_tokens': output_tokens,
+            'findings': findings,
+            'per_finding': output_tokens / findings if findings else 0.0,
+            'compact': self.compact_response and self.structured_output,
+        }
+        if output_tokens:
+            print(f"   📝 출력 토큰 {output_tokens:,} / LLM 발견 {findings}개 "
+                  f"(발견당 ~{self.output_token_stats['per_finding']:,.0f} 토큰"
+                  f"{', 압축 응답' if self.output_token_stats['compact'] else ''})")
+    
+    def normalize_source(self, content):
+        """
+        유사 파일 비교용 소스 정규화 (주석 줄, 공백 차이 제거)
+        
+        Args:
+            content: 파일 내용
+            
+        Returns:
+            정규화된 토큰 리스트
+        """
+        tokens = []
+        for line in content.splitlines():
+            stripped = line.strip()
+            if not stripped or stripped.startswith(('#', '//', '/*', '*')):
+                continue
+            tokens.extend(re.findall(r"\w+|[^\w\s]", stripped))
+        return tokens
+    
+    def minhash_signature(self, content):
+        """
+        정규화된 소스의 5-토큰 shingle 집합에 대한 MinHash 서명 계산
+        
+        Args:
+            content: 파일 내용
+            
+        Returns:
+            길이 minhash_num_perm의 정수 튜플 (shingle이 없으면 None)
+        """
+        tokens = self.normalize_source(content)
+        shingles = {" ".join(tokens[i:i + 5]) for i in range(max(1, len(tokens) - 4))} if tokens else set()
+        if not shingles:
+            return None
+        
+        hashes = [int.from_bytes(hashlib.blake2b(s.encode('utf-8'), digest_size=8).digest(), 'big') for s in shingles]
+        prime = (1 << 61) - 1
+        rng = random.Random(0)
+        signature = []
+        for _ in range(self.minhash_num_perm):
+            a, b = rng.randrange(1, prime), rng.randrange(0, prime)
+            signature.append(min((a * h + b) % prime for h in hashes))
+        return tuple(signature)
+    
+    def find_near_duplicates(self, code_files):
+        """
+        MinHash/LSH로 거의 같은 파일들을 클러스터로 묶음
+        
+        LSH 밴드가 하나라도 같은 파일 쌍만 후보로 보고, 추정 Jaccard 유사도가
+        near_duplicate_threshold 이상이면 같은 클러스터로 합칩니다 (확장자가 같은 파일끼리만).
+        대표 파일은 클러스터에서 가장 큰 파일입니다.
+        
+        Args:
+            code_files: 파일명과 코드 내용을 담은 딕셔너리
+            
+        Returns:
+            {멤버 파일: 대표 파일} 딕셔너리
+        """
+        signatures = {}
+        for path, content in code_files.items():
+            signature = self.minhash_signature(content)
+            if signature:
+                signatures[path] = signature
+        
+        rows = self.minhash_num_perm // self.minhash_bands
+        buckets = {}
+        for path, signature in signatures.items():
+            extension = Path(path).suffix.lower()
+            for band in range(self.minhash_bands):
+                key = (extension, band, signature[band * rows:(band + 1) * rows])
+                buckets.setdefault(key, []).append(path)
+        
+        parent = {path: path for path in signatures}
+        
+        def find(path):
+            while parent[path] != path:
+                parent[path] = parent[parent[path]]
+                path = parent[path]
+            return path
+        
+        checked = set()
+        for paths in buckets.values():
+            for i, first in enumerate(paths):
+                for second in paths[i + 1:]:
+                    if (first, second) in checked:
+                        continue
+                    checked.add((first, second))
+                    a, b = signatures[first], signatures[second]
+                    similarity = sum(1 for x, y in zip(a, b) if x == y) / len(a)
+                    if similarity >= self.near_duplicate_threshold:
+                        parent[find(second)] = find(first)
+        
+        clusters = {}
+        for path in signatures:
+            clusters.setdefault(find(path), []).append(path)
+        
+        duplicate_of = {}
+        for members in clusters.values():
+            if len(members) < 2:
+                continue
+            representative = max(members, key=lambda p: (len(code_files[p]), p))
+            for member in members:
+                if member != representative:
+                    duplicate_of[member] = representative
+        return duplicate_of
+    
+    def prepare_near_duplicates(self, code_files):
+        """
+        유사 파일 클러스터를 계산하고 절감 토큰을 집계
+        
+        이후 format_code_context()는 대표 파일과 같은 프롬프트에 들어가는 멤버 파일을
+        대표 파일과의 차이(diff)로만 표시합니다.
+        
+        Args:
+            code_files: 파일명과 코드 내용을 담은 딕셔너리
+        """
+        self.duplicate_of = self.find_near_duplicates(code_files)
+        if not self.duplicate_of:
+            self.near_duplicate_stats = None
+            return
+        
+        full_tokens = sum(self.estimate_tokens(self.format_code_context({p: code_files[p]}))
+                          for p in self.duplicate_of)
+        diff_tokens = sum(self.estimate_tokens(self.format_duplicate_diff(p, code_files))
+                          for p in self.duplicate_of)
+        self.near_duplicate_stats = {
+            'clusters': len(set(self.duplicate_of.values())),
+            'members': len(self.duplicate_of),
+            'tokens_saved': max(0, full_tokens - diff_tokens),
+        }
+        print(f"   🧬 유사 파일 클러스터 {self.near_duplicate_stats['clusters']}개 "
+              f"(차이만 전송하는 파일 {self.near_duplicate_stats['members']}개, "
+              f"토큰 ~{self.near_duplicate_stats['tokens_saved']:,} 절감)")
+    
+    def format_duplicate_diff(self, file_path, code_files):
+        """
+        클러스터 멤버 파일을 대표 파일 대비 unified diff로 표시
+        
+        Args:
+            file_path: 멤버 파일 경로
+            code_files: 파일명과 코드 내용을 담은 딕셔너리
+            
+        Returns:
+            프롬프트용 텍스트
+        """
+        representative = self.duplicate_of[file_path]
+        diff = list(difflib.unified_diff(
+            code_files[representative].splitlines(), code_files[file_path].splitlines(), n=2, lineterm=''
+        ))[2:]
+        body = "\n".join(diff) if diff else "(대표 파일과 동일)"
+        return (f"\n## 파일: {self.display_path(file_path)} "
+                f"({self.display_path(representative)}와 거의 동일 - 차이만 표시, '+' 라인 번호는 이 파일 기준)\n"
+                f"```diff\n{body}\n```")
+    
+    def project_duplicate_findings(self, vulnerabilities, code_files):
+        """
+        대표 파일에서 LLM이 찾은 취약점을 클러스터 멤버의 대응 라인으로 복사
+        
+        대표 파일과 멤버에서 내용이 같은 구간(SequenceMatcher의 equal 블록)에 있는 라인만 옮깁니다.
+        바뀐 구간은 diff를 본 LLM이 멤버 위치로 직접 보고합니다.
+        
+        Args:
+            vulnerabilities: 취약점 리스트
+            code_files: 파일명과 코드 내용을 담은 딕셔너리
+            
+        Returns:
+            멤버로 복사된 취약점 리스트
+        """
+        members_of = {}
+        for member, representative in self.duplicate_of.items():
+            members_of.setdefault(representative, []).append(member)
+        
+        index = self.new_finding_index()
+        for vuln in vulnerabilities:
+            index.add(vuln)
+        opcodes_cache = {}
+        projected = []
+        for vuln in vulnerabilities:
+            if vuln.get('source') != 'LLM Analysis':
+                continue
+            representative, line = self.split_location(vuln.get('location'), members_of)
+            if representative is None:
+                continue
+            line_index = line - 1
+            
+            for member in members_of[representative]:
+                if member not in opcodes_cache:
+                    matcher = difflib.SequenceMatcher(
+                        None, code_files[representative].splitlines(), code_files[member].splitlines(), autojunk=False
+                    )
+                    opcodes_cache[member] = [op for op in matcher.get_opcodes() if op[0] == 'equal']
+                for _, i1, i2, j1, _ in opcodes_cache[member]:
+                    if i1 <= line_index < i2:
+                        member_line = j1 + (line_index - i1) + 1
+                        location = f"{self.display_path(member)}:{member_line}"
+                        copy = dict(vuln, location=location, file_path=member,
+                                    line=member_line, projected_from=vuln.get('location'))
+                        copy.pop('fingerprint', None)
+                        if index.add(copy) is None:
+                            projected.append(copy)
+                        break
+        
+        if projected:
+            print(f"   🧬 대표 파일의 취약점 {len(projected)}개를 유사 파일에 반영했습니다")
+        return projected
+    
+    def build_code_index(self, code_files):
+        """
+        교차 파일 문맥 선택용 경량 인덱스 생성 (import 관계, 함수/클래스 정의, 호출 위치)
+        
+        Python은 ast로, JavaScript/TypeScript는 require/import 구문과 함수 정의 정규식으로 수집합니다.
+        import는 프로젝트 안의 파일로 해석되는 것만 남깁니다.
+        
+        Args:
+            code_files: 파일명과 코드 내용을 담은 딕셔너리
+        """
+        by_abs = {os.path.normcase(os.path.splitext(os.path.abspath(p))[0]): p for p in code_files}
+        by_abs.update({os.path.normcase(os.path.abspath(p)): p for p in code_files})
+        
+        # 파이썬 모듈 이름 (상대 경로의 모든 접미사, 예: pkg.sub.mod, sub.mod, mod) -> 파일
+        py_paths = [p for p in code_files if p.endswith('.py')]
+        modules = {}
+        if py_paths:
+            root = os.path.commonpath([os.path.dirname(os.path.abspath(p)) for p in py_paths])
+            for path in py_paths:
+                parts = os.path.splitext(os.path.relpath(os.path.abspath(path), root))[0].split(os.sep)
+                if parts[-1] == '__init__':
+                    parts = parts[:-1]
+                for i in range(len(parts)):
+                    modules.setdefault(".".join(parts[i:]), path)
+        
+        imports, definitions, calls = {}, {}, {}
+        for path, content in code_files.items():
+            ext = os.path.splitext(path)[1].lower()
+            if ext == '.py':
+                parsed = self.index_python_source(path, content, modules, by_abs)
+            elif ext in ('.js', '.jsx', '.ts', '.tsx'):
+                parsed = self.index_js_source(path, content, by_abs)
+            else:
+                continue
+            if parsed is None:
+                continue
+            file_imports, file_definitions, file_calls = parsed
+            imports[path] = file_imports - {path}
+            for name, start, end in file_definitions:
+                definitions.setdefault(name, []).append((path, start, end))
+            calls[path] = file_calls
+        
+        self.code_index = {'imports': imports, 'definitions': definitions, 'calls': calls}
+        edges = sum(len(targets) for targets in imports.values())
+        print(f"   🔗 교차 파일 인덱스: 정의 {sum(len(d) for d in definitions.values())}개, "
+              f"프로젝트 내부 import {edges}개")
+    
+    def index_python_source(self, file_path, content, modules, by_abs):
+        """
+        Python 파일의 import, 정의, 호출을 ast로 수집
+        
+        Args:
+            file_path: 파일 경로
+            content: 파일 내용
+            modules: {모듈 이름: 파일 경로}
+            by_abs: {정규화한 절대 경로(확장자 유무 모두): 파일 경로}
+            
+        Returns:
+            (import한 파일 집합, [(이름, 시작 라인, 끝 라인)], [(라인, 호출 이름)]) (파싱 실패 시 None)
+        """
+        try:
+            tree = ast.parse(content)
+        except (SyntaxError, ValueError):
+            return None
+        
+        here = os.path.dirname(os.path.abspath(file_path))
+        
+        def resolve(name, level=0):
+            # 상대 import는 파일 위치 기준 경로로, 절대 import는 모듈 이름 접미사로 찾음
+            if level:
+                base = here
+                for _ in range(level - 1):
+                    base = os.path.dirname(base)
+                target = os.path.normcase(os.path.join(base, *name.split('.')) if name else base)
+                return by_abs.get(target) or by_abs.get(os.path.join(target, '__init__'))
+            while name:
+                if name in modules:
+                    return modules[name]
+                name = name.rpartition('.')[0]
+            return None
+        
+        file_imports, file_definitions, file_calls = set(), [], []
+        for node in ast.walk(tree):
+            if isinstance(node, ast.Import):
+                for alias in node.names:
+                    target = resolve(alias.name)
+                    if target:
+                        file_imports.add(target)
+            elif isinstance(node, ast.ImportFrom):
+                for alias in node.names:
+                    module = f"{node.module}.{alias.name}" if node.module else alias.name
+                    target = resolve(module, node.level) or (resolve(node.module, node.level) if node.module else None)
+                    if target:
+                        file_imports.add(target)
+            elif isinstance(node, (ast.FunctionDef, ast.AsyncFunctionDef, ast.ClassDef)):
+                start = min([node.lineno] + [d.lineno for d in node.decorator_list])
+                file_definitions.append((node.name, start, getattr(node, 'end_lineno', None) or node.lineno))
+            elif isinstance(node, ast.Call):
+                func = node.func
+                name = func.id if isinstance(func, ast.Name) else func.attr if isinstance(func, ast.Attribute) else None
+                if name:
+                    file_calls.append((node.lineno, name))
+        file_calls.sort()
+        return file_imports, file_definitions, file_calls
+    
+    def index_js_source(self, file_path, content, by_abs):
+        """
+        JavaScript/TypeScript 파일의 require/import, 함수 정의, 호출을 정규식으로 수집
+        
+        정의의 끝 라인은 정의가 시작된 줄부터 중괄호 짝을 맞춰 찾습니다.
+        
+        Args:
+            file_path: 파일 경로
+            content: 파일 내용
+            by_abs: {정규화한 절대 경로(확장자 유무 모두): 파일 경로}
+            
+        Returns:
+            (import한 파일 집합, [(이름, 시작 라인, 끝 라인)], [(라인, 호출 이름)])
+        """
+        import_pattern = re.compile(r"""(?:require\s*\(\s*|import\s*\(\s*|\bfrom\s+|^\s*import\s+)['"]([^'"]+)['"]""")
+        definition_pattern = re.compile(
+            r"(?:\bfunction\s*\*?\s*([A-Za-z_$][\w$]*)\s*\("
+            r"|\b(?:const|let|var)\s+([A-Za-z_$][\w$]*)\s*=\s*(?:async\s+)?(?:function\b|\([^)]*\)\s*=>|[A-Za-z_$][\w$]*\s*=>)"
+            r"|^\s*(?:async\s+)?([A-Za-z_$][\w$]*)\s*\([^)]*\)\s*\{)"
+        )
+        call_pattern = re.compile(r"(?<![\w$])([A-Za-z_$][\w$]*)\s*\(")
+        keywords = {'if', 'for', 'while', 'switch', 'catch', 'function', 'return', 'typeof', 'new', 'require', 'import'}
+        
+        lines = content.splitlines()
+        base_dir = os.path.dirname(os.path.abspath(file_path))
+        file_imports, file_definitions, file_calls = set(), [], []
+        for line_no, line in enumerate(lines, 1):
+            for spec in import_pattern.findall(line):
+                if not spec.startswith('.'):
+                    continue
+                target = os.path.normcase(os.path.normpath(os.path.join(base_dir, spec)))
+                for candidate in (target, os.path.join(target, 'index')):
+                    if candidate in by_abs:
+                        file_imports.add(by_abs[candidate])
+                        break
+            
+            match = definition_pattern.search(line)
+            name = match and next((g for g in match.groups() if g), None)
+            if name and name not in keywords:
+                depth, end, opened = 0, line_no, False
+                for end in range(line_no, len(lines) + 1):
+                    if not opened and end > line_no:
+                        # 중괄호 없는 화살표 함수는 한 줄 정의로 취급
+                        end = line_no
+                        break
+                    depth += lines[end - 1].count('{') - lines[end - 1].count('}')
+                    opened = opened or '{' in lines[end - 1]
+                    if opened and depth <= 0:
+                        break
+                file_definitions.append((name, line_no, end))
+            
+            for called in call_pattern.findall(line):
+                if called not in keywords and called != name:
+                    file_calls.append((line_no, called))
+        return file_imports, file_definitions, file_calls
+    
+    def related_definitions(self, origin_files, seed_calls, exclude_files=(), skip_range=None):
+        """
+        import 그래프로 도달 가능한 파일에서, 호출된 함수/클래스 정의를 전이적으로 수집
+        
+        origin_files에서 import로(전이적으로) 닿는 파일만 후보로 삼고, 찾은 정의 안의
+        호출도 따라가며 cross_file_max_definitions개까지 모읍니다.
+        
+        Args:
+            origin_files: 프롬프트에 들어가는 파일 리스트
+            seed_calls: 시작 호출 이름 목록
+            exclude_files: 이미 프롬프트에 전체가 들어가는 파일 (정의를 다시 넣지 않음)
+            skip_range: (파일, 시작 라인, 끝 라인) - 이미 문맥으로 보이는 구간
+            
+        Returns:
+            [(파일, 이름, 시작 라인, 끝 라인)] (가까운 호출 대상 순)
+        """
+        if not self.code_index:
+            return []
+        imports = self.code_index['imports']
+        reachable = set(origin_files)
+        stack = list(origin_files)
+        while stack:
+            for target in imports.get(stack.pop(), ()):
+                if target not in reachable:
+                    reachable.add(target)
+                    stack.append(target)
+        
+        exclude_files = set(exclude_files)
+        found = []
+        seen_names = set()
+        queue = deque(seed_calls)
+        while queue and len(found) < self.cross_file_max_definitions:
+            name = queue.popleft()
+            if name in seen_names:
+                continue
+            seen_names.add(name)
+            for path, start, end in self.code_index['definitions'].get(name, ()):
+                if path not in reachable or path in exclude_files:
+                    continue
+                if skip_range and path == skip_range[0] and start <= skip_range[2] and end >= skip_range[1]:
+                    continue
+                found.append((path, name, start, end))
+                queue.extend(called for line, called in self.code_index['calls'].get(path, ())
+                             if start <= line <= end)
+                if len(found) >= self.cross_file_max_definitions:
+                    break
+        return found
+    
+    def format_related_definitions(self, definitions, code_files, max_tokens=None):
+        """
+        관련 정의를 프롬프트용 참고 섹션으로 포맷 (원본 라인 번호 포함, 토큰 한도 적용)
+        
+        Args:
+            definitions: related_definitions()의 결과
+            code_files: 파일명과 코드 내용을 담은 딕셔너리
+            max_tokens: 섹션 토큰 한도 (기본 cross_file_max_tokens)
+            
+        Returns:
+            섹션 텍스트 (정의가 없으면 빈 문자열)
+        """
+        max_tokens = max_tokens or self.cross_file_max_tokens
+        blocks = []
+        used = 0
+        for path, name, start, end in definitions:
+            lines = self.get_source_lines(path, code_files)[start - 1:end]
+            if len(lines) > 60:
+                lines = lines[:60] + ["... (정의가 길어 일부만 표시)"]
+            block = f"# {self.display_path(path)}:{start}-{end} ({name})\n" + "\n".join(
+                f"{n:5d} | {line}" for n, line in enumerate(lines, start)
+            )
+            block_tokens = self.estimate_tokens(block)
+            if blocks and used + block_tokens > max_tokens:
+                break
+            blocks.append(block)
+            used += block_tokens
+        if not blocks:
+            return ""
+        return (f"\n{'=' * 70}\n🔗 관련 파일의 호출 대상 정의 (참고용, import 그래프 기준)\n{'=' * 70}\n"
+                "이 정의들을 통해 이어지는 데이터 흐름(예: 검증 없이 위험 함수로 전달)을 확인하세요. "
+                "여기서 비롯된 문제는 위 분석 대상 파일의 호출 위치로 보고하세요.\n```\n"
+                + "\n\n".join(blocks) + "\n```")
+    
+    def order_by_import_graph(self, paths):
+        """
+        import로 연결된 파일들이 이웃하도록 파일 순서 정렬 (연결 요소별 너비 우선)
+        
+        Args:
+            paths: 파일 경로 리스트
+            
+        Returns:
+            정렬된 파일 경로 리스트
+        """
+        if not self.code_index:
+            return list(paths)
+        position = {path: idx for idx, path in enumerate(paths)}
+        wanted = set(paths)
+        neighbors = {path: set() for path in paths}
+        for source, targets in self.code_index['imports'].items():
+            if source not in wanted:
+                continue
+            for target in targets & wanted:
+                neighbors[source].add(target)
+                neighbors[target].add(source)
+        
+        ordered, visited = [], set()
+        for path in paths:
+            if path in visited:
+                continue
+            visited.add(path)
+            queue = deque([path])
+            while queue:
+                current = queue.popleft()
+                ordered.append(current)
+                for neighbor in sorted(neighbors[current] - visited, key=position.get):
+                    visited.add(neighbor)
+                    queue.append(neighbor)
+        return ordered
+    
+    def filter_tool_results(self, tool_data, file_paths, path_key):
+        """
+        Semgrep/Bandit 결과에서 특정 파일들에 해당하는 이슈만 추출
+        
+        Args:
+            tool_data: Semgrep 또는 Bandit JSON 결과
+            file_paths: 포함할 파일 경로 리스트
+            path_key: 결과 항목의 파일 경로 키 ('path' 또는 'filename')
+            
+        Returns:
+            필터링된 결과 (Bandit의 경우 심각도 통계도 재계산)
+        """
+        if not tool_data or not tool_data.get('results'):
+            return tool_data
+        
+        wanted = {os.path.normcase(os.path.abspath(p)) for p in file_paths}
+        results = [
+            r for r in tool_data.get('results', [])
+            if os.path.normcase(os.path.abspath(r.get(path_key, ''))) in wanted
+        ]
+        
+        filtered = {'results': results}
+        if path_key == 'filename':
+            totals = {'SEVERITY.HIGH': 0, 'SEVERITY.MEDIUM': 0, 'SEVERITY.LOW': 0}
+            for issue in results:
+                key = f"SEVERITY.{issue.get('issue_severity', '').upper()}"
+                if key in totals:
+                    totals[key] += 1
+            filtered['metrics'] = {'_totals': totals}
+        
+        return filtered
+    
+    def build_analysis_prompt(self, code_text, semgrep_text, bandit_text, semgrep_count, bandit_count, tool_text=None):
+        """
+        LLM 보안 분석 프롬프트 생성
+        
+        Args:
+            code_text: 포맷된 코드 텍스트
+            semgrep_text: 포맷된 Semgrep 결과
+            bandit_text: 포맷된 Bandit 결과
+            semgrep_count: Semgrep 발견 수
+            bandit_count: Bandit 발견 수
+            tool_text: 압축 표기된 도구 결과 (주어지면 도구 발견을 다시 보고하지 않고 추가 발견만 요청)
+            
+        Returns:
+            프롬프트 문자열
+        """
+        total_tool_count = semgrep_count + bandit_count
+        if tool_text is not None:
+            include_tools_note = "⚠️ 정적 분석 도구 발견은 자동으로 병합되니 반복하지 말고, 추가 발견 취약점만 보고!"
+        else:
+            include_tools_note = f"⚠️ Semgrep {semgrep_count}개 + Bandit {bandit_count}개 + 추가 발견 취약점 모두 포함!"
+        
+        language = self.response_language
+        if self.structured_output and self.compact_response:
+            report_target = "결과"
+            response_format = f"""{"=" * 70}
+📝 응답 방법 ({COMPACT_REPORT_TOOL['name']} 도구 호출, 압축 응답)
+{"=" * 70}
+
+결과는 반드시 {COMPACT_REPORT_TOOL['name']} 도구를 호출하여 보고하세요. 별도의 텍스트는 출력하지 마세요.
+
+⚠️ 각 취약점은 cwe_id, severity, location(파일명:라인번호)만 쓰세요. 제목/설명/영향/권장사항은 CWE별 템플릿으로 자동 작성됩니다.
+⚠️ note에는 템플릿에 없는 이 코드만의 구체적 내용(입력 출처, 변수, 조건 등)이 있을 때만 {language}로 한 문장(80자 이내) 작성!
+⚠️ overall_assessment는 {language}로 두세 문장!
+{include_tools_note}
+⚠️ 모든 파일(프론트엔드/백엔드/설정)을 빠짐없이 검사!"""
+        elif self.structured_output:
+            report_target = "결과"
+            response_format = f"""{"=" * 70}
+📝 응답 방법 (report_vulnerabilities 도구 호출, 모든 내용은 {language}로!)
+{"=" * 70}
+
+결과는 반드시 {VULNERABILITY_REPORT_TOOL['name']} 도구를 호출하여 보고하세요. 별도의 JSON 텍스트는 출력하지 마세요.
+
+⚠️ **모든 텍스트 필드(title, description, category, impact, recommendation, overall_assessment)는 반드시 {language}로 작성!**
+{include_tools_note}
+⚠️ 모든 파일(프론트엔드/백엔드/설정)을 빠짐없이 검사!"""
+        else:
+            report_target = "JSON"
+            response_format = f"""{"=" * 70}
+📝 응답 형식 (반드시 JSON만 출력, 모든 내용은 {language}로!)
+{"=" * 70}
+
+{{
+  "vulnerabilities": [
+    {{
+      "severity": "Critical|High|Medium|Low",
+      "category": "SQL Injection|XSS|인증 우회|민감정보 노출|등등 ({language}로!)",
+      "title": "명확한 취약점 제목 ({language}로!)",
+      "description": "상세한 설명 ({language}로!)",
+      "location": "파일명:라인번호",
+      "code_snippet": "실제 문제 코드",
+      "impact": "구체적인 보안 영향 ({language}로!)",
+      "recommendation": "실행 가능한 수정 방안 ({language}로!)",
+      "cwe_id": "CWE-XXX (있는 경우)",
+      "source": "Semgrep|Bandit|LLM Analysis"
+    }}
+  ],
+  "summary": {{
+    "total_vulnerabilities": {total_tool_count} + 추가발견,
+    "critical": 0,
+    "high": 0,
+    "medium": 0,
+    "low": 0,
+    "semgrep_issues": {semgrep_count},
+    "bandit_issues": {bandit_count},
+    "llm_found_issues": 추가발견수
+  }},
+  "overall_assessment": "종합 평가 ({language}로!)"
+}}
+
+⚠️ **모든 텍스트 필드(title, description, category, impact, recommendation, overall_assessment)는 반드시 {language}로 작성!**
+⚠️ 반드시 순수 JSON만 출력하세요. 설명이나 마크다운 없이 JSON만!
+{include_tools_note}
+⚠️ 모든 파일(프론트엔드/백엔드/설정)을 빠짐없이 검사!"""
+        
+        if tool_text is not None:
+            tool_sections = f"""{"=" * 70}
+🔍 정적 분석 도구 결과 (Semgrep {semgrep_count}개 + Bandit {bandit_count}개, 압축 표기)
+{"=" * 70}
+{tool_text if tool_text else "정적 분석 도구 발견 없음"}"""
+            tool_instruction = f"""1. **정적 분석 도구가 발견한 {total_tool_count}개의 취약점은 보고서에 자동으로 포함됩니다**
+   - {report_target}에 다시 적지 말고, 도구가 놓친 취약점을 찾는 데 참고하세요"""
+        else:
+            tool_sections = f"""{"=" * 70}
+🔍 SEMGREP 정적 분석 결과 (OWASP Top 10 포함 - 모든 언어)
+{"=" * 70}
+{semgrep_text if semgrep_text else "Semgrep 분석 결과가 없습니다."}
+
+{"=" * 70}
+🔍 BANDIT 정적 분석 결과 (Python 특화)
+{"=" * 70}
+{bandit_text if bandit_text else "Python 파일이 없거나 Bandit 분석 결과가 없습니다."}"""
+            tool_instruction = f"""1. **정적 분석 도구가 발견한 {total_tool_count}개의 취약점을 반드시 {report_target}에 포함하세요**
+   - Semgrep 발견: {semgrep_count}개 → "source": "Semgrep"
+   - Bandit 발견: {bandit_count}개 → "source": "Bandit"
+   - 각 도구의 결과를 그대로 유지하면서 더 자세한 설명 추가"""
         
-        # 방법 2: Python Scripts 폴더에서 직접 찾기
-        if not semgrep_exe:
-            scripts_dir = os.path.join(os.path.dirname(sys.executable), 'Scripts')
-            possible_path = os.path.join(scripts_dir, 'semgrep.exe')
-            if os.path.exists(possible_path):
-                semgrep_exe = possible_path
+        return f"""당신은 경험이 풍부한 보안 전문가입니다. 다음 코드들을 철저히 분석하여 모든 보안 취약점을 찾아주세요.
+
+⚠️ **중요: 모든 응답은 반드시 {language}로 작성해주세요!**
+
+{tool_sections}
+
+{"=" * 70}
+📄 분석할 전체 코드베이스
+{"=" * 70}
+{code_text}
+
+{"=" * 70}
+⚠️ 중요 지시사항
+{"=" * 70}
+
+{tool_instruction}
+
+2. **추가로 다음 항목들을 철저히 분석하세요:**
+   
+   **프론트엔드 보안 (JavaScript, HTML 등):**
+   - XSS (innerHTML, eval 등)
+   - 클라이언트 측 비밀정보 저장
+   - 안전하지 않은 HTTP 사용
+   - CORS 문제
+   
+   **백엔드 보안 (Python, API 등):**
+   - SQL Injection (parameterized query 미사용)
+   - Command Injection (os.system, subprocess)
+   - 인증/권한 검증 누락
+   - Rate limiting 부재
+   - IDOR (Insecure Direct Object Reference)
+   - 민감한 에러 정보 노출
+   
+   **공통 보안:**
+   - 하드코딩된 비밀번호/API 키/토큰
+   - 약한 암호화 (MD5, SHA1, DES)
+   - 위험한 함수 (eval, exec, pickle)
+   - 파일 권한 문제
+   - JWT 검증 없음
+   - Debug mode 활성화
+
+3. **각 취약점마다:**
+   - 정확한 파일명과 라인 번호
+   - 실제 문제 코드 스니펫
+   - 구체적인 수정 방법
+   - "source": "LLM Analysis" 표시
+
+{response_format}"""
+    
+    def split_into_batches(self, code_files):
+        """
+        코드 파일들을 요청당 코드 토큰 한도에 맞게 배치로 분할
         
-        # 방법 3: Python 모듈로 실행 (fallback)
-        if not semgrep_exe:
-            print(f"  ℹ️ Semgrep 실행 파일을 찾지 못해 python -m semgrep 사용")
-            semgrep_cmd = [sys.executable, '-m', 'semgrep']
-        else:
-            print(f"  ✓ Semgrep 실행 파일: {semgrep_exe}")
-            semgrep_cmd = [semgrep_exe]
+        self.max_prompt_tokens가 None이면 모든 파일을 하나의 배치로 묶습니다.
         
-        try:
-            # UTF-8 인코딩 강제 설정 (Windows cp949 문제 해결)
-            env = os.environ.copy()
-            env['PYTHONUTF8'] = '1'
-            env['PYTHONIOENCODING'] = 'utf-8'
-            env['LANG'] = 'en_US.UTF-8'
+        Args:
+            code_files: 파일명과 코드 내용을 담은 딕셔너리
             
-            # 버전 확인
-            version_result = subprocess.run(
-                semgrep_cmd + ['--version'],
-                capture_output=True,
-                text=True,
-                timeout=10,
-                encoding='utf-8',
-                errors='ignore',
-                env=env
+        Returns:
+            배치 리스트 (각 배치는 파일 경로 리스트)
+        """
+        if not self.max_prompt_tokens:
+            return [list(code_files.keys())] if code_files else []
+        
+        # 유사 파일 클러스터는 대표 파일과 같은 배치에 들어가도록 한 단위로 묶음
+        units = {}
+        for file_path in self.order_by_import_graph(list(code_files)):
+            representative = self.duplicate_of.get(file_path)
+            units.setdefault(representative if representative in code_files else file_path, []).append(file_path)
+        
+        batches = []
+        current = []
+        current_tokens = 0
+        for representative, unit in units.items():
+            unit = sorted(unit, key=lambda p: p != representative)
+            unit_tokens = self.estimate_tokens(self.format_code_context({path: code_files[path] for path in unit}))
+            if current and current_tokens + unit_tokens > self.max_prompt_tokens:
+                batches.append(current)
+                current = []
+                current_tokens = 0
+            current.extend(unit)
+            current_tokens += unit_tokens
+        
+        if current:
+            batches.append(current)
+        
+        return batches
+    
+    def build_llm_requests(self, code_files, semgrep_results, bandit_results):
+        """
+        배치별 LLM 요청(프롬프트) 목록 생성
+        
+        Args:
+            code_files: 파일명과 코드 내용을 담은 딕셔너리
+            semgrep_results: Semgrep 분석 결과
+            bandit_results: Bandit 분석 결과
+            
+        Returns:
+            요청 딕셔너리 리스트 (custom_id, files, prompt, tool_count)
+        """
+        if self.llm_mode == 'triage':
+            tool_vulnerabilities = (self.convert_semgrep_to_vulnerabilities(semgrep_results)
+                                    + self.convert_bandit_to_vulnerabilities(bandit_results))
+            return self.build_triage_requests(code_files, tool_vulnerabilities)
+        
+        batches = self.split_into_batches(code_files)
+        requests = []
+        
+        for idx, batch in enumerate(batches, 1):
+            # 배치가 하나면 도구 결과를 그대로 사용 (경로 매칭 실패로 누락되는 일 방지)
+            if len(batches) == 1:
+                batch_semgrep = semgrep_results
+                batch_bandit = bandit_results
+            else:
+                batch_semgrep = self.filter_tool_results(semgrep_results, batch, 'path')
+                batch_bandit = self.filter_tool_results(bandit_results, batch, 'filename')
+            
+            semgrep_count = len(self.convert_semgrep_to_vulnerabilities(batch_semgrep))
+            bandit_count = len(self.convert_bandit_to_vulnerabilities(batch_bandit))
+            
+            code_text = self.format_code_context({path: code_files[path] for path in batch})
+            if self.code_index:
+                seed_calls = [name for path in batch for _, name in self.code_index['calls'].get(path, ())]
+                code_text += self.format_related_definitions(
+                    self.related_definitions(batch, seed_calls, exclude_files=batch), code_files)
+            request = {
+                'custom_id': f"batch-{idx:04d}",
+                'files': batch,
+                'tool_count': semgrep_count + bandit_count,
+            }
+            if self.compact_tool_findings or self.compact_response:
+                # 도구 발견은 다시 출력하지 않으므로 출력 추정에서 제외
+                tool_text = self.format_tool_findings_compact(batch_semgrep, batch_bandit, code_text)
+                request['prompt'] = self.build_analysis_prompt(code_text, "", "", semgrep_count, bandit_count, tool_text)
+                request['expected_output_tokens'] = (LLM_OUTPUT_ESTIMATE['base_tokens']
+                                                     + len(batch) * LLM_OUTPUT_ESTIMATE['tokens_per_file'])
+            else:
+                semgrep_text = self.format_semgrep_results_for_llm(batch_semgrep) if batch_semgrep else ""
+                bandit_text = self.format_bandit_results_for_llm(batch_bandit) if batch_bandit else ""
+                request['prompt'] = self.build_analysis_prompt(code_text, semgrep_text, bandit_text, semgrep_count, bandit_count)
+            requests.append(request)
+        
+        return requests
+    
+    def plan_llm_analysis(self, code_files, requests, spent_usd=0.0):
+        """
+        LLM 호출 전 토큰/요청 수/소요 시간/비용을 추정하는 사전 계획 생성
+        
+        Args:
+            code_files: 파일명과 코드 내용을 담은 딕셔너리
+            requests: build_llm_requests()가 만든 요청 리스트
+            spent_usd: 앞 단계에서 이미 사용한 것으로 보는 비용 (예산 판단에 합산)
+            
+        Returns:
+            계획 딕셔너리
+        """
+        system_tokens = self.estimate_tokens(self.system_prompt)
+        
+        file_estimates = [
+            {'path': path, 'input_tokens': self.estimate_tokens(self.format_code_context({path: content}))}
+            for path, content in code_files.items()
+        ]
+        
+        request_estimates = []
+        for request in requests:
+            input_tokens = system_tokens + self.estimate_tokens(request['prompt'])
+            tool = request.get('tool') or (self.report_tool() if self.structured_output else None)
+            if tool:
+                input_tokens += self.estimate_tokens(json.dumps(tool, ensure_ascii=False))
+            # 출력: 고정 오버헤드 + 도구 발견 재서술 + 파일당 추가 발견 여유분
+            output_tokens = request.get('expected_output_tokens') or (
+                LLM_OUTPUT_ESTIMATE['base_tokens']
+                + request['tool_count'] * LLM_OUTPUT_ESTIMATE['tokens_per_finding']
+                + len(request['files']) * LLM_OUTPUT_ESTIMATE['tokens_per_file']
             )
+            output_tokens = min(output_tokens, request.get('max_tokens', self.max_output_tokens))
+            seconds = (
+                LLM_LATENCY_PROFILE['overhead_seconds']
+                + input_tokens / LLM_LATENCY_PROFILE['input_tokens_per_second']
+                + output_tokens / LLM_LATENCY_PROFILE['output_tokens_per_second']
+            )
+            model = self.request_model(request)
+            pricing = MODEL_PRICING.get(model, MODEL_PRICING['default'])
+            request_estimates.append({
+                'custom_id': request['custom_id'],
+                'model': model,
+                'files': len(request['files']),
+                'input_tokens': input_tokens,
+                'output_tokens': output_tokens,
+                'seconds': seconds,
+                'cost_usd': (input_tokens * pricing['input'] + output_tokens * pricing['output']) / 1_000_000,
+            })
+        
+        # 동시 실행 슬롯에 긴 요청부터 배정하여 전체 소요 시간 추정
+        concurrency = max(1, self.llm_concurrency)
+        slots = [0.0] * concurrency
+        for estimate in sorted(request_estimates, key=lambda r: r['seconds'], reverse=True):
+            slots[slots.index(min(slots))] += estimate['seconds']
+        
+        total_input = sum(r['input_tokens'] for r in request_estimates)
+        total_output = sum(r['output_tokens'] for r in request_estimates)
+        cost = sum(r['cost_usd'] for r in request_estimates)
+        if self.use_message_batches:
+            cost *= MESSAGE_BATCHES_DISCOUNT
+        
+        return {
+            'model': ", ".join(sorted({r['model'] for r in request_estimates})) or self.model,
+            'files': file_estimates,
+            'requests': request_estimates,
+            'total_input_tokens': total_input,
+            'total_output_tokens': total_output,
+            'request_count': len(request_estimates),
+            'concurrency': concurrency,
+            'wall_time_seconds': max(slots) if request_estimates else 0.0,
+            'cost_usd': cost,
+            'message_batches': self.use_message_batches,
+            'budget_usd': self.budget_usd,
+            'spent_usd': spent_usd,
+            'over_budget': self.budget_usd is not None and spent_usd + cost > self.budget_usd,
+        }
+    
+    def print_llm_plan(self, plan):
+        """
+        LLM 사전 계획 출력
+        
+        Args:
+            plan: plan_llm_analysis()가 반환한 계획 딕셔너리
+        """
+        print("\n🧮 LLM 분석 사전 계획 (추정치)")
+        print(f"   - 모델: {plan['model']}")
+        print(f"   - 파일: {len(plan['files'])}개")
+        
+        largest = sorted(plan['files'], key=lambda f: f['input_tokens'], reverse=True)
+        for file_estimate in largest[:5]:
+            print(f"      · {Path(file_estimate['path']).name}: ~{file_estimate['input_tokens']:,} 토큰")
+        if len(largest) > 5:
+            print(f"      ... 외 {len(largest) - 5}개")
+        
+        print(f"   - 요청 수: {plan['request_count']}개 (동시 실행 {plan['concurrency']}개)")
+        for request in plan['requests'][:5]:
+            print(f"      · {request['custom_id']}: 파일 {request['files']}개, "
+                  f"입력 ~{request['input_tokens']:,} / 출력 ~{request['output_tokens']:,} 토큰")
+        if len(plan['requests']) > 5:
+            print(f"      ... 외 {len(plan['requests']) - 5}개")
+        
+        print(f"   - 입력 토큰: ~{plan['total_input_tokens']:,}")
+        print(f"   - 출력 토큰: ~{plan['total_output_tokens']:,}")
+        if plan['message_batches']:
+            print(f"   - 예상 소요 시간: Message Batches 처리 대기 (최대 24시간)")
+        else:
+            print(f"   - 예상 소요 시간: ~{plan['wall_time_seconds']:.0f}초")
+        print(f"   - 예상 비용: ~${plan['cost_usd']:.4f}")
+        if plan['budget_usd'] is not None:
+            status = "초과" if plan['over_budget'] else "이내"
+            spent = f", 앞 단계 ${plan['spent_usd']:.4f} 포함" if plan['spent_usd'] else ""
+            print(f"   - 예산: ${plan['budget_usd']:.4f} ({status}{spent})")
+    
+    def record_token_usage(self, request, estimated_input_tokens, usage):
+        """
+        추정 토큰 수와 실제 message.usage를 비교하여 추정 오차 기록
+        
+        Args:
+            request: 요청 딕셔너리 (custom_id, 모델 계층)
+            estimated_input_tokens: 사전 계획에서 추정한 입력 토큰 수
+            usage: API 응답의 usage 객체
+        """
+        if usage is None:
+            return
+        
+        custom_id = request['custom_id']
+        actual_input = getattr(usage, 'input_tokens', 0) or 0
+        actual_output = getattr(usage, 'output_tokens', 0) or 0
+        error = (estimated_input_tokens - actual_input) / actual_input if actual_input else 0.0
+        
+        record = {
+            'timestamp': datetime.now().isoformat(timespec='seconds'),
+            'model': self.request_model(request),
+            'custom_id': custom_id,
+            'estimated_input_tokens': estimated_input_tokens,
+            'actual_input_tokens': actual_input,
+            'actual_output_tokens': actual_output,
+            'input_error_ratio': round(error, 4),
+        }
+        self.token_usage_records.append(record)
+        
+        print(f"   📏 {custom_id}: 입력 토큰 추정 {estimated_input_tokens:,} / 실제 {actual_input:,} "
+              f"(오차 {error:+.1%}), 출력 {actual_output:,}")
+        
+        if self.token_usage_log_path:
+            try:
+                with open(self.token_usage_log_path, 'a', encoding='utf-8') as f:
+                    f.write(json.dumps(record, ensure_ascii=False) + "\n")
+            except OSError as e:
+                print(f"   ⚠ 토큰 사용량 로그 기록 실패: {e}")
+    
+    def get_source_lines(self, file_path, code_files):
+        """
+        파일의 소스 코드를 줄 단위로 반환 (읽어 둔 내용이 없으면 디스크에서 읽음)
+        
+        Args:
+            file_path: 파일 경로
+            code_files: 파일명과 코드 내용을 담은 딕셔너리
             
-            if version_result.returncode == 0:
-                # 버전 정보 출력 (경고 메시지 제외)
-                for line in version_result.stdout.split('\n'):
-                    if line and not line.startswith('Using') and not line.startswith('  '):
-                        print(f"  ✓ Semgrep 버전: {line.strip()}")
-                        break
+        Returns:
+            줄 리스트 (읽을 수 없으면 빈 리스트)
+        """
+        content = code_files.get(file_path)
+        if content is None:
+            wanted = os.path.normcase(os.path.abspath(file_path))
+            for path, text in code_files.items():
+                if os.path.normcase(os.path.abspath(path)) == wanted:
+                    content = text
+                    break
+        if content is None:
+            try:
+                with open(file_path, 'r', encoding='utf-8') as f:
+                    content = f.read()
+            except (OSError, UnicodeDecodeError):
+                return []
+        return content.splitlines()
+    
+    def build_triage_requests(self, code_files, tool_vulnerabilities):
+        """
+        고위험(Critical/High) 도구 발견만 모아 트리아지 요청 목록 생성
+        
+        심각도를 키로 하는 우선순위 큐에서 꺼낸 순서대로 triage_batch_size개씩 묶고,
+        각 발견에는 코드 스니펫과 앞뒤 triage_context_lines줄의 문맥을 붙입니다.
+        
+        Args:
+            code_files: 파일명과 코드 내용을 담은 딕셔너리
+            tool_vulnerabilities: 정적 분석 도구 취약점 리스트 (Semgrep + Bandit)
             
-            # Semgrep 실행
-            print(f"  ⏳ 분석 시작... (최대 10분 소요)")
+        Returns:
+            요청 딕셔너리 리스트 (finding_ids 포함)
+        """
+        severity_rank = {'Critical': 0, 'High': 1}
+        if self.load_baseline() is not None:
+            self.assign_baseline_fingerprints(tool_vulnerabilities)
+        queue = []
+        for idx, vuln in enumerate(tool_vulnerabilities):
+            rank = severity_rank.get(vuln.get('severity'))
+            # 억제되었거나 기준선에 있는 발견은 다시 검증하지 않음
+            if rank is not None and not self.is_known_finding(vuln, code_files):
+                heapq.heappush(queue, (rank, idx))
+        
+        line_cache = {}
+        entries = []
+        while queue:
+            _, idx = heapq.heappop(queue)
+            vuln = tool_vulnerabilities[idx]
+            file_path = vuln.get('file_path', '')
+            if file_path not in line_cache:
+                line_cache[file_path] = self.get_source_lines(file_path, code_files)
+            lines = line_cache[file_path]
             
-            # 규칙 선택 로직
-            script_dir = os.path.dirname(os.path.abspath(__file__))
-            downloaded_rules_dir = os.path.join(script_dir, 'semgrep-rules')
+            context = vuln.get('code_snippet', '')
+            line_no = vuln.get('line')
+            if lines and isinstance(line_no, int):
+                start = max(1, line_no - self.triage_context_lines)
+                end = min(len(lines), line_no + self.triage_context_lines)
+                context = "\n".join(
+                    f"{'>' if n == line_no else ' '}{n:5d} | {lines[n - 1]}" for n in range(start, end + 1)
+                )
+                if self.code_index and file_path in self.code_index['calls']:
+                    # 문맥 줄에서 호출하는 함수의 정의 (같은 파일 포함, 발견당 소량)
+                    seed_calls = [name for n, name in self.code_index['calls'][file_path] if start <= n <= end]
+                    related = self.related_definitions([file_path], seed_calls, skip_range=(file_path, start, end))
+                    context += self.format_related_definitions(
+                        related[:3], code_files, max_tokens=self.cross_file_max_tokens // self.triage_batch_size)
             
-            # 1순위: 다운로드된 규칙 (semgrep-rules 폴더)
-            if os.path.exists(downloaded_rules_dir):
-                print(f"  ✓ 다운로드된 Semgrep 규칙 사용")
-                
-                # 주요 보안 규칙 경로들
-                security_paths = [
-                    os.path.join(downloaded_rules_dir, 'python', 'django', 'security'),
-                    os.path.join(downloaded_rules_dir, 'python', 'flask', 'security'),
-                    os.path.join(downloaded_rules_dir, 'python', 'lang', 'security'),
-                    os.path.join(downloaded_rules_dir, 'javascript', 'express', 'security'),
-                    os.path.join(downloaded_rules_dir, 'javascript', 'react', 'security'),
-                    os.path.join(downloaded_rules_dir, 'javascript', 'lang', 'security'),
-                    os.path.join(downloaded_rules_dir, 'generic', 'secrets'),
-                    os.path.join(downloaded_rules_dir, 'generic', 'security'),
-                ]
-                
-                # 존재하는 경로만 추가
-                config_args = []
-                for path in security_paths:
-                    if os.path.exists(path):
-                        config_args.extend(['--config', path])
-                
-                if not config_args:
-                    # 폴더는 있지만 규칙이 없으면 전체 폴더 사용
-                    config_args = ['--config', downloaded_rules_dir]
-                
-                cmd = semgrep_cmd + config_args + [
-                    '--json',
-                    '--no-git-ignore',
-                    '--metrics', 'off',
-                    '--max-target-bytes', '5000000',
-                    '--timeout', '60',
-                    target_path
-                ]
-                
-            # 2순위: Semgrep 레지스트리 (p/...)
+            entries.append((f"F{idx}", "\n".join([
+                f"[F{idx}] {vuln.get('source')} {vuln.get('rule_id', '')} | {vuln.get('severity')} | {vuln.get('cwe_id') or 'CWE 없음'}",
+                f"위치: {vuln.get('location', 'N/A')}",
+                f"설명: {vuln.get('description', '').strip()[:300]}",
+                f"문맥:\n{context}",
+            ])))
+        
+        requests = []
+        for start in range(0, len(entries), self.triage_batch_size):
+            chunk = entries[start:start + self.triage_batch_size]
+            findings_text = "\n\n".join(text for _, text in chunk)
+            prompt = f"""다음은 정적 분석 도구(Semgrep, Bandit)가 보고한 고위험 발견 사항입니다.
+각 항목의 코드와 주변 문맥을 보고 실제로 악용 가능한 취약점(true_positive)인지 오탐(false_positive)인지 판정하세요.
+
+- 입력값이 신뢰할 수 없는 출처에서 오는지, 검증/이스케이프가 있는지, 테스트나 예제 코드인지 고려하세요.
+- 확신이 없으면 true_positive로 판정하세요.
+- 모든 id에 대해 {TRIAGE_VERDICT_TOOL['name']} 도구로 판정을 보고하고, reason은 한 문장의 {self.response_language}로 작성하세요.
+
+{findings_text}"""
+            requests.append({
+                'custom_id': f"triage-{start // self.triage_batch_size + 1:04d}",
+                'files': sorted({tool_vulnerabilities[int(fid[1:])].get('file_path', '') for fid, _ in chunk}),
+                'prompt': prompt,
+                'tool_count': len(chunk),
+                'finding_ids': [fid for fid, _ in chunk],
+                'tool': TRIAGE_VERDICT_TOOL,
+                'max_tokens': min(self.max_output_tokens, 200 + len(chunk) * 120),
+                'expected_output_tokens': 100 + len(chunk) * LLM_OUTPUT_ESTIMATE['tokens_per_verdict'],
+            })
+        
+        return requests
+    
+    def apply_triage_verdicts(self, results, tool_vulnerabilities, semgrep_count, bandit_count):
+        """
+        트리아지 판정을 도구 발견에 반영하여 결과 생성
+        
+        Args:
+            results: (custom_id, 도구 인자 딕셔너리) 튜플 리스트
+            tool_vulnerabilities: 정적 분석 도구 취약점 리스트 (build_triage_requests와 같은 순서)
+            semgrep_count: Semgrep 발견 수
+            bandit_count: Bandit 발견 수
+            
+        Returns:
+            결과 딕셔너리 (triage_drop_false_positives가 True면 오탐 제외)
+        """
+        verdicts = {}
+        for _, payload in results:
+            if not isinstance(payload, dict):
+                continue
+            for verdict in payload.get('verdicts', []):
+                if isinstance(verdict, dict) and verdict.get('id'):
+                    verdicts[verdict['id']] = verdict
+        
+        kept = []
+        true_positives = 0
+        false_positives = 0
+        unjudged = 0
+        for idx, vuln in enumerate(tool_vulnerabilities):
+            verdict = verdicts.get(f"F{idx}")
+            if verdict is None and vuln.get('severity') in ('Critical', 'High'):
+                unjudged += 1
+            if verdict:
+                vuln['triage_verdict'] = verdict.get('verdict', '')
+                vuln['triage_reason'] = verdict.get('reason', '')
+                if vuln['triage_verdict'] == 'false_positive':
+                    false_positives += 1
+                    if self.triage_drop_false_positives:
+                        continue
+                else:
+                    true_positives += 1
+            kept.append(vuln)
+        
+        print(f"   🧪 트리아지 판정: 실제 취약점 {true_positives}개, 오탐 {false_positives}개, 판정 누락 {unjudged}개")
+        
+        result = self.create_tools_only_result(
+            kept,
+            sum(1 for v in kept if v.get('source') == 'Semgrep'),
+            sum(1 for v in kept if v.get('source') == 'Bandit'),
+        )
+        dropped = " (오탐은 보고서에서 제외)" if self.triage_drop_false_positives else ""
+        result['overall_assessment'] = (
+            f"LLM 트리아지 완료 (Semgrep: {semgrep_count}개, Bandit: {bandit_count}개) - "
+            f"고위험 발견 중 실제 취약점 {true_positives}개, 오탐 {false_positives}개{dropped}"
+        )
+        return result
+    
+    def build_screening_requests(self, code_files):
+        """
+        빠른 모델의 1차 선별(스크리닝) 요청 목록 생성
+        
+        Args:
+            code_files: 파일명과 코드 내용을 담은 딕셔너리
+            
+        Returns:
+            요청 딕셔너리 리스트 (배치별 코드만 포함, 도구 결과 제외)
+        """
+        requests = []
+        for idx, batch in enumerate(self.split_into_batches(code_files), 1):
+            code_text = self.format_code_context({path: code_files[path] for path in batch})
+            prompt = f"""다음 코드들을 빠르게 훑어보고 파일별 보안 위험도를 평가하세요.
+
+- 각 파일마다 risk_score(0.0~1.0)를 매기세요. 외부 입력 처리, 인증/권한, 쿼리/명령 실행, 파일 접근, 암호화, 비밀정보가 있으면 높게 평가하세요.
+- 확실한 취약점이 보이면 vulnerabilities에 간단히 보고하세요 ("source": "LLM Analysis").
+- 모든 텍스트는 {self.response_language}로, {RISK_SCREENING_TOOL['name']} 도구로 보고하세요.
+
+{code_text}"""
+            requests.append({
+                'custom_id': f"screen-{idx:04d}",
+                'files': batch,
+                'prompt': prompt,
+                'tool_count': 0,
+                'tool': RISK_SCREENING_TOOL,
+                'model': self.screening_model,
+                'tier': 'screen',
+                'max_tokens': self.screening_max_output_tokens,
+                'expected_output_tokens': LLM_OUTPUT_ESTIMATE['base_tokens'] + len(batch) * LLM_OUTPUT_ESTIMATE['tokens_per_file'],
+            })
+        return requests
+    
+    def run_tiered_analysis(self, code_files, semgrep_results, bandit_results, tool_vulnerabilities):
+        """
+        모델 계층화 분석: 빠른 모델로 모든 배치를 선별한 뒤 위험 파일만 큰 모델로 재분석
+        
+        위험도가 escalation_threshold 이상이거나, 도구 발견이 있거나, 점수를 받지 못한 파일은
+        큰 모델(self.model)로 재분석합니다. 재분석하지 않은 파일은 빠른 모델의 발견을 그대로 사용합니다.
+        
+        Args:
+            code_files: 파일명과 코드 내용을 담은 딕셔너리
+            semgrep_results: Semgrep 분석 결과
+            bandit_results: Bandit 분석 결과
+            tool_vulnerabilities: 정적 분석 도구 취약점 리스트
+            
+        Returns:
+            (custom_id, 결과) 튜플 리스트 (첫 단계가 예산 초과면 None)
+        """
+        self.tier_metrics = {}
+        display_to_path = {self.display_path(path): path for path in code_files}
+        
+        print(f"   🔍 1단계: {self.screening_model}로 전체 {len(code_files)}개 파일 선별")
+        screen_results, screen_plan = self.execute_llm_requests(code_files, self.build_screening_requests(code_files))
+        if screen_results is None:
+            return None
+        
+        risk_scores = {}
+        screen_vulnerabilities = []
+        for _, payload in screen_results:
+            if not isinstance(payload, dict):
+                continue
+            for risk in payload.get('file_risks', []):
+                path = display_to_path.get(risk.get('file', ''))
+                if path is not None:
+                    try:
+                        risk_scores[path] = float(risk.get('risk_score', 1.0))
+                    except (TypeError, ValueError):
+                        risk_scores[path] = 1.0
+            screen_vulnerabilities.extend(v for v in payload.get('vulnerabilities', []) if isinstance(v, dict))
+        
+        tool_files = {os.path.normcase(os.path.abspath(v.get('file_path', ''))) for v in tool_vulnerabilities if v.get('file_path')}
+        escalated = {
+            path: content for path, content in code_files.items()
+            if risk_scores.get(path, 1.0) >= self.escalation_threshold
+            or os.path.normcase(os.path.abspath(path)) in tool_files
+        }
+        
+        kept_screen = self.screen_findings_to_keep(screen_vulnerabilities, code_files, escalated)
+        
+        results = [('screen-findings', {'vulnerabilities': kept_screen, 'overall_assessment': ''})]
+        
+        print(f"\n   🔍 2단계: 위험 파일 {len(escalated)}/{len(code_files)}개를 {self.model}로 재분석 "
+              f"(임계값 {self.escalation_threshold}, 도구 발견 파일 포함)")
+        if escalated:
+            deep_requests = self.build_llm_requests(escalated, semgrep_results, bandit_results)
+            for request in deep_requests:
+                request['tier'] = 'deep'
+            deep_results, _ = self.execute_llm_requests(escalated, deep_requests, spent_usd=screen_plan['cost_usd'])
+            if deep_results is None:
+                print("   ⚠ 재분석 단계가 예산을 초과하여 1단계 결과만 사용합니다.")
             else:
-                print(f"  ℹ️ Semgrep 레지스트리 규칙 사용")
-                print(f"  💡 더 많은 규칙을 사용하려면: python download_semgrep_rules.py")
-                
-                cmd = semgrep_cmd + [
-                    '--config', 'p/owasp-top-ten',
-                    '--config', 'p/security-audit',
-                    '--config', 'p/python',
-                    '--json',
-                    '--no-git-ignore',
-                    '--metrics', 'off',
-                    '--verbose',
-                    '--max-target-bytes', '5000000',
-                    '--timeout', '60',
-                    target_path
-                ]
+                results.extend(deep_results)
+        
+        self.print_tier_metrics()
+        return results
+    
+    def screen_findings_to_keep(self, screen_vulnerabilities, code_files, escalated):
+        """
+        재분석하지 않는 파일의 빠른 모델 발견만 남김
+        
+        위치는 다른 병합 단계처럼 전체 경로, 표시 경로, 파일명 어느 형태로 보고되어도 실제 파일로 해석한 뒤 비교합니다.
+        
+        Args:
+            screen_vulnerabilities: 1단계(빠른 모델) 발견 리스트
+            code_files: 파일명과 코드 내용을 담은 딕셔너리
+            escalated: 2단계에서 재분석하는 파일 딕셔너리
             
-            # env는 이미 위에서 정의됨 (UTF-8 설정 포함)
-            result = subprocess.run(
-                cmd,
-                capture_output=True,  # stdout, stderr 자동 캡처
-                text=True,
-                timeout=600,  # 10분 타임아웃
-                encoding='utf-8',
-                errors='ignore',  # 인코딩 에러 무시
-                env=env  # UTF-8 환경 변수 전달
-            )
+        Returns:
+            유지할 발견 리스트 (model 필드에 빠른 모델 이름 기록)
+        """
+        index = self.new_finding_index()
+        escalated_paths = {index.normalize_path({'file_path': path}) for path in escalated}
+        kept = []
+        for vuln in screen_vulnerabilities:
+            path, _ = self.split_location(vuln.get('location'), code_files)
+            if index.normalize_path({'file_path': path} if path else vuln) in escalated_paths:
+                continue
+            vuln['model'] = self.screening_model
+            kept.append(vuln)
+        return kept
+    
+    def request_model(self, request):
+        """
+        요청에 쓰는 모델 이름 (요청에 지정된 모델, 없으면 계층에 따라 선별 모델 또는 기본 모델)
+        """
+        if request.get('model'):
+            return request['model']
+        return self.screening_model if request.get('tier') == 'screen' else self.model
+    
+    def record_tier_metrics(self, request, usage, seconds):
+        """
+        모델 계층(tier)별 토큰 사용량과 지연 시간 누적
+        
+        Args:
+            request: 요청 딕셔너리
+            usage: API 응답의 usage 객체
+            seconds: 요청 지연 시간 (Message Batches면 None)
+        """
+        tier = request.get('tier', 'default')
+        with self._metrics_lock:
+            metrics = self.tier_metrics.setdefault(tier, {
+                'model': self.request_model(request),
+                'requests': 0, 'input_tokens': 0, 'output_tokens': 0, 'latencies': [],
+            })
+            metrics['requests'] += 1
+            if usage is not None:
+                metrics['input_tokens'] += getattr(usage, 'input_tokens', 0) or 0
+                metrics['output_tokens'] += getattr(usage, 'output_tokens', 0) or 0
+            if seconds is not None:
+                metrics['latencies'].append(seconds)
+    
+    def print_tier_metrics(self):
+        """
+        모델 계층별 토큰/지연 시간 지표 출력
+        """
+        if not self.tier_metrics:
+            return
+        print("\n   📈 모델 계층별 지표:")
+        for tier, metrics in self.tier_metrics.items():
+            latencies = sorted(metrics['latencies'])
+            latency = ""
+            if latencies:
+                p50 = latencies[len(latencies) // 2]
+                latency = f", 지연 평균 {sum(latencies) / len(latencies):.1f}초 / 중앙값 {p50:.1f}초"
+            print(f"      - {tier} ({metrics['model']}): 요청 {metrics['requests']}개, "
+                  f"입력 {metrics['input_tokens']:,} / 출력 {metrics['output_tokens']:,} 토큰{latency}")
+    
+    def build_map_requests(self, code_files, semgrep_results, bandit_results):
+        """
+        맵-리듀스 분석의 맵 단계 요청 목록 생성
+        
+        파일을 디렉토리(모듈) 단위로 묶고, map_chunk_chars보다 큰 파일은 잘라내지 않고
+        라인 범위별 조각으로 나눈 뒤, 모듈 안에서 map_tokens_per_request에 맞게 요청으로 묶습니다.
+        
+        Args:
+            code_files: 파일명과 코드 내용을 담은 딕셔너리
+            semgrep_results: Semgrep 분석 결과
+            bandit_results: Bandit 분석 결과
             
-            # stderr 출력 확인 (디버그용)
-            if result.stderr:
-                stderr_lines = result.stderr.strip().split('\n')
-                for line in stderr_lines[:5]:  # 처음 5줄만 출력
-                    if line and not line.startswith('Scanning'):
-                        print(f"  ℹ️ {line}")
+        Returns:
+            요청 딕셔너리 리스트 (module 포함)
+        """
+        paths = list(code_files)
+        root = os.path.commonpath([os.path.abspath(p) for p in paths]) if paths else ''
+        if len(paths) == 1:
+            root = os.path.dirname(os.path.abspath(paths[0]))
+        
+        modules = {}
+        for path in paths:
+            module = os.path.relpath(os.path.dirname(os.path.abspath(path)), root)
+            modules.setdefault(module, []).append(path)
+        
+        requests = []
+        for module in sorted(modules):
+            # (파일 경로, 조각 텍스트, 토큰 수) 목록
+            pieces = []
+            for path in modules[module]:
+                lines = code_files[path].splitlines()
+                chunk = []
+                chunk_chars = 0
+                chunk_start = 1
+                for line_no, line in enumerate(lines, 1):
+                    if chunk and chunk_chars + len(line) + 1 > self.map_chunk_chars:
+                        pieces.append((path, chunk_start, line_no - 1, len(lines), "\n".join(chunk)))
+                        chunk, chunk_chars, chunk_start = [], 0, line_no
+                    chunk.append(line)
+                    chunk_chars += len(line) + 1
+                pieces.append((path, chunk_start, len(lines), len(lines), "\n".join(chunk)))
             
-            # Semgrep은 발견이 있으면 exit code 1을 반환
-            # returncode 0 또는 1은 정상 (2 이상이 실제 오류)
-            if result.returncode >= 2:
-                print(f"  ✗ Semgrep 실행 실패 (Return Code: {result.returncode})")
-                print(f"  ℹ️ Stderr: {result.stderr}")
-                return None
+            groups = []
+            current, current_tokens = [], 0
+            for piece in pieces:
+                piece_text = self.format_code_piece(*piece)
+                piece_tokens = self.estimate_tokens(piece_text)
+                if current and current_tokens + piece_tokens > self.map_tokens_per_request:
+                    groups.append(current)
+                    current, current_tokens = [], 0
+                current.append((piece[0], piece_text))
+                current_tokens += piece_tokens
+            if current:
+                groups.append(current)
             
-            # JSON 파싱
-            if not result.stdout or not result.stdout.strip():
-                print(f"  ⚠ Semgrep 출력이 비어있습니다.")
-                print(f"  ℹ️ Stderr 전체: {result.stderr}")
-                return None
+            for group in groups:
+                files = sorted({path for path, _ in group})
+                batch_semgrep = self.filter_tool_results(semgrep_results, files, 'path')
+                batch_bandit = self.filter_tool_results(bandit_results, files, 'filename')
+                code_text = "\n".join(text for _, text in group)
+                if self.code_index:
+                    seed_calls = [name for path in files for _, name in self.code_index['calls'].get(path, ())]
+                    code_text += self.format_related_definitions(
+                        self.related_definitions(files, seed_calls, exclude_files=files), code_files)
+                if self.compact_tool_findings:
+                    tool_text = self.format_tool_findings_compact(batch_semgrep, batch_bandit, code_text)
+                else:
+                    tool_text = "\n".join(text for text in (
+                        self.format_semgrep_results_for_llm(batch_semgrep) if batch_semgrep and batch_semgrep.get('results') else "",
+                        self.format_bandit_results_for_llm(batch_bandit) if batch_bandit and batch_bandit.get('results') else "",
+                    ) if text)
+                tool_text = tool_text or "정적 분석 도구 발견 없음"
+                
+                prompt = f"""당신은 경험이 풍부한 보안 전문가입니다. 다음은 프로젝트의 '{module}' 모듈 코드입니다.
+
+1. 이 코드에서 보안 취약점을 찾아 보고하세요 ("source": "LLM Analysis", 위치는 "파일명:라인번호").
+   - 아래 정적 분석 도구 발견은 참고용입니다. 이미 보고된 항목은 반복하지 말고 추가 취약점만 보고하세요.
+2. 다른 모듈과 함께 분석할 수 있도록 모듈 보안 요약을 작성하세요 (항목당 한 줄, 간결하게):
+   - entry_points: 외부 입력을 받는 진입점 (라우트, CLI, 핸들러 등)
+   - trust_boundaries: 신뢰 경계 (인증/권한 검사, 입력 검증, 외부 시스템 호출)
+   - secrets_handling: 비밀정보(키, 비밀번호, 토큰) 처리 방식
+   - data_flows: 다른 모듈로 넘기거나 받는 데이터와 함수
+3. 모든 텍스트는 {self.response_language}로, {MAP_ANALYSIS_TOOL['name']} 도구로 보고하세요.
+
+{"=" * 70}
+🔍 정적 분석 도구 발견
+{"=" * 70}
+{tool_text}
+
+{"=" * 70}
+📄 '{module}' 모듈 코드
+{"=" * 70}
+{code_text}"""
+                requests.append({
+                    'custom_id': f"map-{len(requests) + 1:04d}",
+                    'module': module,
+                    'files': files,
+                    'prompt': prompt,
+                    'tool_count': 0,
+                    'tool': MAP_ANALYSIS_TOOL,
+                    'expected_output_tokens': LLM_OUTPUT_ESTIMATE['base_tokens'] + len(files) * LLM_OUTPUT_ESTIMATE['tokens_per_file'],
+                })
+        
+        return requests
+    
+    def format_code_piece(self, file_path, start_line, end_line, total_lines, content):
+        """
+        맵 단계 프롬프트용 코드 조각 포맷 (파일이 나뉜 경우 라인 범위 표시)
+        
+        Args:
+            file_path: 파일 경로
+            start_line: 조각 시작 라인
+            end_line: 조각 끝 라인
+            total_lines: 파일 전체 라인 수
+            content: 조각 내용
             
-            try:
-                semgrep_data = json.loads(result.stdout)
-            except json.JSONDecodeError as e:
-                print(f"  ✗ JSON 파싱 실패: {e}")
-                print(f"  ℹ️ 출력 미리보기: {result.stdout[:200]}")
-                return None
+        Returns:
+            프롬프트용 텍스트
+        """
+        rel_path = self.display_path(file_path)
+        if start_line == 1 and end_line >= total_lines:
+            return f"\n## 파일: {rel_path}\n```\n{content}\n```"
+        return f"\n## 파일: {rel_path} (라인 {start_line}-{end_line}, 첫 줄이 {start_line}번째 라인)\n```\n{content}\n```"
+    
+    def format_module_summaries(self, summaries):
+        """
+        모듈 보안 요약들을 리듀스 프롬프트용 간결한 텍스트로 변환
+        
+        Args:
+            summaries: (모듈명, 요약 딕셔너리) 튜플 리스트
             
-            # 통계 출력
-            results = semgrep_data.get('results', [])
-            errors = semgrep_data.get('errors', [])
-            paths = semgrep_data.get('paths', {})
+        Returns:
+            요약 텍스트
+        """
+        labels = [
+            ('entry_points', '진입점'),
+            ('trust_boundaries', '신뢰 경계'),
+            ('secrets_handling', '비밀정보'),
+            ('data_flows', '데이터 흐름'),
+        ]
+        lines = []
+        for module, summary in summaries:
+            lines.append(f"### {module}")
+            for key, label in labels:
+                items = summary.get(key) or []
+                if isinstance(items, str):
+                    items = [items]
+                if items:
+                    lines.append(f"- {label}: " + " / ".join(str(item) for item in items))
+            if summary.get('findings'):
+                lines.append(f"- 발견된 취약점: {summary['findings']}")
+        return "\n".join(lines)
+    
+    def build_reduce_request(self, summaries, custom_id, final):
+        """
+        리듀스 단계 요청 생성 (모듈 요약만 전송)
+        
+        Args:
+            summaries: (모듈명, 요약 딕셔너리) 튜플 리스트
+            custom_id: 요청 ID
+            final: 마지막 리듀스면 True (종합 평가 작성), 중간 단계면 False (요약 병합)
             
-            # 스캔된 파일 정보
-            scanned_files = paths.get('scanned', []) if paths else []
-            skipped_files = paths.get('skipped', []) if paths else []
+        Returns:
+            요청 딕셔너리
+        """
+        summary_text = self.format_module_summaries(summaries)
+        task = ("프로젝트 전체에 대한 overall_assessment(종합 평가)를 작성하세요."
+                if final else
+                "이 모듈들을 합친 상위 모듈 요약을 combined_summary에 작성하세요 (항목당 한 줄, 간결하게).")
+        prompt = f"""당신은 경험이 풍부한 보안 전문가입니다. 다음은 프로젝트 각 모듈의 보안 요약입니다.
+
+1. 모듈 사이의 상호작용에서만 드러나는 취약점(cross-module)을 찾아 보고하세요.
+   예: 한 모듈의 진입점에서 받은 입력이 검증 없이 다른 모듈의 쿼리/명령/파일 접근으로 전달, 인증 경계 우회, 비밀정보 전파
+   ("source": "LLM Analysis", 위치는 관련 파일명:라인번호를 알 수 있으면 사용하고, 아니면 모듈명)
+2. {task}
+3. 모든 텍스트는 {self.response_language}로, {REDUCE_ANALYSIS_TOOL['name']} 도구로 보고하세요.
+
+{summary_text}"""
+        return {
+            'custom_id': custom_id,
+            'files': [],
+            'prompt': prompt,
+            'tool_count': 0,
+            'tool': REDUCE_ANALYSIS_TOOL,
+            'expected_output_tokens': LLM_OUTPUT_ESTIMATE['base_tokens'] * 2,
+        }
+    
+    def run_mapreduce_analysis(self, code_files, semgrep_results, bandit_results):
+        """
+        맵-리듀스 계층 분석
+        
+        맵: 모듈(디렉토리)별로 독립적으로 동시에 분석하여 취약점과 모듈 보안 요약 생성
+        리듀스: 요약만 모아 모듈 간 취약점과 종합 평가 생성. 요약이 reduce_token_limit을 넘으면
+        여러 묶음으로 나눠 중간 요약을 만든 뒤 다시 리듀스하므로 비용이 프로젝트 크기에 선형으로 증가합니다.
+        
+        Args:
+            code_files: 파일명과 코드 내용을 담은 딕셔너리
+            semgrep_results: Semgrep 분석 결과
+            bandit_results: Bandit 분석 결과
             
-            print(f"  📁 스캔 정보:")
-            print(f"    - 스캔된 파일: {len(scanned_files)}개")
-            if skipped_files:
-                print(f"    - 건너뛴 파일: {len(skipped_files)}개")
+        Returns:
+            (custom_id, 결과) 튜플 리스트 (맵 단계가 예산 초과면 None)
+        """
+        map_requests = self.build_map_requests(code_files, semgrep_results, bandit_results)
+        print(f"   🗺️ 맵 단계: 모듈 {len({r['module'] for r in map_requests})}개, 요청 {len(map_requests)}개")
+        map_results, map_plan = self.execute_llm_requests(code_files, map_requests)
+        if map_results is None:
+            return None
+        spent = map_plan['cost_usd']
+        
+        modules_by_id = {r['custom_id']: r['module'] for r in map_requests}
+        merged_summaries = {}
+        results = []
+        for custom_id, payload in map_results:
+            if not isinstance(payload, dict):
+                continue
+            vulnerabilities = [v for v in payload.get('vulnerabilities', []) if isinstance(v, dict)]
+            results.append((custom_id, {'vulnerabilities': vulnerabilities}))
             
-            # 심각도별 통계
-            severity_count = {
-                'ERROR': 0,
-                'WARNING': 0,
-                'INFO': 0
-            }
+            # 한 모듈이 여러 요청으로 나뉘었으면 요약을 합침
+            module = modules_by_id.get(custom_id, custom_id)
+            summary = merged_summaries.setdefault(module, {'findings': 0})
+            for key, items in (payload.get('module_summary') or {}).items():
+                if isinstance(items, list):
+                    summary.setdefault(key, []).extend(items)
+            summary['findings'] += len(vulnerabilities)
+        
+        summaries = sorted(merged_summaries.items())
+        level = 1
+        while summaries:
+            groups, current, current_tokens = [], [], 0
+            for item in summaries:
+                item_tokens = self.estimate_tokens(self.format_module_summaries([item]))
+                if current and current_tokens + item_tokens > self.reduce_token_limit:
+                    groups.append(current)
+                    current, current_tokens = [], 0
+                current.append(item)
+                current_tokens += item_tokens
+            groups.append(current)
             
-            for finding in results:
-                severity = finding.get('extra', {}).get('severity', 'INFO').upper()
-                if severity in severity_count:
-                    severity_count[severity] += 1
+            # 한 묶음에 모두 들어가거나 묶어도 요약 수가 줄지 않으면 최종 리듀스
+            final = len(groups) == 1 or len(groups) == len(summaries)
+            if final:
+                groups = [summaries]
             
-            print(f"  ✓ Semgrep 분석 완료")
-            print(f"    - 발견된 이슈: {len(results)}개")
-            print(f"    - ERROR: {severity_count['ERROR']}개")
-            print(f"    - WARNING: {severity_count['WARNING']}개")
-            print(f"    - INFO: {severity_count['INFO']}개")
+            reduce_requests = [
+                self.build_reduce_request(group, f"reduce-{level}-{idx:04d}", final)
+                for idx, group in enumerate(groups, 1)
+            ]
+            print(f"\n   🧩 리듀스 단계 {level}: 요약 {len(summaries)}개 → 요청 {len(reduce_requests)}개"
+                  f"{' (최종)' if final else ''}")
+            reduce_results, reduce_plan = self.execute_llm_requests({}, reduce_requests, spent_usd=spent)
+            if reduce_results is None:
+                print("   ⚠ 리듀스 단계가 예산을 초과하여 맵 단계 결과만 사용합니다.")
+                break
+            spent += reduce_plan['cost_usd']
             
-            if errors:
-                print(f"    - 분석 오류: {len(errors)}개")
-                for err in errors[:3]:  # 처음 3개만 표시
-                    print(f"      ⚠ {err.get('message', 'Unknown error')}")
+            next_summaries = []
+            groups_by_id = {r['custom_id']: group for r, group in zip(reduce_requests, groups)}
+            for custom_id, payload in reduce_results:
+                if not isinstance(payload, dict):
+                    continue
+                cross = [v for v in payload.get('vulnerabilities', []) if isinstance(v, dict)]
+                entry = {'vulnerabilities': cross}
+                if final:
+                    entry['overall_assessment'] = payload.get('overall_assessment', '')
+                results.append((custom_id, entry))
+                if not final:
+                    combined = dict(payload.get('combined_summary') or {})
+                    modules = [module for module, _ in groups_by_id[custom_id]]
+                    combined['findings'] = sum(s.get('findings', 0) for _, s in groups_by_id[custom_id]) + len(cross)
+                    next_summaries.append((", ".join(modules), combined))
             
-            self.semgrep_results = semgrep_data
-            return semgrep_data
+            if final or not next_summaries:
+                break
+            summaries = next_summaries
+            level += 1
+        
+        return results
+    
+    def analyze_security_with_tools(self, code_files, semgrep_results, bandit_results):
+        """
+        Semgrep + Bandit 결과를 포함하여 LLM으로 보안 분석
+        
+        Args:
+            code_files: 파일명과 코드 내용을 담은 딕셔너리
+            semgrep_results: Semgrep 분석 결과
+            bandit_results: Bandit 분석 결과
             
-        except subprocess.TimeoutExpired as e:
-            print(f"  ✗ Semgrep 실행 타임아웃 (10분 초과)")
-            print(f"  💡 분석 대상이 너무 큽니다. 작은 폴더로 시도하거나 Semgrep을 건너뛰세요.")
-            return None
-        except FileNotFoundError as e:
-            print(f"  ✗ Semgrep을 찾을 수 없습니다: {e}")
-            print(f"  💡 설치 방법: pip install semgrep")
-            return None
-        except json.JSONDecodeError as e:
-            print(f"  ✗ Semgrep 결과 파싱 실패: {e}")
-            return None
-        except PermissionError as e:
-            print(f"  ✗ 권한 오류: {e}")
-            print(f"  💡 관리자 권한으로 실행하거나 다른 폴더를 시도하세요.")
+        Returns:
+            분석 결과 딕셔너리 (실패 시 None)
+        """
+        # Semgrep 결과를 취약점으로 변환
+        semgrep_vulnerabilities = self.convert_semgrep_to_vulnerabilities(semgrep_results)
+        
+        # Bandit 결과를 취약점으로 변환
+        bandit_vulnerabilities = self.convert_bandit_to_vulnerabilities(bandit_results)
+        
+        # 두 도구의 취약점을 합침
+        all_tool_vulnerabilities = semgrep_vulnerabilities + bandit_vulnerabilities
+        
+        # 도구별 취약점 개수
+        semgrep_count = len(semgrep_vulnerabilities)
+        bandit_count = len(bandit_vulnerabilities)
+        
+        self.known_paths = list(code_files)
+        
+        print("\n🤖 Claude API를 통한 보안 분석 시작...")
+        print(f"   📊 정적 분석 도구 발견:")
+        print(f"      - Semgrep: {semgrep_count}개")
+        print(f"      - Bandit: {bandit_count}개")
+        
+        if self.cross_file_context:
+            self.build_code_index(code_files)
+        if self.llm_mode == 'full':
+            self.prepare_prompt_sources(code_files)
+        
+        if self.llm_mode == 'mapreduce':
+            results = self.run_mapreduce_analysis(code_files, semgrep_results, bandit_results)
+        elif self.tiered_routing and self.llm_mode == 'full':
+            results = self.run_tiered_analysis(code_files, semgrep_results, bandit_results, all_tool_vulnerabilities)
+        else:
+            # 배치별 프롬프트 생성, 사전 계획 후 실행
+            requests = self.build_llm_requests(code_files, semgrep_results, bandit_results)
+            if self.llm_mode == 'triage':
+                print(f"   🧪 고위험 발견 {sum(r['tool_count'] for r in requests)}개 트리아지")
+            else:
+                print(f"   🔍 LLM 추가 취약점 탐지")
+            results, _ = self.execute_llm_requests(code_files, requests)
+        
+        if results is None:
+            if all_tool_vulnerabilities:
+                return self.create_tools_only_result(
+                    all_tool_vulnerabilities, semgrep_count, bandit_count,
+                    reason='LLM 분석 생략 (예산 초과)'
+                )
             return None
-        except Exception as e:
-            print(f"  ✗ Semgrep 분석 중 예상치 못한 오류: {type(e).__name__}: {e}")
-            print(f"  💡 상세 정보:")
-            import traceback
-            traceback.print_exc()
+        
+        if not results:
+            # 오류 발생 시에도 도구 결과는 반환
+            if all_tool_vulnerabilities:
+                return self.create_tools_only_result(all_tool_vulnerabilities, semgrep_count, bandit_count)
             return None
+        
+        print("✓ LLM 분석 완료")
+        
+        if self.llm_mode == 'triage':
+            return self.apply_triage_verdicts(results, all_tool_vulnerabilities, semgrep_count, bandit_count)
+        
+        llm_result = self.combine_llm_responses(results)
+        if self.compact_response and self.structured_output:
+            self.finalize_compact_findings(llm_result.get('vulnerabilities', []), code_files)
+        self.record_output_token_stats(llm_result.get('vulnerabilities', []))
+        if self.duplicate_of:
+            vulnerabilities = llm_result.get('vulnerabilities', [])
+            llm_result['vulnerabilities'] = vulnerabilities + self.project_duplicate_findings(vulnerabilities, code_files)
+        
+        # LLM 응답에 도구 취약점이 누락되었을 경우를 대비해 병합
+        return self.merge_tools_and_llm_results(llm_result, all_tool_vulnerabilities)
+    
+    def execute_llm_requests(self, code_files, requests, spent_usd=0.0):
+        """
+        요청 목록의 사전 계획을 출력하고, 예산 이내면 실행
+        
+        Args:
+            code_files: 파일명과 코드 내용을 담은 딕셔너리
+            requests: 요청 딕셔너리 리스트
+            spent_usd: 앞 단계에서 이미 사용한 것으로 보는 비용
+            
+        Returns:
+            (결과 튜플 리스트, 계획 딕셔너리) - 예산 초과로 실행하지 않으면 결과는 None
+        """
+        plan = self.plan_llm_analysis(code_files, requests, spent_usd)
+        self.print_llm_plan(plan)
+        
+        if plan['over_budget']:
+            print(f"\n⛔ 예상 비용 ${plan['spent_usd'] + plan['cost_usd']:.4f}이 예산 ${plan['budget_usd']:.4f}을 초과하여 LLM 분석을 중단합니다.")
+            return None, plan
+        
+        estimated_inputs = {r['custom_id']: r['input_tokens'] for r in plan['requests']}
+        
+        self.scheduler = LLMRequestScheduler(self.llm_concurrency, self.max_llm_concurrency, self.llm_max_retries)
+        if self.use_message_batches:
+            results = self.run_message_batch(requests, estimated_inputs)
+        else:
+            results = self.run_llm_requests(requests, estimated_inputs)
+        self.scheduler.print_stats()
+        
+        return results, plan
+    
+    def call_llm(self, **params):
+        """
+        스케줄러(동시성 제어, 재시도, 서킷 브레이커)를 거쳐 Messages API 호출
+        
+        Args:
+            **params: messages.create()에 전달할 파라미터
+            
+        Returns:
+            Messages API 응답
+        """
+        return self.scheduler.call(lambda: self.backend.create_message(**params))
+    
+    def build_message_params(self, request):
+        """
+        요청 딕셔너리를 Messages API 파라미터로 변환 (동기 호출과 Batches 공용)
+        
+        Args:
+            request: build_llm_requests()가 만든 요청 딕셔너리
+            
+        Returns:
+            messages.create()에 전달할 파라미터 딕셔너리
+        """
+        params = {
+            'model': self.request_model(request),
+            'max_tokens': request.get('max_tokens', self.max_output_tokens),
+            'system': request.get('system', self.system_prompt),
+            'messages': [
+                {"role": "user", "content": request['prompt']}
+            ],
+        }
+        # 요청별 도구가 없으면 기본 분석 도구 사용
+        tool = request.get('tool')
+        if tool is None and self.structured_output:
+            tool = self.report_tool()
+        if tool:
+            # 도구 사용을 강제하여 결과를 스키마에 맞는 인자로 받음
+            params['tools'] = [tool]
+            params['tool_choice'] = {"type": "tool", "name": tool['name']}
+        return params
+    
+    def report_tool(self):
+        """
+        기본 분석 요청에 사용할 보고 도구 (압축 응답 모드면 report_findings_compact)
+        
+        Returns:
+            도구 정의 딕셔너리
+        """
+        return COMPACT_REPORT_TOOL if self.compact_response else VULNERABILITY_REPORT_TOOL
     
-    def run_bandit_analysis(self, target_path):
+    def extract_tool_input(self, message, tool_name=VULNERABILITY_REPORT_TOOL['name']):
         """
-        Bandit을 사용하여 Python 코드 분석
+        응답 메시지에서 도구 인자 추출
         
         Args:
-            target_path: 분석할 디렉토리 또는 파일 경로
+            message: Messages API 응답
+            tool_name: 찾을 도구 이름 (기본 report_vulnerabilities)
             
         Returns:
-            Bandit 분석 결과 (JSON 형식)
+            도구 인자 딕셔너리 (도구 호출이 없으면 텍스트 블록 내용)
         """
-        print(f"\n🔍 Bandit으로 Python 코드 분석 중...")
+        for block in message.content:
+            if getattr(block, 'type', None) == 'tool_use' and block.name == tool_name:
+                return block.input if isinstance(block.input, dict) else {}
         
-        try:
-            # Bandit 설정 초기화
-            b_conf = b_config.BanditConfig()
-            
-            # BanditManager 초기화
-            b_mgr = b_manager.BanditManager(
-                b_conf,
-                'file',
-                debug=False,
-                verbose=False,
-                quiet=True,
-                ignore_nosec=False
-            )
-            
-            # 파일 검색
-            b_mgr.discover_files([target_path], True, None)
-            
-            if not b_mgr.files_list:
-                print("  ⚠ 분석할 Python 파일이 없습니다.")
-                return None
-            
-            print(f"  📁 {len(b_mgr.files_list)}개의 Python 파일 발견")
-            
-            # 테스트 실행
-            b_mgr.run_tests()
-            
-            # 결과를 JSON으로 변환
-            output = UnclosableStringIO()
-            output.name = '<string>'  # StringIO에 name 속성 추가 (Bandit formatter 호환)
-            json_formatter.report(
-                b_mgr,
-                output,
-                b_constants.LOW,
-                b_constants.LOW,
-                lines=-1
-            )
-            
-            json_output = output.getvalue()
-            bandit_data = json.loads(json_output)
-            output.real_close()  # 이제 실제로 닫기
-            
-            # 통계 출력
-            results_count = len(bandit_data.get('results', []))
-            metrics = bandit_data.get('metrics', {}).get('_totals', {})
-            
-            print(f"  ✓ Bandit 분석 완료")
-            print(f"    - 발견된 이슈: {results_count}개")
-            print(f"    - HIGH 심각도: {metrics.get('SEVERITY.HIGH', 0)}개")
-            print(f"    - MEDIUM 심각도: {metrics.get('SEVERITY.MEDIUM', 0)}개")
-            print(f"    - LOW 심각도: {metrics.get('SEVERITY.LOW', 0)}개")
-            
-            self.bandit_results = bandit_data
-            return bandit_data
-            
-        except Exception as e:
-            print(f"  ✗ Bandit 분석 중 오류 발생: {e}")
-            import traceback
-            traceback.print_exc()
-            return None
+        return "".join(getattr(block, 'text', '') for block in message.content)
     
-    def format_semgrep_results_for_llm(self, semgrep_data):
+    def finish_llm_response(self, request, message):
         """
-        Semgrep 결과를 LLM이 이해하기 쉬운 형식으로 변환
+        응답 메시지에서 분석 결과를 꺼내고, max_tokens로 잘렸으면 이어받기
         
         Args:
-            semgrep_data: Semgrep JSON 결과
+            request: 요청 딕셔너리
+            message: Messages API 응답
             
         Returns:
-            포맷된 텍스트
+            구조화 출력 딕셔너리 또는 응답 텍스트
         """
-        if not semgrep_data or not semgrep_data.get('results'):
-            return "Semgrep 분석 결과: 발견된 이슈가 없습니다."
+        if request.get('tool'):
+            # 트리아지 등 전용 도구 요청은 이어받기 없이 인자만 반환
+            return self.extract_tool_input(message, request['tool']['name'])
+        
+        if self.structured_output:
+            payload = self.extract_tool_input(message, self.report_tool()['name'])
+            if message.stop_reason == 'max_tokens' and isinstance(payload, dict):
+                payload = self.continue_truncated_tool_response(request, message, payload)
+            return payload
+        
+        text = message.content[0].text
+        if message.stop_reason == 'max_tokens':
+            text = self.continue_truncated_response(request, text)
+        return text
+    
+    def run_llm_requests(self, requests, estimated_inputs):
+        """
+        LLM 요청들을 동기 Messages API로 실행 (llm_concurrency만큼 동시 실행)
         
-        formatted = "=" * 70 + "\n"
-        formatted += "🔍 SEMGREP 정적 분석 결과 (OWASP Top 10 포함)\n"
-        formatted += "=" * 70 + "\n\n"
+        Args:
+            requests: 요청 딕셔너리 리스트
+            estimated_inputs: custom_id별 추정 입력 토큰 수
+            
+        Returns:
+            (custom_id, 응답 텍스트 또는 구조화 출력 딕셔너리) 튜플 리스트 (실패한 요청은 제외)
+        """
+        def run_request(request):
+            started = time.monotonic()
+            message = self.call_llm(**self.build_message_params(request))
+            self.record_tier_metrics(request, message.usage, time.monotonic() - started)
+            self.record_token_usage(request, estimated_inputs.get(request['custom_id'], 0), message.usage)
+            return self.finish_llm_response(request, message)
+        
+        results = []
+        # 실제 동시 요청 수는 스케줄러의 AIMD 한도가 결정
+        with ThreadPoolExecutor(max_workers=max(1, self.max_llm_concurrency, self.llm_concurrency)) as executor:
+            futures = {executor.submit(run_request, request): request for request in requests}
+            for future in as_completed(futures):
+                request = futures[future]
+                try:
+                    results.append((request['custom_id'], future.result()))
+                except Exception as e:
+                    print(f"✗ 분석 중 오류 발생 ({request['custom_id']}): {e}")
+        
+        return results
+    
+    def run_message_batch(self, requests, estimated_inputs):
+        """
+        LLM 요청들을 하나의 Message Batches 작업으로 제출하고 결과 수집
         
-        results = semgrep_data.get('results', [])
+        작업 ID는 self.batch_state_path에 저장되므로, 중단된 실행을 다시 시작하면
+        같은 요청에 대해 새 작업을 만들지 않고 기존 작업의 결과를 이어서 가져옵니다.
         
-        for idx, finding in enumerate(results, 1):
-            extra = finding.get('extra', {})
-            metadata = extra.get('metadata', {})
+        Args:
+            requests: 요청 딕셔너리 리스트
+            estimated_inputs: custom_id별 추정 입력 토큰 수
             
-            formatted += f"\n[이슈 #{idx}]\n"
-            formatted += f"파일: {finding.get('path', 'N/A')}\n"
-            formatted += f"라인: {finding.get('start', {}).get('line', 'N/A')}\n"
-            formatted += f"규칙 ID: {finding.get('check_id', 'N/A')}\n"
-            formatted += f"심각도: {extra.get('severity', 'INFO')}\n"
+        Returns:
+            (custom_id, 응답 텍스트 또는 구조화 출력 딕셔너리) 튜플 리스트 (실패한 요청은 제외)
+        """
+        batch_requests = [
+            {'custom_id': request['custom_id'], 'params': self.build_message_params(request)}
+            for request in requests
+        ]
+        # 요청 내용이 같을 때만 저장된 작업을 재사용
+        requests_hash = hashlib.sha256(
+            json.dumps(batch_requests, ensure_ascii=False, sort_keys=True).encode('utf-8')
+        ).hexdigest()
+        
+        batch_id = None
+        state = self.load_batch_state()
+        if state and state.get('requests_hash') == requests_hash:
+            batch_id = state.get('batch_id')
+            print(f"   ♻️ 저장된 Message Batches 작업을 이어서 처리합니다: {batch_id}")
+        
+        try:
+            if not batch_id:
+                batch = self.scheduler.call(lambda: self.backend.create_batch(batch_requests))
+                batch_id = batch.id
+                self.save_batch_state({
+                    'batch_id': batch_id,
+                    'requests_hash': requests_hash,
+                    'model': self.model,
+                    'custom_ids': [r['custom_id'] for r in batch_requests],
+                    'created_at': datetime.now().isoformat(timespec='seconds'),
+                })
+                print(f"   📦 Message Batches 작업 제출: {batch_id} (요청 {len(batch_requests)}개)")
             
-            # OWASP 태그
-            if metadata.get('owasp'):
-                formatted += f"OWASP: {', '.join(metadata['owasp'])}\n"
+            batch = self.poll_message_batch(batch_id)
+            if batch is None:
+                print(f"   ⚠ 대기 시간 초과 - 작업 ID가 {self.batch_state_path}에 저장되어 다음 실행에서 이어서 처리합니다.")
+                return []
             
-            # CWE
-            if metadata.get('cwe'):
-                formatted += f"CWE: {', '.join(metadata['cwe'])}\n"
+            requests_by_id = {request['custom_id']: request for request in requests}
+            results = []
+            for entry in self.scheduler.call(lambda: self.backend.batch_results(batch_id)):
+                if entry.result.type != 'succeeded':
+                    print(f"✗ 분석 중 오류 발생 ({entry.custom_id}): {entry.result.type}")
+                    continue
+                message = entry.result.message
+                self.record_tier_metrics(requests_by_id[entry.custom_id], message.usage, None)
+                self.record_token_usage(requests_by_id[entry.custom_id], estimated_inputs.get(entry.custom_id, 0),
+                                        message.usage)
+                # 잘린 응답은 동기 호출로 이어받기
+                results.append((entry.custom_id, self.finish_llm_response(requests_by_id[entry.custom_id], message)))
+        except Exception as e:
+            print(f"✗ Message Batches 처리 중 오류 발생: {e}")
+            return []
+        
+        self.clear_batch_state()
+        return results
+    
+    def poll_message_batch(self, batch_id):
+        """
+        Message Batches 작업이 끝날 때까지 지수 백오프로 상태 확인
+        
+        Args:
+            batch_id: 작업 ID
             
-            formatted += f"설명: {extra.get('message', 'N/A')}\n"
+        Returns:
+            종료된 배치 객체 (최대 대기 시간 초과 시 None)
+        """
+        delay = self.batch_poll_initial_seconds
+        waited = 0.0
+        
+        while True:
+            batch = self.scheduler.call(lambda: self.backend.retrieve_batch(batch_id))
+            if batch.processing_status == 'ended':
+                counts = batch.request_counts
+                print(f"   ✓ 작업 완료: 성공 {counts.succeeded}개, 오류 {counts.errored}개, "
+                      f"만료 {counts.expired}개, 취소 {counts.canceled}개")
+                return batch
             
-            # 코드
-            if extra.get('lines'):
-                formatted += f"코드:\n{extra['lines']}\n"
+            if waited >= self.batch_max_wait_seconds:
+                return None
             
-            formatted += "-" * 70 + "\n"
-        
-        # 통계 요약
-        severity_count = {'ERROR': 0, 'WARNING': 0, 'INFO': 0}
-        for finding in results:
-            severity = finding.get('extra', {}).get('severity', 'INFO').upper()
-            if severity in severity_count:
-                severity_count[severity] += 1
+            counts = batch.request_counts
+            print(f"   ⏳ 처리 중... (완료 대기 {counts.processing}개, {delay:.0f}초 후 재확인)")
+            time.sleep(delay)
+            waited += delay
+            delay = min(delay * 2, self.batch_poll_max_seconds)
+    
+    def load_batch_state(self):
+        """
+        저장된 Message Batches 작업 상태 읽기
         
-        formatted += f"\n통계 요약:\n"
-        formatted += f"  - 총 이슈: {len(results)}개\n"
-        formatted += f"  - ERROR: {severity_count['ERROR']}개\n"
-        formatted += f"  - WARNING: {severity_count['WARNING']}개\n"
-        formatted += f"  - INFO: {severity_count['INFO']}개\n"
-        formatted += "=" * 70 + "\n"
+        Returns:
+            상태 딕셔너리 (없거나 읽을 수 없으면 None)
+        """
+        if not self.batch_state_path or not os.path.exists(self.batch_state_path):
+            return None
+        try:
+            with open(self.batch_state_path, 'r', encoding='utf-8') as f:
+                return json.load(f)
+        except (OSError, json.JSONDecodeError) as e:
+            print(f"   ⚠ 배치 상태 파일을 읽을 수 없습니다: {e}")
+            return None
+    
+    def save_batch_state(self, state):
+        """
+        Message Batches 작업 상태 저장 (중단 후 재개용)
         
-        return formatted
+        Args:
+            state: 저장할 상태 딕셔너리
+        """
+        if not self.batch_state_path:
+            return
+        with open(self.batch_state_path, 'w', encoding='utf-8') as f:
+            json.dump(state, f, ensure_ascii=False, indent=2)
     
-    def format_bandit_results_for_llm(self, bandit_data):
+    def clear_batch_state(self):
         """
-        Bandit 결과를 LLM이 이해하기 쉬운 형식으로 변환
+        결과 수집이 끝난 Message Batches 작업 상태 삭제
+        """
+        if self.batch_state_path and os.path.exists(self.batch_state_path):
+            os.remove(self.batch_state_path)
+    
+    def group_repeats(self, items, key):
+        """
+        같은 키(파일, 규칙)로 aggregate_min_repeats번 이상 반복된 항목을 묶음
         
         Args:
-            bandit_data: Bandit JSON 결과
+            items: 항목 리스트
+            key: 항목 -> 묶음 키 함수
             
         Returns:
-            포맷된 텍스트
+            그룹 리스트 (각 그룹은 항목 리스트, 첫 항목 순서 유지, 반복이 적으면 항목마다 한 그룹)
         """
-        if not bandit_data or not bandit_data.get('results'):
-            return "Bandit 분석 결과: 발견된 이슈가 없습니다."
-        
-        formatted = "=" * 70 + "\n"
-        formatted += "🔍 BANDIT 정적 분석 결과 (Python 코드)\n"
-        formatted += "=" * 70 + "\n\n"
+        groups = {}
+        for item in items:
+            groups.setdefault(key(item), []).append(item)
+        if not self.aggregate_min_repeats:
+            return [[item] for item in items]
+        
+        result = []
+        for item in items:
+            group = groups[key(item)]
+            if len(group) < self.aggregate_min_repeats:
+                result.append([item])
+            elif group[0] is item:
+                result.append(group)
+        return result
+    
+    def format_repeat_lines(self, lines, separator=', '):
+        """
+        반복 발견의 라인 목록 표시 (aggregate_max_lines개까지, 나머지는 개수만)
+        """
+        shown = separator.join(str(line) for line in lines[:self.aggregate_max_lines])
+        if len(lines) > self.aggregate_max_lines:
+            shown += f"{separator}... (총 {len(lines)}곳)"
+        elif len(lines) > 1:
+            shown += f" ({len(lines)}곳)"
+        return shown
+    
+    def aggregate_repeated_findings(self, vulnerabilities):
+        """
+        같은 파일에서 같은 규칙으로 반복된 발견을 하나의 묶음 발견으로 합침
         
-        results = bandit_data.get('results', [])
+        묶음 발견에는 lines(라인 목록), occurrence_count, occurrences(원래 발견 전체, 내보내기용)가 붙고,
+        코드 스니펫은 대표 aggregate_snippet_count개만 남으며 심각도는 가장 높은 값입니다.
         
-        for idx, issue in enumerate(results, 1):
-            formatted += f"\n[이슈 #{idx}]\n"
-            formatted += f"파일: {issue.get('filename', 'N/A')}\n"
-            formatted += f"라인: {issue.get('line_number', 'N/A')}\n"
-            formatted += f"테스트 ID: {issue.get('test_id', 'N/A')}\n"
-            formatted += f"심각도: {issue.get('issue_severity', 'N/A')}\n"
-            formatted += f"신뢰도: {issue.get('issue_confidence', 'N/A')}\n"
-            
-            if issue.get('issue_cwe'):
-                cwe = issue['issue_cwe']
-                formatted += f"CWE: CWE-{cwe.get('id', 'N/A')} ({cwe.get('link', 'N/A')})\n"
-            
-            formatted += f"설명: {issue.get('issue_text', 'N/A').strip()}\n"
-            
-            if issue.get('code'):
-                formatted += f"코드:\n{issue['code']}\n"
+        Args:
+            vulnerabilities: 취약점 리스트
             
-            formatted += "-" * 70 + "\n"
-        
-        # 통계 요약
-        metrics = bandit_data.get('metrics', {}).get('_totals', {})
-        formatted += f"\n통계 요약:\n"
-        formatted += f"  - 총 이슈: {len(results)}개\n"
-        formatted += f"  - HIGH: {metrics.get('SEVERITY.HIGH', 0)}개\n"
-        formatted += f"  - MEDIUM: {metrics.get('SEVERITY.MEDIUM', 0)}개\n"
-        formatted += f"  - LOW: {metrics.get('SEVERITY.LOW', 0)}개\n"
-        formatted += "=" * 70 + "\n"
-        
-        return formatted
+        Returns:
+            묶음이 반영된 취약점 리스트
+        """
+        if not self.aggregate_min_repeats:
+            return vulnerabilities
+        index = self.baseline_index
+        
+        def key(vuln):
+            rule = vuln.get('rule_id') or f"{index.family(vuln)}|{vuln.get('title', '')}"
+            return (index.normalize_path(vuln), vuln.get('source'), rule)
+        
+        aggregated = []
+        collapsed = 0
+        for group in self.group_repeats(vulnerabilities, key):
+            if len(group) == 1:
+                aggregated.append(group[0])
+                continue
+            group = sorted(group, key=lambda v: FindingIndex.line_of(v) or 0)
+            first = group[0]
+            record = Finding(first)
+            record['lines'] = [FindingIndex.line_of(v) for v in group]
+            record['occurrence_count'] = len(group)
+            record['occurrences'] = group
+            record['title'] = f"{first.get('title', '')} ({len(group)}회 반복)"
+            record['code_snippet'] = "\n...\n".join(
+                v.get('code_snippet', '') for v in group[:self.aggregate_snippet_count] if v.get('code_snippet'))
+            record['severity'] = max((v.get('severity') for v in group), key=lambda s: SEVERITY_ORDER.get(s, 0))
+            aggregated.append(record)
+            collapsed += len(group) - 1
+        
+        if collapsed:
+            self.aggregation_stats = {
+                'groups': sum(1 for v in aggregated if v.get('occurrence_count')),
+                'occurrences': collapsed + sum(1 for v in aggregated if v.get('occurrence_count')),
+            }
+            print(f"   🗂️ 같은 규칙 반복 발견 {self.aggregation_stats['occurrences']}개를 "
+                  f"{self.aggregation_stats['groups']}개로 묶음")
+        return aggregated
     
-    def read_code_files(self, file_paths, max_file_size=500000):
+    def baseline_fingerprint(self, vuln):
         """
-        코드 파일들을 읽어서 딕셔너리로 반환
+        기준선 비교용 지문 (assign_baseline_fingerprints()로 붙인 값, 없으면 순번 0으로 계산)
         
         Args:
-            file_paths: 분석할 파일 경로 리스트
-            max_file_size: 최대 파일 크기 (바이트, 기본 500KB)
+            vuln: 취약점
             
         Returns:
-            파일명과 내용을 담은 딕셔너리
+            16자리 16진수 지문
         """
-        code_files = {}
-        skipped_files = []
+        return vuln.get('baseline_fingerprint') or self.fingerprint_for_key(self.baseline_key(vuln), 0)
+    
+    @staticmethod
+    def fingerprint_for_key(key, ordinal):
+        # 순번 0은 순번 없는 키와 같은 지문 (기존 기준선 파일과 호환)
+        text = key if not ordinal else f"{key}|#{ordinal}"
+        return hashlib.sha1(text.encode('utf-8')).hexdigest()[:16]
+    
+    def assign_baseline_fingerprints(self, vulnerabilities):
+        """
+        발견마다 스캔 간 안정적인 지문을 붙임 (baseline_fingerprint 필드)
         
-        for file_path in file_paths:
-            try:
-                file_size = os.path.getsize(file_path)
-                
-                # 파일 크기 체크
-                if file_size > max_file_size:
-                    skipped_files.append(f"{file_path} (크기: {file_size // 1024}KB)")
-                    continue
-                
-                with open(file_path, 'r', encoding='utf-8') as f:
-                    code_files[file_path] = f.read()
-                    
-            except UnicodeDecodeError:
-                # 바이너리 파일 건너뛰기
-                skipped_files.append(f"{file_path} (바이너리)")
-            except Exception as e:
-                skipped_files.append(f"{file_path} (오류: {str(e)})")
+        같은 파일에 같은 코드 줄이 여러 번 있으면 기준선 키가 같으므로, 라인 순서대로 키 안의 순번을 덧붙여
+        발견마다 다른 지문을 만듭니다. 순번은 같은 키끼리의 상대 순서라서 다른 코드가 위아래로 움직여도 유지됩니다.
         
-        if skipped_files:
-            print(f"\n⚠ 건너뛴 파일 ({len(skipped_files)}개):")
-            for skipped in skipped_files[:5]:  # 최대 5개만 표시
-                print(f"  - {skipped}")
-            if len(skipped_files) > 5:
-                print(f"  ... 외 {len(skipped_files) - 5}개")
+        Args:
+            vulnerabilities: 취약점 리스트 (제자리에서 수정)
+        """
+        groups = {}
+        for vuln in vulnerabilities:
+            groups.setdefault(self.baseline_key(vuln), []).append(vuln)
+        for key, group in groups.items():
+            group.sort(key=lambda v: (FindingIndex.line_of(v) is None, FindingIndex.line_of(v) or 0))
+            for ordinal, vuln in enumerate(group):
+                vuln['baseline_fingerprint'] = self.fingerprint_for_key(key, ordinal)
+    
+    def baseline_key(self, vuln):
+        """
+        기준선 지문 키 (스캔 루트 기준 상대 경로, 발견 계열, 스니펫 해시)
         
-        print(f"\n✓ {len(code_files)}개 파일 읽기 완료")
-        return code_files
+        코드 위치가 위아래로 움직여도 유지되도록 라인 번호 대신 스니펫을 쓰고,
+        스니펫이 없을 때만 라인 버킷을 사용합니다.
+        """
+        index = self.baseline_index
+        path = index.normalize_path(vuln)
+        if path and self.scan_root:
+            path = os.path.relpath(path, os.path.normcase(os.path.abspath(self.scan_root))).replace(os.sep, '/')
+        snippet = index.snippet_hash(vuln)
+        if not snippet:
+            line = index.line_of(vuln)
+            snippet = f"L{line // index.line_bucket}" if line is not None else ''
+        return f"{path}|{index.family(vuln)}|{snippet}"
     
-    def convert_semgrep_to_vulnerabilities(self, semgrep_results):
+    @property
+    def baseline_index(self):
+        # 지문 계산용 인덱스 (경로 해석 캐시를 공유)
+        if self._baseline_index is None:
+            self._baseline_index = self.new_finding_index()
+        return self._baseline_index
+    
+    def load_baseline(self):
         """
-        Semgrep 결과를 취약점 리스트로 변환
+        baseline_path의 기준선 저장소 (처음 호출할 때 읽음, 경로가 없으면 None)
+        """
+        if self.baseline_path and self.baseline is None:
+            self.baseline = BaselineStore(self.baseline_path)
+        return self.baseline
+    
+    def suppression_rules(self, file_path, code_files):
+        """
+        파일의 억제 주석 해석 (Bandit 방식 인라인 주석과 파일 단위 주석)
+        
+        - 인라인: `# nosec`, `# nosemgrep`, `# codescanner-ignore` (뒤에 B602, CWE-78, 규칙 ID를 쉼표로 지정 가능)
+        - 파일 단위: 처음 20줄 안의 `# codescanner-ignore-file` (ID 지정 가능)
         
         Args:
-            semgrep_results: Semgrep JSON 결과
+            file_path: 파일 경로
+            code_files: 파일명과 코드 내용을 담은 딕셔너리
             
         Returns:
-            취약점 딕셔너리 리스트
+            (파일 단위 ID 집합 또는 None, {라인: ID 집합}) - 빈 집합은 모든 발견 억제
         """
-        vulnerabilities = []
+        if file_path in self._suppression_cache:
+            return self._suppression_cache[file_path]
+        
+        file_ids = None
+        line_ids = {}
+        for line_no, line in enumerate(self.get_source_lines(file_path, code_files), 1):
+            if '#' not in line and '//' not in line and '/*' not in line:
+                continue
+            match = SUPPRESSION_FILE_PATTERN.search(line)
+            if match and line_no <= 20:
+                file_ids = (file_ids or set()) | self.parse_suppression_ids(match.group(1))
+                continue
+            match = SUPPRESSION_LINE_PATTERN.search(line)
+            if match:
+                line_ids[line_no] = self.parse_suppression_ids(match.group(1))
+        self._suppression_cache[file_path] = (file_ids, line_ids)
+        return file_ids, line_ids
+    
+    def parse_suppression_ids(self, text):
+        """
+        억제 주석 뒤의 ID 목록 해석 (CWE는 정규화, 없으면 빈 집합)
+        """
+        ids = set()
+        for token in re.split(r"[\s,]+", text.strip().strip(':[]()*/').strip()):
+            token = token.strip('[]():')
+            if not token or token.startswith(('-', '#')):
+                break
+            ids.add(RemediationKnowledgeBase.normalize_cwe_id(token) if token.upper().startswith('CWE') else token)
+        return ids
+    
+    def is_suppressed(self, vuln, code_files):
+        """
+        발견이 억제 주석 대상인지 확인 (발견 라인 또는 바로 윗줄의 인라인 주석, 파일 단위 주석)
         
-        if not semgrep_results or not semgrep_results.get('results'):
-            return vulnerabilities
+        Args:
+            vuln: 취약점
+            code_files: 파일명과 코드 내용을 담은 딕셔너리
+            
+        Returns:
+            억제 대상이면 True
+        """
+        if not self.suppressions_enabled:
+            return False
+        path = vuln.get('file_path') or self.split_location(vuln.get('location'), self.known_paths or code_files)[0]
+        if not path:
+            return False
+        file_ids, line_ids = self.suppression_rules(path, code_files)
+        rule_id = str(vuln.get('rule_id') or '')
+        finding_ids = {rule_id, rule_id.rsplit('.', 1)[-1], RemediationKnowledgeBase.normalize_cwe_id(vuln.get('cwe_id'))} - {''}
+        
+        def matches(ids):
+            return ids is not None and (not ids or bool(ids & finding_ids))
+        
+        if matches(file_ids):
+            return True
+        line = FindingIndex.line_of(vuln)
+        if line is None:
+            return False
+        return matches(line_ids.get(line)) or matches(line_ids.get(line - 1))
+    
+    def is_known_finding(self, vuln, code_files):
+        """
+        억제되었거나 기준선에 이미 있는 발견인지 (트리아지 대상에서 제외하는 데 사용)
+        """
+        if self.is_suppressed(vuln, code_files):
+            return True
+        baseline = self.load_baseline()
+        return baseline is not None and baseline.is_known(self.baseline_fingerprint(vuln))
+    
+    def apply_baseline(self, vulnerabilities, code_files):
+        """
+        억제 주석을 반영하고 기준선과 비교해 신규 발견만 남김
         
-        # 심각도 매핑
-        severity_map = {
-            'ERROR': 'High',
-            'WARNING': 'Medium',
-            'INFO': 'Low'
-        }
+        기준선이 있으면 각 발견을 new/unchanged로, 사라진 지문을 fixed로 분류하고,
+        이번 스캔 지문을 직전 스캔으로 저장합니다. baseline_update가 True면 이번 발견을 모두 수용합니다.
+        결과는 baseline_stats에, 억제만 반영한 발견은 active_findings에 기록됩니다.
         
-        for finding in semgrep_results.get('results', []):
-            extra = finding.get('extra', {})
-            
-            # 카테고리 추출 (OWASP 등)
-            metadata = extra.get('metadata', {})
-            owasp_tags = [tag for tag in metadata.get('owasp', [])] if metadata.get('owasp') else []
-            category = metadata.get('category', 'Security')
-            
-            # CWE 추출
-            cwe_list = metadata.get('cwe', [])
-            cwe_id = f"CWE-{cwe_list[0].split('-')[1]}" if cwe_list else ''
+        Args:
+            vulnerabilities: 취약점 리스트
+            code_files: 파일명과 코드 내용을 담은 딕셔너리
             
-            vuln = {
-                'severity': severity_map.get(extra.get('severity', 'INFO').upper(), 'Medium'),
-                'category': f"{category} ({', '.join(owasp_tags[:2])})" if owasp_tags else category,
-                'title': f"{extra.get('message', 'Security Issue')}",
-                'description': extra.get('message', '') + '\n' + metadata.get('description', ''),
-                'location': f"{Path(finding.get('path', '')).name}:{finding.get('start', {}).get('line', 'N/A')}",
-                'code_snippet': finding.get('extra', {}).get('lines', '').strip(),
-                'impact': f"심각도: {extra.get('severity', 'INFO')}, 신뢰도: High",
-                'recommendation': metadata.get('fix', metadata.get('references', ['코드를 검토하고 보안 모범 사례를 따르세요.'])[0] if metadata.get('references') else '코드를 검토하고 보안 모범 사례를 따르세요.'),
-                'cwe_id': cwe_id,
-                'source': 'Semgrep'
-            }
-            vulnerabilities.append(vuln)
+        Returns:
+            보고할 취약점 리스트 (기준선이 있으면 신규 발견만)
+        """
+        reported = []
+        suppressed = 0
+        for vuln in vulnerabilities:
+            if self.is_suppressed(vuln, code_files):
+                suppressed += 1
+            else:
+                reported.append(vuln)
+        self.active_findings = reported
+        self.assign_baseline_fingerprints(reported)
+        
+        baseline = self.load_baseline()
+        if baseline is None:
+            self.baseline_stats = {'suppressed': suppressed} if suppressed else None
+            if suppressed:
+                print(f"   🔕 억제 주석으로 제외한 발견 {suppressed}개")
+            return reported
+        
+        fingerprints = {}
+        for vuln in reported:
+            fingerprints.setdefault(vuln['baseline_fingerprint'], vuln)
+        diff = baseline.diff(fingerprints)
+        
+        for vuln in reported:
+            vuln['baseline_status'] = 'new' if vuln['baseline_fingerprint'] in diff['new'] else 'unchanged'
+        
+        if self.baseline_update:
+            baseline.accept({fp: {
+                'file_path': vuln.get('file_path') or vuln.get('location', ''),
+                'cwe_id': vuln.get('cwe_id', ''),
+                'rule_id': vuln.get('rule_id', ''),
+                'title': vuln.get('title', ''),
+            } for fp, vuln in fingerprints.items()})
+        baseline.save(fingerprints)
+        
+        new_findings = [vuln for vuln in reported if vuln['baseline_status'] == 'new']
+        self.baseline_stats = {
+            'new': len(new_findings),
+            'unchanged': len(reported) - len(new_findings),
+            'fixed': len(diff['fixed']),
+            'suppressed': suppressed,
+            'accepted': len(baseline.accepted),
+        }
+        print(f"   📌 기준선 비교: 신규 {self.baseline_stats['new']}개, 유지 {self.baseline_stats['unchanged']}개, "
+              f"해결 {self.baseline_stats['fixed']}개, 억제 {suppressed}개"
+              f"{f' (수용 기준선 {len(baseline.accepted)}개로 갱신)' if self.baseline_update else ''}")
+        return new_findings
+    
+    def new_finding_index(self):
+        """
+        분석 대상 파일 경로를 아는 빈 발견 지문 인덱스 생성
         
-        return vulnerabilities
+        Returns:
+            FindingIndex 객체
+        """
+        return FindingIndex(self.known_paths, self.fingerprint_line_bucket)
     
-    def convert_bandit_to_vulnerabilities(self, bandit_results):
+    def deduplicate_findings(self, vulnerabilities, index=None):
         """
-        Bandit 결과를 취약점 리스트로 변환
+        지문 인덱스로 같은 발견을 상관 클러스터로 묶음 (앞에 있는 발견이 대표, 발견 수에 선형)
         
         Args:
-            bandit_results: Bandit JSON 결과
+            vulnerabilities: 취약점 리스트
+            index: 이미 다른 발견이 색인된 FindingIndex (없으면 새로 생성)
             
         Returns:
-            취약점 딕셔너리 리스트
+            (클러스터 대표 취약점 리스트, 대표에 합친 개수) 튜플
         """
-        vulnerabilities = []
+        index = index or self.new_finding_index()
+        unique = []
+        for vuln in vulnerabilities:
+            existing = index.add(vuln)
+            if existing is None:
+                unique.append(vuln)
+            else:
+                self.correlate_finding(existing, vuln)
+        return unique, len(vulnerabilities) - len(unique)
+    
+    def engine_confidence(self, vuln):
+        """
+        한 엔진 발견의 정밀도 추정치 (신뢰도 등급 기준, LLM 트리아지에서 실제 취약점이면 상향)
+        """
+        confidence = ENGINE_CONFIDENCE_WEIGHTS.get(str(vuln.get('confidence') or 'MEDIUM').upper(),
+                                                   ENGINE_CONFIDENCE_WEIGHTS['MEDIUM'])
+        if vuln.get('triage_verdict') == 'true_positive':
+            confidence = max(confidence, ENGINE_CONFIDENCE_WEIGHTS['HIGH'])
+        return confidence
+    
+    def correlate_finding(self, cluster, vuln):
+        """
+        같은/인접 라인의 호환 CWE 발견을 클러스터 대표에 합치고 합의 정보를 갱신
         
-        if not bandit_results or not bandit_results.get('results'):
-            return vulnerabilities
+        대표 발견에는 engines(합의한 엔진), correlated(멤버 요약), combined_confidence
+        (엔진별 최고 정밀도 p에 대해 1 - Π(1 - p))가 기록되고, 심각도는 멤버 중 가장 높은 값이 됩니다.
         
-        # 심각도 매핑
-        severity_map = {
-            'HIGH': 'High',
-            'MEDIUM': 'Medium',
-            'LOW': 'Low'
+        Args:
+            cluster: 클러스터 대표 취약점 (제자리에서 수정)
+            vuln: 합칠 취약점
+        """
+        if 'correlated' not in cluster:
+            cluster['correlated'] = [self.correlation_member(cluster)]
+        cluster['correlated'].append(self.correlation_member(vuln))
+        
+        best = {}
+        for member in cluster['correlated']:
+            best[member['source']] = max(best.get(member['source'], 0.0), member['confidence'])
+        missed = 1.0
+        for confidence in best.values():
+            missed *= 1.0 - confidence
+        cluster['engines'] = list(best)
+        cluster['combined_confidence'] = round(1.0 - missed, 3)
+        
+        if SEVERITY_ORDER.get(vuln.get('severity'), 0) > SEVERITY_ORDER.get(cluster.get('severity'), 0):
+            cluster['severity'] = vuln['severity']
+    
+    def correlation_member(self, vuln):
+        """
+        상관 클러스터 멤버 요약 (보고서 표시와 정확도 조정용 합의 기록에 사용)
+        """
+        return {
+            'source': vuln.get('source', 'LLM Analysis'),
+            'rule_id': vuln.get('rule_id', ''),
+            'cwe_id': vuln.get('cwe_id', ''),
+            'severity': vuln.get('severity', ''),
+            'location': vuln.get('location', ''),
+            'line': FindingIndex.line_of(vuln),
+            'confidence': self.engine_confidence(vuln),
         }
+    
+    def record_correlation_clusters(self, vulnerabilities):
+        """
+        상관 클러스터 통계를 출력하고, agreement_log_path가 있으면 클러스터별 합의 기록을 추가
         
-        for issue in bandit_results.get('results', []):
-            vuln = {
-                'severity': severity_map.get(issue.get('issue_severity', 'MEDIUM'), 'Medium'),
-                'category': 'Python 보안',
-                'title': f"{issue.get('test_name', 'Security Issue')} - {issue.get('test_id', '')}",
-                'description': issue.get('issue_text', '').strip(),
-                'location': f"{Path(issue.get('filename', '')).name}:{issue.get('line_number', 'N/A')}",
-                'code_snippet': issue.get('code', '').strip(),
-                'impact': f"심각도: {issue.get('issue_severity', 'N/A')}, 신뢰도: {issue.get('issue_confidence', 'N/A')}",
-                'recommendation': '코드를 검토하고 보안 모범 사례를 따르세요.',
-                'cwe_id': f"CWE-{issue['issue_cwe']['id']}" if issue.get('issue_cwe') else '',
-                'source': 'Bandit'
-            }
-            vulnerabilities.append(vuln)
-        
-        return vulnerabilities
+        Args:
+            vulnerabilities: 클러스터 대표 취약점 리스트
+        """
+        clusters = [v for v in vulnerabilities if v.get('correlated')]
+        if not clusters:
+            return
+        agreed = sum(1 for v in clusters if len(v.get('engines', [])) > 1)
+        print(f"   🤝 상관 클러스터 {len(clusters)}개 (발견 {sum(len(v['correlated']) for v in clusters)}개를 묶음, "
+              f"여러 엔진 합의 {agreed}개)")
+        
+        if not self.agreement_log_path:
+            return
+        timestamp = datetime.now().isoformat(timespec='seconds')
+        try:
+            with open(self.agreement_log_path, 'a', encoding='utf-8') as f:
+                for vuln in clusters:
+                    f.write(json.dumps({
+                        'timestamp': timestamp,
+                        'fingerprint': vuln.get('fingerprint', ''),
+                        'file_path': vuln.get('file_path', ''),
+                        'cwe_id': vuln.get('cwe_id', ''),
+                        'engines': vuln.get('engines', []),
+                        'combined_confidence': vuln.get('combined_confidence'),
+                        'triage_verdict': vuln.get('triage_verdict', ''),
+                        'members': vuln['correlated'],
+                    }, ensure_ascii=False) + "\n")
+        except OSError as e:
+            print(f"   ⚠ 엔진 합의 로그 기록 실패: {e}")
     
-    def analyze_security_with_tools(self, code_files, semgrep_results, bandit_results):
+    def combine_llm_responses(self, results):
         """
-        Semgrep + Bandit 결과를 포함하여 LLM으로 보안 분석
+        배치별 LLM 응답을 하나의 결과로 결합
         
         Args:
-            code_files: 파일명과 코드 내용을 담은 딕셔너리
-            semgrep_results: Semgrep 분석 결과
-            bandit_results: Bandit 분석 결과
+            results: (custom_id, 응답 텍스트 또는 구조화 출력 딕셔너리) 튜플 리스트
             
         Returns:
-            분석 결과 텍스트
+            결합된 결과 딕셔너리
         """
-        # Semgrep 결과를 취약점으로 변환
-        semgrep_vulnerabilities = self.convert_semgrep_to_vulnerabilities(semgrep_results)
-        
-        # Bandit 결과를 취약점으로 변환
-        bandit_vulnerabilities = self.convert_bandit_to_vulnerabilities(bandit_results)
-        
-        # 두 도구의 취약점을 합침
-        all_tool_vulnerabilities = semgrep_vulnerabilities + bandit_vulnerabilities
-        
-        # 코드 파일들을 프롬프트에 포함할 형식으로 변환
-        code_context = []
-        for file_path, content in code_files.items():
-            # 파일명만 표시 (경로가 너무 길면)
-            rel_path = Path(file_path).name if len(file_path) > 60 else file_path
-            # 파일 크기 제한 (너무 큰 파일은 일부만)
-            if len(content) > 10000:
-                content = content[:10000] + "\n\n... (파일이 너무 커서 일부만 표시)"
-            code_context.append(f"\n## 파일: {rel_path}\n```\n{content}\n```")
+        if len(results) == 1:
+            return self.parse_analysis_result(results[0][1])
+        
+        combined_vulnerabilities = []
+        assessments = []
+        for _, payload in sorted(results, key=lambda r: r[0]):
+            parsed = self.parse_analysis_result(payload)
+            combined_vulnerabilities.extend(parsed.get('vulnerabilities', []))
+            if parsed.get('overall_assessment'):
+                assessments.append(parsed['overall_assessment'])
+        
+        # 배치 경계나 리듀스 단계에서 같은 발견이 여러 번 보고될 수 있음
+        combined_vulnerabilities, _ = self.deduplicate_findings(combined_vulnerabilities)
+        return {
+            'vulnerabilities': combined_vulnerabilities,
+            'overall_assessment': "\n\n".join(assessments),
+        }
+    
+    def merge_tools_and_llm_results(self, llm_result, tool_vulnerabilities):
+        """
+        LLM 결과와 정적 분석 도구 취약점을 병합
         
-        code_text = "\n".join(code_context)
+        Args:
+            llm_result: LLM 분석 결과 (텍스트 또는 구조화 출력 딕셔너리)
+            tool_vulnerabilities: 정적 분석 도구 취약점 리스트 (Semgrep + Bandit)
+            
+        Returns:
+            병합된 결과 딕셔너리
+        """
+        # LLM 결과 파싱 시도
+        parsed = self.parse_analysis_result(llm_result)
         
-        # Semgrep 결과 포맷팅
-        semgrep_text = ""
-        if semgrep_results:
-            semgrep_text = self.format_semgrep_results_for_llm(semgrep_results)
+        # LLM이 발견한 취약점
+        llm_vulnerabilities = parsed.get('vulnerabilities', [])
         
-        # Bandit 결과 포맷팅
-        bandit_text = ""
-        if bandit_results:
-            bandit_text = self.format_bandit_results_for_llm(bandit_results)
+        # 도구 원본 발견을 먼저 색인하고(맨 앞에 배치), LLM 결과 중 같은 지문은 제외
+        index = self.new_finding_index()
+        tool_findings, tool_duplicates = self.deduplicate_findings(tool_vulnerabilities, index)
+        llm_findings, llm_duplicates = self.deduplicate_findings(llm_vulnerabilities, index)
+        
+        tools_in_llm = sum(1 for v in llm_vulnerabilities if v.get('source') in ('Semgrep', 'Bandit'))
+        if tools_in_llm < len(tool_findings):
+            print(f"   ℹ️ 정적 분석 도구 취약점 {len(tool_findings) - tools_in_llm}개를 결과에 추가합니다")
+        if tool_duplicates or llm_duplicates:
+            print(f"   🧷 지문이 같은 발견 {tool_duplicates + llm_duplicates}개를 클러스터로 합침 "
+                  f"(도구 간 {tool_duplicates}개, LLM 응답 {llm_duplicates}개)")
+        
+        store = FindingStore(tool_findings + llm_findings)
+        self.record_correlation_clusters(store.records)
+        
+        return {
+            'vulnerabilities': store.records,
+            'summary': store.summary(),
+            'overall_assessment': parsed.get('overall_assessment', '보안 분석 완료')
+        }
+    
+    def create_tools_only_result(self, tool_vulnerabilities, semgrep_count, bandit_count, reason='LLM 분석 실패'):
+        """
+        정적 분석 도구 결과만으로 결과 생성 (LLM 실패 시)
         
-        # 도구별 취약점 개수
-        semgrep_count = len(semgrep_vulnerabilities)
-        bandit_count = len(bandit_vulnerabilities)
-        total_tool_count = semgrep_count + bandit_count
+        Args:
+            tool_vulnerabilities: 도구 취약점 리스트
+            semgrep_count: Semgrep 발견 수
+            bandit_count: Bandit 발견 수
+            reason: LLM 결과가 없는 이유 (종합 평가에 표시)
+            
+        Returns:
+            결과 딕셔너리
+        """
+        tool_vulnerabilities, _ = self.deduplicate_findings(tool_vulnerabilities)
+        store = FindingStore(tool_vulnerabilities)
+        self.record_correlation_clusters(store.records)
+        
+        return {
+            'vulnerabilities': store.records,
+            'summary': store.summary(),
+            'overall_assessment': f'정적 분석 도구만 완료 (Semgrep: {semgrep_count}개, Bandit: {bandit_count}개) - {reason}'
+        }
+    
+    def parse_analysis_result(self, analysis_text):
+        """
+        LLM의 분석 결과에서 JSON 데이터 추출
         
-        # 보안 분석 프롬프트
-        prompt = f"""당신은 경험이 풍부한 보안 전문가입니다. 다음 코드들을 철저히 분석하여 모든 보안 취약점을 찾아주세요.
-
-⚠️ **중요: 모든 응답은 반드시 한글로 작성해주세요!**
-
-{"=" * 70}
-🔍 SEMGREP 정적 분석 결과 (OWASP Top 10 포함 - 모든 언어)
-{"=" * 70}
-{semgrep_text if semgrep_text else "Semgrep 분석 결과가 없습니다."}
-
-{"=" * 70}
-🔍 BANDIT 정적 분석 결과 (Python 특화)
-{"=" * 70}
-{bandit_text if bandit_text else "Python 파일이 없거나 Bandit 분석 결과가 없습니다."}
-
-{"=" * 70}
-📄 분석할 전체 코드베이스
-{"=" * 70}
-{code_text}
-
-{"=" * 70}
-⚠️ 중요 지시사항
-{"=" * 70}
-
-1. **정적 분석 도구가 발견한 {total_tool_count}개의 취약점을 반드시 JSON에 포함하세요**
-   - Semgrep 발견: {semgrep_count}개 → "source": "Semgrep"
-   - Bandit 발견: {bandit_count}개 → "source": "Bandit"
-   - 각 도구의 결과를 그대로 유지하면서 더 자세한 설명 추가
-
-2. **추가로 다음 항목들을 철저히 분석하세요:**
-   
-   **프론트엔드 보안 (JavaScript, HTML 등):**
-   - XSS (innerHTML, eval 등)
-   - 클라이언트 측 비밀정보 저장
-   - 안전하지 않은 HTTP 사용
-   - CORS 문제
-   
-   **백엔드 보안 (Python, API 등):**
-   - SQL Injection (parameterized query 미사용)
-   - Command Injection (os.system, subprocess)
-   - 인증/권한 검증 누락
-   - Rate limiting 부재
-   - IDOR (Insecure Direct Object Reference)
-   - 민감한 에러 정보 노출
-   
-   **공통 보안:**
-   - 하드코딩된 비밀번호/API 키/토큰
-   - 약한 암호화 (MD5, SHA1, DES)
-   - 위험한 함수 (eval, exec, pickle)
-   - 파일 권한 문제
-   - JWT 검증 없음
-   - Debug mode 활성화
-
-3. **각 취약점마다:**
-   - 정확한 파일명과 라인 번호
-   - 실제 문제 코드 스니펫
-   - 구체적인 수정 방법
-   - "source": "LLM Analysis" 표시
-
-{"=" * 70}
-📝 응답 형식 (반드시 JSON만 출력, 모든 내용은 한글로!)
-{"=" * 70}
-
-{{
-  "vulnerabilities": [
-    {{
-      "severity": "Critical|High|Medium|Low",
-      "category": "SQL Injection|XSS|인증 우회|민감정보 노출|등등 (한글로!)",
-      "title": "명확한 취약점 제목 (한글로!)",
-      "description": "상세한 설명 (한글로!)",
-      "location": "파일명:라인번호",
-      "code_snippet": "실제 문제 코드",
-      "impact": "구체적인 보안 영향 (한글로!)",
-      "recommendation": "실행 가능한 수정 방안 (한글로!)",
-      "cwe_id": "CWE-XXX (있는 경우)",
-      "source": "Semgrep|Bandit|LLM Analysis"
-    }}
-  ],
-  "summary": {{
-    "total_vulnerabilities": {total_tool_count} + 추가발견,
-    "critical": 0,
-    "high": 0,
-    "medium": 0,
-    "low": 0,
-    "semgrep_issues": {semgrep_count},
-    "bandit_issues": {bandit_count},
-    "llm_found_issues": 추가발견수
-  }},
-  "overall_assessment": "종합 평가 (한글로!)"
-}}
-
-⚠️ **모든 텍스트 필드(title, description, category, impact, recommendation, overall_assessment)는 반드시 한글로 작성!**
-⚠️ 반드시 순수 JSON만 출력하세요. 설명이나 마크다운 없이 JSON만!
-⚠️ Semgrep {semgrep_count}개 + Bandit {bandit_count}개 + 추가 발견 취약점 모두 포함!
-⚠️ 모든 파일(프론트엔드/백엔드/설정)을 빠짐없이 검사!"""
-
-        print("\n🤖 Claude API를 통한 보안 분석 시작...")
-        print(f"   📊 정적 분석 도구 발견:")
-        print(f"      - Semgrep: {semgrep_count}개")
-        print(f"      - Bandit: {bandit_count}개")
-        print(f"   🔍 LLM 추가 취약점 탐지 중...")
+        Args:
+            analysis_text: LLM의 분석 결과 텍스트 (이미 구조화된 딕셔너리면 그대로 반환)
+            
+        Returns:
+            파싱된 JSON 딕셔너리
+        """
+        if isinstance(analysis_text, dict):
+            return analysis_text
         
         try:
-            message = self.client.messages.create(
-                model=self.model,
-                max_tokens=16000,
-                system="당신은 한국어로 소통하는 보안 전문가입니다. 모든 응답은 반드시 한글로 작성해야 합니다.",
-                messages=[
-                    {"role": "user", "content": prompt}
-                ]
-            )
+            # JSON 블록 찾기
+            start = analysis_text.find('{')
+            end = analysis_text.rfind('}') + 1
             
-            result = message.content[0].text
-            print("✓ LLM 분석 완료")
+            if start != -1 and end > start:
+                json_str = analysis_text[start:end]
+                return json.loads(json_str)
+            else:
+                # JSON을 찾지 못한 경우 기본 구조 반환
+                return {
+                    "vulnerabilities": [],
+                    "summary": {
+                        "total_vulnerabilities": 0,
+                        "critical": 0,
+                        "high": 0,
+                        "medium": 0,
+                        "low": 0
+                    },
+                    "overall_assessment": analysis_text
+                }
+        except json.JSONDecodeError:
+            # 응답이 중간에 잘린 경우 완전한 취약점 객체만이라도 복구
+            recovered, _ = self.recover_vulnerabilities(analysis_text)
+            if recovered:
+                print(f"⚠ JSON이 불완전합니다 - 완전한 취약점 {len(recovered)}개를 복구했습니다")
+                return {
+                    "vulnerabilities": recovered,
+                    "summary": {
+                        "total_vulnerabilities": len(recovered),
+                        "critical": 0,
+                        "high": 0,
+                        "medium": 0,
+                        "low": 0
+                    },
+                    "overall_assessment": ""
+                }
             
-            # LLM 응답에 도구 취약점이 누락되었을 경우를 대비해 병합
-            return self.merge_tools_and_llm_results(result, all_tool_vulnerabilities)
+            print("⚠ JSON 파싱 실패, 원본 텍스트 사용")
+            return {
+                "vulnerabilities": [],
+                "summary": {
+                    "total_vulnerabilities": 0,
+                    "critical": 0,
+                    "high": 0,
+                    "medium": 0,
+                    "low": 0
+                },
+                "overall_assessment": analysis_text
+            }
+    
+    def recover_vulnerabilities(self, analysis_text):
+        """
+        잘린 LLM 응답에서 완전한 취약점 객체들을 복구
+        
+        "vulnerabilities" 배열의 원소를 앞에서부터 하나씩 디코딩하고,
+        불완전한 원소를 만나면 그 앞까지만 반환합니다.
+        
+        Args:
+            analysis_text: LLM의 분석 결과 텍스트 (잘렸을 수 있음)
             
-        except Exception as e:
-            print(f"✗ 분석 중 오류 발생: {e}")
-            # 오류 발생 시에도 도구 결과는 반환
-            if all_tool_vulnerabilities:
-                return self.create_tools_only_result(all_tool_vulnerabilities, semgrep_count, bandit_count)
-            return None
+        Returns:
+            (복구된 취약점 리스트, 마지막 완전한 원소 직후 위치) 튜플
+            배열을 찾지 못하면 위치는 -1
+        """
+        key = analysis_text.find('"vulnerabilities"')
+        if key == -1:
+            return [], -1
+        start = analysis_text.find('[', key)
+        if start == -1:
+            return [], -1
+        
+        decoder = json.JSONDecoder()
+        recovered = []
+        pos = start + 1
+        resume = pos
+        while True:
+            # 원소 사이의 공백과 쉼표 건너뛰기
+            while pos < len(analysis_text) and analysis_text[pos] in ' \t\r\n,':
+                pos += 1
+            if pos >= len(analysis_text) or analysis_text[pos] != '{':
+                break
+            try:
+                vuln, pos = decoder.raw_decode(analysis_text, pos)
+            except json.JSONDecodeError:
+                break
+            if isinstance(vuln, dict):
+                recovered.append(vuln)
+            resume = pos
+        
+        return recovered, resume
     
-    def merge_tools_and_llm_results(self, llm_result, tool_vulnerabilities):
+    def continue_truncated_response(self, request, text):
         """
-        LLM 결과와 정적 분석 도구 취약점을 병합
+        max_tokens로 잘린 응답을 마지막 완전한 취약점 뒤부터 이어서 요청
+        
+        지금까지의 응답을 assistant 메시지로 미리 채워 넣어(prefill) 모델이
+        배열의 다음 원소부터 이어서 출력하도록 합니다.
         
         Args:
-            llm_result: LLM 분석 결과 텍스트
-            tool_vulnerabilities: 정적 분석 도구 취약점 리스트 (Semgrep + Bandit)
+            request: 원래 요청 딕셔너리
+            text: 잘린 응답 텍스트
             
         Returns:
-            병합된 결과 텍스트
+            이어 붙인 전체 응답 텍스트
         """
-        # LLM 결과 파싱 시도
-        parsed = self.parse_analysis_result(llm_result)
+        for attempt in range(1, self.max_continuations + 1):
+            recovered, resume = self.recover_vulnerabilities(text)
+            if resume == -1:
+                print(f"   ⚠ {request['custom_id']}: 이어받을 위치를 찾을 수 없어 잘린 응답을 그대로 사용합니다")
+                break
+            
+            prefill = text[:resume].rstrip()
+            if recovered:
+                prefill += ","
+            
+            print(f"   ↪ {request['custom_id']}: 응답이 잘려 이어서 요청합니다 "
+                  f"({attempt}/{self.max_continuations}, 복구된 취약점 {len(recovered)}개)")
+            
+            params = self.build_message_params(request)
+            params['messages'] = params['messages'] + [{"role": "assistant", "content": prefill}]
+            message = self.call_llm(**params)
+            usage = message.usage
+            if usage is not None:
+                print(f"   📏 {request['custom_id']} 이어받기: 입력 {usage.input_tokens:,}, 출력 {usage.output_tokens:,}")
+            
+            text = prefill + message.content[0].text
+            if message.stop_reason != 'max_tokens':
+                break
+            
+            # 새로 완성된 원소가 없으면 더 요청해도 진전이 없음
+            if len(self.recover_vulnerabilities(text)[0]) <= len(recovered):
+                break
         
-        # LLM이 발견한 취약점
-        llm_vulnerabilities = parsed.get('vulnerabilities', [])
+        return text
+    
+    def continue_truncated_tool_response(self, request, message, payload):
+        """
+        max_tokens로 잘린 도구 호출 응답의 나머지 취약점을 이어서 요청
         
-        # 도구 취약점이 LLM 결과에 포함되었는지 확인
-        semgrep_in_llm = sum(1 for v in llm_vulnerabilities if v.get('source') == 'Semgrep')
-        bandit_in_llm = sum(1 for v in llm_vulnerabilities if v.get('source') == 'Bandit')
-        tools_in_llm = semgrep_in_llm + bandit_in_llm
-        
-        # 도구 취약점이 누락되었거나 적으면 직접 추가
-        if tools_in_llm < len(tool_vulnerabilities):
-            missing = len(tool_vulnerabilities) - tools_in_llm
-            print(f"   ℹ️ 정적 분석 도구 취약점 {missing}개를 결과에 추가합니다")
-            
-            # 중복 제거를 위해 이미 포함된 것은 제외
-            existing_locations = {v.get('location', '') for v in llm_vulnerabilities if v.get('source') in ['Semgrep', 'Bandit']}
-            
-            for tool_vuln in tool_vulnerabilities:
-                if tool_vuln['location'] not in existing_locations:
-                    llm_vulnerabilities.insert(0, tool_vuln)  # 맨 앞에 추가
-            
-            # 통계 재계산
-            summary = {
-                'total_vulnerabilities': len(llm_vulnerabilities),
-                'critical': sum(1 for v in llm_vulnerabilities if v.get('severity') == 'Critical'),
-                'high': sum(1 for v in llm_vulnerabilities if v.get('severity') == 'High'),
-                'medium': sum(1 for v in llm_vulnerabilities if v.get('severity') == 'Medium'),
-                'low': sum(1 for v in llm_vulnerabilities if v.get('severity') == 'Low'),
-                'semgrep_issues': sum(1 for v in llm_vulnerabilities if v.get('source') == 'Semgrep'),
-                'bandit_issues': sum(1 for v in llm_vulnerabilities if v.get('source') == 'Bandit'),
-                'llm_found_issues': sum(1 for v in llm_vulnerabilities if v.get('source') == 'LLM Analysis'),
-            }
+        잘린 tool_use 블록에 tool_result로 답하면서 이미 받은 항목을 제외한
+        나머지만 다시 보고하도록 요청합니다.
+        
+        Args:
+            request: 원래 요청 딕셔너리
+            message: 잘린 응답 메시지
+            payload: 잘린 응답에서 추출한 도구 인자
+            
+        Returns:
+            이어 받은 취약점을 합친 도구 인자 딕셔너리
+        """
+        vulnerabilities = [v for v in payload.get('vulnerabilities', []) if isinstance(v, dict)]
+        overall_assessment = payload.get('overall_assessment', '')
+        params = self.build_message_params(request)
+        
+        for attempt in range(1, self.max_continuations + 1):
+            tool_use = next((b for b in message.content if getattr(b, 'type', None) == 'tool_use'), None)
+            if tool_use is None:
+                break
             
-            # 새로운 JSON 생성
-            merged_result = {
-                'vulnerabilities': llm_vulnerabilities,
-                'summary': summary,
-                'overall_assessment': parsed.get('overall_assessment', '보안 분석 완료')
-            }
+            print(f"   ↪ {request['custom_id']}: 응답이 잘려 이어서 요청합니다 "
+                  f"({attempt}/{self.max_continuations}, 수신된 취약점 {len(vulnerabilities)}개)")
+            
+            last_location = vulnerabilities[-1].get('location', '') if vulnerabilities else ''
+            params['messages'] = params['messages'] + [
+                {"role": "assistant", "content": [{
+                    "type": "tool_use",
+                    "id": tool_use.id,
+                    "name": tool_use.name,
+                    "input": tool_use.input if isinstance(tool_use.input, dict) else {},
+                }]},
+                {"role": "user", "content": [{
+                    "type": "tool_result",
+                    "tool_use_id": tool_use.id,
+                    "content": (
+                        f"출력 한도에 걸려 응답이 잘렸습니다. 취약점 {len(vulnerabilities)}개를 받았습니다"
+                        f"{f' (마지막 위치: {last_location})' if last_location else ''}. "
+                        "이미 보고한 취약점은 반복하지 말고, 나머지 취약점과 overall_assessment만 "
+                        f"{self.report_tool()['name']} 도구로 다시 보고하세요."
+                    ),
+                }]},
+            ]
+            
+            message = self.call_llm(**params)
+            usage = message.usage
+            if usage is not None:
+                print(f"   📏 {request['custom_id']} 이어받기: 입력 {usage.input_tokens:,}, 출력 {usage.output_tokens:,}")
             
-            return json.dumps(merged_result, ensure_ascii=False, indent=2)
+            continued = self.extract_tool_input(message, self.report_tool()['name'])
+            if not isinstance(continued, dict):
+                break
+            new_vulnerabilities = [v for v in continued.get('vulnerabilities', []) if isinstance(v, dict)]
+            vulnerabilities.extend(new_vulnerabilities)
+            if continued.get('overall_assessment'):
+                overall_assessment = continued['overall_assessment']
+            
+            # 새 항목이 없거나 잘리지 않았으면 종료
+            if message.stop_reason != 'max_tokens' or not new_vulnerabilities:
+                break
         
-        return llm_result
+        return {'vulnerabilities': vulnerabilities, 'overall_assessment': overall_assessment}
     
-    def create_tools_only_result(self, tool_vulnerabilities, semgrep_count, bandit_count):
+    def record_scan_history(self, vulnerabilities, project_name, project_path, stage_times):
         """
-        정적 분석 도구 결과만으로 JSON 생성 (LLM 실패 시)
+        이번 스캔을 SQLite 이력 저장소에 기록하고 최근 추이를 반환 (history_path가 없으면 None)
+        
+        묶음 발견은 개별 발견으로 펼쳐 내보내기와 같은 지문으로 기록합니다.
         
         Args:
-            tool_vulnerabilities: 도구 취약점 리스트
-            semgrep_count: Semgrep 발견 수
-            bandit_count: Bandit 발견 수
+            vulnerabilities: 취약점 리스트 (억제 주석 반영 후, 기준선 필터 전)
+            project_name: 프로젝트 이름 (이력 구분 키)
+            project_path: 스캔한 디렉토리
+            stage_times: {단계: 초}
             
         Returns:
-            JSON 문자열
+            trend() 결과 리스트 또는 None
         """
-        summary = {
-            'total_vulnerabilities': len(tool_vulnerabilities),
-            'critical': sum(1 for v in tool_vulnerabilities if v.get('severity') == 'Critical'),
-            'high': sum(1 for v in tool_vulnerabilities if v.get('severity') == 'High'),
-            'medium': sum(1 for v in tool_vulnerabilities if v.get('severity') == 'Medium'),
-            'low': sum(1 for v in tool_vulnerabilities if v.get('severity') == 'Low'),
-            'semgrep_issues': semgrep_count,
-            'bandit_issues': bandit_count,
-            'llm_found_issues': 0,
-        }
-        
-        result = {
-            'vulnerabilities': tool_vulnerabilities,
-            'summary': summary,
-            'overall_assessment': f'정적 분석 도구만 완료 (Semgrep: {semgrep_count}개, Bandit: {bandit_count}개) - LLM 분석 실패'
-        }
-        
-        return json.dumps(result, ensure_ascii=False, indent=2)
+        if not self.history_path:
+            return None
+        try:
+            if self.scan_history is None:
+                self.scan_history = ScanHistoryStore(self.history_path)
+            self.history_scan_id, counts = self.scan_history.record_scan(
+                project_name, os.path.abspath(project_path), self.export_records(vulnerabilities), stage_times)
+            trend = self.scan_history.trend(project_name, self.history_trend_limit)
+        except sqlite3.Error as e:
+            print(f"   ⚠ 스캔 이력 기록 실패: {e}")
+            self.history_scan_id = None
+            return None
+        new = sum(c['new'] for c in counts.values())
+        fixed = sum(c['fixed'] for c in counts.values())
+        print(f"   🗃️ 스캔 이력 기록: {self.history_path} (이력 {len(trend)}회, 직전 대비 신규 {new}개, 해결 {fixed}개)")
+        return trend
     
-    def parse_analysis_result(self, analysis_text):
+    def record_stage_time(self, stage, seconds):
         """
-        LLM의 분석 결과에서 JSON 데이터 추출
+        이력 기록 뒤에 끝난 단계의 실행 시간을 이번 스캔에 추가
+        """
+        if self.scan_history is None or self.history_scan_id is None:
+            return
+        try:
+            self.scan_history.record_stage(self.history_scan_id, stage, seconds)
+        except sqlite3.Error as e:
+            print(f"   ⚠ 단계 실행 시간 기록 실패: {e}")
+    
+    def render_history_trend(self, history):
+        """
+        보고서의 스캔 이력 추이 섹션 HTML (전체 개수 그래프, 심각도별 신규/해결/전체 표, 단계별 실행 시간 표)
         
         Args:
-            analysis_text: LLM의 분석 결과 텍스트
+            history: record_scan_history()의 추이 리스트
             
         Returns:
-            파싱된 JSON 딕셔너리
+            HTML 문자열 (이력이 없으면 빈 문자열)
         """
-        try:
-            # JSON 블록 찾기
-            start = analysis_text.find('{')
-            end = analysis_text.rfind('}') + 1
-            
-            if start != -1 and end > start:
-                json_str = analysis_text[start:end]
-                return json.loads(json_str)
-            else:
-                # JSON을 찾지 못한 경우 기본 구조 반환
-                return {
-                    "vulnerabilities": [],
-                    "summary": {
-                        "total_vulnerabilities": 0,
-                        "critical": 0,
-                        "high": 0,
-                        "medium": 0,
-                        "low": 0
-                    },
-                    "overall_assessment": analysis_text
-                }
-        except json.JSONDecodeError:
-            print("⚠ JSON 파싱 실패, 원본 텍스트 사용")
-            return {
-                "vulnerabilities": [],
-                "summary": {
-                    "total_vulnerabilities": 0,
-                    "critical": 0,
-                    "high": 0,
-                    "medium": 0,
-                    "low": 0
-                },
-                "overall_assessment": analysis_text
-            }
+        if not history:
+            return ""
+        
+        width, height = 600, 120
+        peak = max(scan['total'] for scan in history) or 1
+        step = width / max(1, len(history) - 1)
+        points = " ".join(f"{i * step:.1f},{height - scan['total'] / peak * (height - 10):.1f}"
+                          for i, scan in enumerate(history))
+        chart = (f'<svg class="history-chart" viewBox="-5 0 {width + 10} {height + 5}" width="100%" height="{height + 5}">'
+                 f'<polyline fill="none" stroke="#667eea" stroke-width="2" points="{points}"/></svg>')
+        
+        severity_headers = "".join(f"<th>{severity}<br>전체 / 신규 / 해결</th>" for severity in REPORT_SEVERITY_COLORS)
+        severity_rows = []
+        for scan in reversed(history):
+            cells = []
+            for severity in REPORT_SEVERITY_COLORS:
+                counts = scan['severities'].get(severity, {'total': 0, 'new': 0, 'fixed': 0})
+                cells.append(f"<td>{counts['total']} / +{counts['new']} / -{counts['fixed']}</td>")
+            new = sum(c['new'] for c in scan['severities'].values())
+            fixed = sum(c['fixed'] for c in scan['severities'].values())
+            severity_rows.append(f"<tr><td>{html.escape(scan['scanned_at'])}</td><td>{scan['total']}</td>"
+                                 f"<td>+{new} / -{fixed}</td>{''.join(cells)}</tr>")
+        
+        stages = []
+        for scan in history:
+            for stage in scan['stages']:
+                if stage not in stages:
+                    stages.append(stage)
+        stage_rows = "".join(
+            f"<tr><td>{html.escape(scan['scanned_at'])}</td>"
+            + "".join(f"<td>{scan['stages'][stage]:.2f}s</td>" if stage in scan['stages'] else "<td>-</td>"
+                      for stage in stages)
+            + f"<td>{sum(scan['stages'].values()):.2f}s</td></tr>"
+            for scan in reversed(history))
+        
+        return f"""
+        <div class="project-info">
+            <h2>📈 스캔 이력 추이 (최근 {len(history)}회)</h2>
+            <p>전체 발견 수 (최대 {peak}개)</p>
+            {chart}
+            <h3>심각도별 전체 / 신규 / 해결</h3>
+            <table class="history-table">
+                <tr><th>스캔 시각</th><th>전체</th><th>신규 / 해결</th>{severity_headers}</tr>
+                {''.join(severity_rows)}
+            </table>
+            <h3>단계별 실행 시간</h3>
+            <table class="history-table">
+                <tr><th>스캔 시각</th>{''.join(f'<th>{html.escape(stage)}</th>' for stage in stages)}<th>합계</th></tr>
+                {stage_rows}
+            </table>
+        </div>
+"""
     
-    def generate_html_report(self, analysis_data, semgrep_data, bandit_data, output_path="security_report.html"):
+    def render_tool_summaries(self, semgrep_data, bandit_data):
         """
-        분석 결과를 HTML 보고서로 생성
+        보고서의 Semgrep/Bandit 요약 섹션 HTML
         
         Args:
-            analysis_data: 파싱된 LLM 분석 결과 딕셔너리
             semgrep_data: Semgrep 분석 결과
             bandit_data: Bandit 분석 결과
-            output_path: 출력 파일 경로
+            
+        Returns:
+            HTML 문자열
         """
-        vulnerabilities = analysis_data.get("vulnerabilities", [])
-        summary = analysis_data.get("summary", {})
-        assessment = analysis_data.get("overall_assessment", "")
-        project_info = analysis_data.get("project_info", {})
-        
-        # 심각도별 색상
-        severity_colors = {
-            "Critical": "#dc3545",
-            "High": "#fd7e14",
-            "Medium": "#ffc107",
-            "Low": "#28a745"
-        }
-        
         # Semgrep 요약 HTML
         semgrep_summary_html = ""
         if semgrep_data:
@@ -1038,439 +6414,566 @@ class IntegratedSecurityAnalyzer:
             </div>
             """
         
-        # Bandit 요약 HTML
-        bandit_summary_html = ""
-        if bandit_data:
-            bandit_metrics = bandit_data.get('metrics', {}).get('_totals', {})
-            bandit_issues_count = len(bandit_data.get('results', []))
-            
-            bandit_summary_html = f"""
-            <div class="bandit-summary">
-                <h2>🔍 Bandit 정적 분석 요약 (Python)</h2>
-                <div class="tool-stats">
-                    <div class="stat-item">
-                        <span class="stat-label">발견된 이슈</span>
-                        <span class="stat-value">{bandit_issues_count}개</span>
-                    </div>
-                    <div class="stat-item high">
-                        <span class="stat-label">HIGH</span>
-                        <span class="stat-value">{bandit_metrics.get('SEVERITY.HIGH', 0)}개</span>
-                    </div>
-                    <div class="stat-item medium">
-                        <span class="stat-label">MEDIUM</span>
-                        <span class="stat-value">{bandit_metrics.get('SEVERITY.MEDIUM', 0)}개</span>
-                    </div>
-                    <div class="stat-item low">
-                        <span class="stat-label">LOW</span>
-                        <span class="stat-value">{bandit_metrics.get('SEVERITY.LOW', 0)}개</span>
-                    </div>
-                </div>
-            </div>
-            """
-        
-        # 프로젝트 정보 HTML
-        project_info_html = ""
-        if project_info:
-            project_info_html = f"""
-            <div class="project-info">
-                <h2>📁 프로젝트 정보</h2>
-                <div class="info-grid">
-                    <div class="info-item">
-                        <span class="info-label">프로젝트명:</span>
-                        <span class="info-value">{project_info.get('name', 'N/A')}</span>
-                    </div>
-                    <div class="info-item">
-                        <span class="info-label">경로:</span>
-                        <span class="info-value">{project_info.get('path', 'N/A')}</span>
-                    </div>
-                    <div class="info-item">
-                        <span class="info-label">총 파일:</span>
-                        <span class="info-value">{project_info.get('total_files', 0)}개</span>
-                    </div>
-                    <div class="info-item">
-                        <span class="info-label">프론트엔드:</span>
-                        <span class="info-value">{project_info.get('frontend_files', 0)}개</span>
-                    </div>
-                    <div class="info-item">
-                        <span class="info-label">백엔드:</span>
-                        <span class="info-value">{project_info.get('backend_files', 0)}개</span>
-                    </div>
-                    <div class="info-item">
-                        <span class="info-label">Python 파일:</span>
-                        <span class="info-value">{project_info.get('python_files', 0)}개</span>
-                    </div>
-                </div>
-            </div>
-            """
-        
-        # 취약점 HTML 생성
-        vulnerabilities_html = ""
-        for idx, vuln in enumerate(vulnerabilities, 1):
-            severity = vuln.get("severity", "Medium")
-            color = severity_colors.get(severity, "#6c757d")
-            source = vuln.get("source", "LLM Analysis")
-            
-            # 소스 뱃지 색상
-            source_badge_colors = {
-                "Semgrep": "#00d4ff",
-                "Bandit": "#ff4785",
-                "LLM Analysis": "#6f42c1"
-            }
-            source_badge_color = source_badge_colors.get(source, "#6c757d")
-            
-            # 코드 스니펫 HTML 이스케이프 처리
-            code_snippet = html.escape(vuln.get('code_snippet', 'N/A'))
-            
-            vulnerabilities_html += f"""
-            <div class="vulnerability-card">
-                <div class="vulnerability-header">
-                    <div>
-                        <h3>#{idx} {html.escape(vuln.get('title', 'Unknown'))}</h3>
-                        <span class="source-badge" style="background-color: {source_badge_color};">
-                            {source}
-                        </span>
-                    </div>
-                    <span class="severity-badge" style="background-color: {color};">
-                        {severity}
-                    </span>
-                </div>
-                <div class="vulnerability-body">
-                    <p><strong>카테고리:</strong> {html.escape(vuln.get('category', 'N/A'))}</p>
-                    <p><strong>위치:</strong> <code>{html.escape(vuln.get('location', 'N/A'))}</code></p>
-                    
-                    <div class="section">
-                        <h4>설명</h4>
-                        <p>{html.escape(vuln.get('description', 'N/A'))}</p>
-                    </div>
-                    
-                    <div class="section">
-                        <h4>영향</h4>
-                        <p>{html.escape(vuln.get('impact', 'N/A'))}</p>
-                    </div>
-                    
-                    <div class="section">
-                        <h4>문제 코드</h4>
-                        <pre><code>{code_snippet}</code></pre>
-                    </div>
-                    
-                    <div class="section recommendation">
-                        <h4>수정 방안</h4>
-                        <p>{html.escape(vuln.get('recommendation', 'N/A'))}</p>
-                    </div>
-                    
-                    {f'<p class="cwe"><strong>CWE ID:</strong> {html.escape(vuln.get("cwe_id", ""))}</p>' if vuln.get('cwe_id') else ''}
-                </div>
-            </div>
-            """
-        
-        # HTML 템플릿
-        html_template = f"""
-<!DOCTYPE html>
-<html lang="ko">
-<head>
-    <meta charset="UTF-8">
-    <meta name="viewport" content="width=device-width, initial-scale=1.0">
-    <title>통합 보안 취약점 분석 보고서</title>
-    <style>
-        * {{
-            margin: 0;
-            padding: 0;
-            box-sizing: border-box;
-        }}
-        
-        body {{
-            font-family: 'Segoe UI', Tahoma, Geneva, Verdana, sans-serif;
-            line-height: 1.6;
-            color: #333;
-            background-color: #f5f5f5;
-            padding: 20px;
-        }}
-        
-        .container {{
-            max-width: 1200px;
-            margin: 0 auto;
-            background-color: white;
-            box-shadow: 0 0 20px rgba(0,0,0,0.1);
-            border-radius: 8px;
-            overflow: hidden;
-        }}
-        
-        .header {{
-            background: linear-gradient(135deg, #667eea 0%, #764ba2 100%);
-            color: white;
-            padding: 40px;
-            text-align: center;
-        }}
-        
-        .header h1 {{
-            font-size: 2.5em;
-            margin-bottom: 10px;
-        }}
-        
-        .header .subtitle {{
-            font-size: 1.2em;
-            opacity: 0.9;
-            margin-bottom: 10px;
-        }}
-        
-        .header .date {{
-            opacity: 0.9;
-            font-size: 0.9em;
-        }}
-        
-        .semgrep-summary {{
-            padding: 30px;
-            background: linear-gradient(135deg, #4facfe 0%, #00f2fe 100%);
-            color: white;
-        }}
-        
-        .semgrep-summary h2 {{
-            margin-bottom: 20px;
-            font-size: 1.5em;
-        }}
-        
-        .bandit-summary {{
-            padding: 30px;
-            background: linear-gradient(135deg, #f093fb 0%, #f5576c 100%);
-            color: white;
-        }}
-        
-        .bandit-summary h2 {{
-            margin-bottom: 20px;
-            font-size: 1.5em;
-        }}
-        
-        .tool-stats {{
-            display: grid;
-            grid-template-columns: repeat(auto-fit, minmax(150px, 1fr));
-            gap: 15px;
-        }}
-        
-        .stat-item {{
-            background: rgba(255, 255, 255, 0.2);
-            padding: 15px;
-            border-radius: 8px;
-            text-align: center;
-            backdrop-filter: blur(10px);
-        }}
-        
-        .stat-label {{
-            display: block;
-            font-size: 0.9em;
-            margin-bottom: 5px;
-            opacity: 0.9;
-        }}
-        
-        .stat-value {{
-            display: block;
-            font-size: 1.8em;
-            font-weight: bold;
-        }}
-        
-        .project-info {{
-            padding: 30px;
-            background-color: #f8f9fa;
-            border-bottom: 1px solid #e0e0e0;
-        }}
-        
-        .project-info h2 {{
-            color: #667eea;
-            margin-bottom: 20px;
-            font-size: 1.5em;
-        }}
-        
-        .info-grid {{
-            display: grid;
-            grid-template-columns: repeat(auto-fit, minmax(250px, 1fr));
-            gap: 15px;
-        }}
-        
-        .info-item {{
-            background: white;
-            padding: 15px;
-            border-radius: 6px;
-            box-shadow: 0 2px 4px rgba(0,0,0,0.05);
-        }}
-        
-        .info-label {{
-            font-weight: bold;
-            color: #666;
-            display: block;
-            margin-bottom: 5px;
-            font-size: 0.9em;
-        }}
-        
-        .info-value {{
-            color: #333;
-            font-size: 1.1em;
-        }}
-        
-        .summary {{
-            display: grid;
-            grid-template-columns: repeat(auto-fit, minmax(200px, 1fr));
-            gap: 20px;
-            padding: 30px;
-            background-color: #f8f9fa;
-        }}
-        
-        .summary-card {{
-            background: white;
-            padding: 20px;
-            border-radius: 8px;
-            text-align: center;
-            box-shadow: 0 2px 4px rgba(0,0,0,0.1);
-        }}
-        
-        .summary-card .number {{
-            font-size: 2.5em;
-            font-weight: bold;
-            margin: 10px 0;
-        }}
-        
-        .summary-card .label {{
-            color: #666;
-            font-size: 0.9em;
-        }}
-        
-        .summary-card.critical .number {{ color: #dc3545; }}
-        .summary-card.high .number {{ color: #fd7e14; }}
-        .summary-card.medium .number {{ color: #ffc107; }}
-        .summary-card.low .number {{ color: #28a745; }}
-        .summary-card.total .number {{ color: #667eea; }}
-        
-        .assessment {{
-            padding: 30px;
-            background-color: #fff3cd;
-            border-left: 4px solid #ffc107;
-            margin: 20px 30px;
-            white-space: pre-line;
-        }}
-        
-        .assessment h2 {{
-            color: #856404;
-            margin-bottom: 15px;
-        }}
-        
-        .content {{
-            padding: 30px;
-        }}
+        # Bandit 요약 HTML
+        bandit_summary_html = ""
+        if bandit_data:
+            bandit_metrics = bandit_data.get('metrics', {}).get('_totals', {})
+            bandit_issues_count = len(bandit_data.get('results', []))
+            
+            bandit_summary_html = f"""
+            <div class="bandit-summary">
+                <h2>🔍 Bandit 정적 분석 요약 (Python)</h2>
+                <div class="tool-stats">
+                    <div class="stat-item">
+                        <span class="stat-label">발견된 이슈</span>
+                        <span class="stat-value">{bandit_issues_count}개</span>
+                    </div>
+                    <div class="stat-item high">
+                        <span class="stat-label">HIGH</span>
+                        <span class="stat-value">{bandit_metrics.get('SEVERITY.HIGH', 0)}개</span>
+                    </div>
+                    <div class="stat-item medium">
+                        <span class="stat-label">MEDIUM</span>
+                        <span class="stat-value">{bandit_metrics.get('SEVERITY.MEDIUM', 0)}개</span>
+                    </div>
+                    <div class="stat-item low">
+                        <span class="stat-label">LOW</span>
+                        <span class="stat-value">{bandit_metrics.get('SEVERITY.LOW', 0)}개</span>
+                    </div>
+                </div>
+            </div>
+            """
         
-        .vulnerability-card {{
-            background: white;
-            border: 1px solid #e0e0e0;
-            border-radius: 8px;
-            margin-bottom: 20px;
-            overflow: hidden;
-            transition: box-shadow 0.3s;
-        }}
+        return semgrep_summary_html + bandit_summary_html
+    
+    def render_project_info(self, project_info):
+        """
+        보고서의 프로젝트 정보 섹션 HTML (프롬프트 절감, 기준선 통계 포함)
         
-        .vulnerability-card:hover {{
-            box-shadow: 0 4px 12px rgba(0,0,0,0.15);
-        }}
+        Args:
+            project_info: 프로젝트 정보 딕셔너리
+            
+        Returns:
+            HTML 문자열 (정보가 없으면 빈 문자열)
+        """
+        if not project_info:
+            return ""
+        
+        prompt_savings_html = ""
+        minify = project_info.get('minify')
+        if minify:
+            prompt_savings_html += f"""
+                <div class="info-item">
+                    <span class="info-label">소스 축소:</span>
+                    <span class="info-value">토큰 ~{minify['original_tokens']:,} → ~{minify['minified_tokens']:,} (압축률 {minify['ratio']:.0%}, ~{minify['tokens_saved']:,} 절감)</span>
+                </div>"""
+        output_tokens = project_info.get('output_tokens')
+        if output_tokens and output_tokens['output_tokens']:
+            prompt_savings_html += f"""
+                <div class="info-item">
+                    <span class="info-label">LLM 출력 토큰:</span>
+                    <span class="info-value">{output_tokens['output_tokens']:,} (발견당 ~{output_tokens['per_finding']:,.0f}{', 압축 응답' if output_tokens['compact'] else ''})</span>
+                </div>"""
+        near_duplicates = project_info.get('near_duplicates')
+        if near_duplicates:
+            prompt_savings_html += f"""
+                <div class="info-item">
+                    <span class="info-label">유사 파일 클러스터링:</span>
+                    <span class="info-value">{near_duplicates['clusters']}개 클러스터 / {near_duplicates['members']}개 파일 / 토큰 ~{near_duplicates['tokens_saved']:,} 절감</span>
+                </div>"""
+        baseline = project_info.get('baseline')
+        if baseline and 'new' in baseline:
+            prompt_savings_html += f"""
+                <div class="info-item">
+                    <span class="info-label">기준선 비교:</span>
+                    <span class="info-value">신규 {baseline['new']}개 / 유지 {baseline['unchanged']}개 / 해결 {baseline['fixed']}개 / 억제 {baseline['suppressed']}개</span>
+                </div>"""
+        elif baseline:
+            prompt_savings_html += f"""
+                <div class="info-item">
+                    <span class="info-label">억제 주석:</span>
+                    <span class="info-value">{baseline['suppressed']}개 제외</span>
+                </div>"""
+        return f"""
+        <div class="project-info">
+            <h2>📁 프로젝트 정보</h2>
+            <div class="info-grid">
+                <div class="info-item">
+                    <span class="info-label">프로젝트명:</span>
+                    <span class="info-value">{project_info.get('name', 'N/A')}</span>
+                </div>
+                <div class="info-item">
+                    <span class="info-label">경로:</span>
+                    <span class="info-value">{project_info.get('path', 'N/A')}</span>
+                </div>
+                <div class="info-item">
+                    <span class="info-label">총 파일:</span>
+                    <span class="info-value">{project_info.get('total_files', 0)}개</span>
+                </div>
+                <div class="info-item">
+                    <span class="info-label">프론트엔드:</span>
+                    <span class="info-value">{project_info.get('frontend_files', 0)}개</span>
+                </div>
+                <div class="info-item">
+                    <span class="info-label">백엔드:</span>
+                    <span class="info-value">{project_info.get('backend_files', 0)}개</span>
+                </div>
+                <div class="info-item">
+                    <span class="info-label">Python 파일:</span>
+                    <span class="info-value">{project_info.get('python_files', 0)}개</span>
+                </div>
+                {prompt_savings_html}
+            </div>
+        </div>
+        """
+    
+    def render_finding_card(self, idx, vuln):
+        """
+        취약점 한 건의 카드 HTML
         
-        .vulnerability-header {{
-            background-color: #f8f9fa;
-            padding: 20px;
-            display: flex;
-            justify-content: space-between;
-            align-items: center;
-            border-bottom: 1px solid #e0e0e0;
-        }}
+        Args:
+            idx: 카드 번호
+            vuln: 취약점
+            
+        Returns:
+            HTML 문자열
+        """
+        vuln = self.expand_finding_text(vuln)
+        severity = vuln.get("severity", "Medium")
+        color = REPORT_SEVERITY_COLORS.get(severity, "#6c757d")
+        source = vuln.get("source", "LLM Analysis")
+        source_badge_color = REPORT_SOURCE_COLORS.get(source, "#6c757d")
+        
+        # 코드 스니펫 HTML 이스케이프 처리
+        code_snippet = html.escape(vuln.get('code_snippet', 'N/A'))
+        
+        # 상관 클러스터: 합의한 엔진 뱃지와 멤버 발견 목록
+        engine_badges = ""
+        correlation_html = ""
+        if vuln.get('correlated'):
+            engine_badges = "".join(
+                f'\n                        <span class="source-badge" style="background-color: {REPORT_SOURCE_COLORS.get(engine, "#6c757d")};">{html.escape(engine)}</span>'
+                for engine in vuln.get('engines', []) if engine != source
+            )
+            members = "".join(
+                f"<li>{html.escape(m['source'])} {html.escape(m.get('rule_id') or '')} "
+                f"<code>{html.escape(m.get('location') or '')}</code> "
+                f"({html.escape(m.get('cwe_id') or 'CWE 없음')}, {html.escape(m.get('severity') or '')})</li>"
+                for m in vuln['correlated']
+            )
+            correlation_html = f"""
+                <div class="section correlation">
+                    <h4>🤝 엔진 합의: {html.escape(', '.join(vuln.get('engines', [])))} (결합 신뢰도 {vuln.get('combined_confidence', 0):.0%})</h4>
+                    <ul>{members}</ul>
+                </div>"""
+        
+        return f"""
+        <div class="vulnerability-card">
+            <div class="vulnerability-header">
+                <div>
+                    <h3>#{idx} {html.escape(vuln.get('title', 'Unknown'))}</h3>
+                    <span class="source-badge" style="background-color: {source_badge_color};">
+                        {source}
+                    </span>{engine_badges}
+                </div>
+                <span class="severity-badge" style="background-color: {color};">
+                    {severity}
+                </span>
+            </div>
+            <div class="vulnerability-body">
+                <p><strong>카테고리:</strong> {html.escape(vuln.get('category', 'N/A'))}</p>
+                <p><strong>위치:</strong> <code>{html.escape(vuln.get('location', 'N/A'))}</code></p>
+                {f'<p><strong>반복 위치 ({vuln["occurrence_count"]}곳):</strong> 라인 {html.escape(self.format_repeat_lines(vuln.get("lines", [])))}</p>' if vuln.get('occurrence_count') else ''}
+                
+                <div class="section">
+                    <h4>설명</h4>
+                    <p>{html.escape(vuln.get('description', 'N/A'))}</p>
+                </div>
+                
+                <div class="section">
+                    <h4>영향</h4>
+                    <p>{html.escape(vuln.get('impact', 'N/A'))}</p>
+                </div>
+                
+                <div class="section">
+                    <h4>문제 코드</h4>
+                    <pre><code>{code_snippet}</code></pre>
+                </div>
+                
+                <div class="section recommendation">
+                    <h4>수정 방안</h4>
+                    <p>{html.escape(vuln.get('recommendation', 'N/A'))}</p>
+                </div>
+                
+                {correlation_html}
+                {f'<p class="cwe"><strong>CWE ID:</strong> {html.escape(vuln.get("cwe_id", ""))}</p>' if vuln.get('cwe_id') else ''}
+            </div>
+        </div>
+        """
+    
+    def write_virtual_findings(self, f, vulnerabilities):
+        """
+        가상 스크롤 보고서의 발견 목록 작성 (필터 막대, 스크롤 영역, JSON 데이터, 스크립트)
         
-        .vulnerability-header h3 {{
-            color: #333;
-            font-size: 1.3em;
-            margin-bottom: 8px;
-        }}
+        발견은 {"fields", "rows", "strings"} 형태의 JSON 하나로 넣습니다. 반복되는 문자열(경로, 템플릿 문장 등)은
+        strings 표에 한 번만 두고 행은 그 번호만 가지므로, 카드 HTML보다 파일이 훨씬 작습니다.
+        행은 report_chunk_cards개씩 모아 스트리밍합니다.
         
-        .severity-badge {{
-            padding: 5px 15px;
-            border-radius: 20px;
-            color: white;
-            font-weight: bold;
-            font-size: 0.9em;
-        }}
+        Args:
+            f: 보고서 파일 객체
+            vulnerabilities: 취약점 리스트
+            
+        Returns:
+            작성한 발견 수
+        """
+        severity_options = "".join(f'<option value="{severity}">{severity}</option>' for severity in REPORT_SEVERITY_COLORS)
+        f.write(f"""
+            <div class="filter-bar">
+                <select id="filter-severity"><option value="">모든 심각도</option>{severity_options}</select>
+                <select id="filter-source"><option value="">모든 출처</option></select>
+                <select id="filter-cwe"><option value="">모든 CWE</option></select>
+                <input id="filter-path" type="search" placeholder="경로 필터 (예: api/)">
+                <span class="filter-count" id="filter-count"></span>
+            </div>
+            <div class="finding-viewport" id="finding-viewport"><div id="finding-spacer" style="position: relative;"></div></div>
+            <div class="finding-detail" id="finding-detail"><p>행을 클릭하면 상세 내용이 표시됩니다.</p></div>
+            <script type="application/json" id="findings-data">""")
+        
+        strings = {}
+        
+        def ref(text):
+            return strings.setdefault(text, len(strings))
+        
+        def dumps(value):
+            # </script>가 데이터 안에서 스크립트를 닫지 않도록 "</"를 이스케이프
+            return json.dumps(value, ensure_ascii=False, separators=(',', ':')).replace('</', '<\\/')
+        
+        f.write('{"fields":' + dumps(VIRTUAL_REPORT_FIELDS) + ',"colors":' + dumps(REPORT_SEVERITY_COLORS) + ',"rows":[')
+        chunk = []
+        count = 0
+        for vuln in vulnerabilities:
+            vuln = self.expand_finding_text(vuln)
+            values = {
+                'engines': ", ".join(vuln.get('engines', [])),
+                'repeat_lines': self.format_repeat_lines(vuln.get('lines', [])) if vuln.get('occurrence_count') else '',
+            }
+            row = [ref(str(values[field] if field in values else vuln.get(field) or '')) for field in VIRTUAL_REPORT_FIELDS]
+            chunk.append(("," if count else "") + dumps(row))
+            count += 1
+            if len(chunk) >= self.report_chunk_cards:
+                f.write("".join(chunk))
+                chunk.clear()
+        f.write("".join(chunk))
+        f.write('],"strings":' + dumps(list(strings)) + '}</script>')
+        f.write(f"\n            <script>{VIRTUAL_REPORT_SCRIPT}</script>\n")
+        return count
+    
+    def export_records(self, vulnerabilities):
+        """
+        내보내기용 발견 레코드를 한 건씩 생성 (묶음 발견은 원래 발견으로 펼침)
         
-        .source-badge {{
-            padding: 3px 10px;
-            border-radius: 12px;
-            color: white;
-            font-size: 0.75em;
-            font-weight: bold;
-            display: inline-block;
-            margin-left: 10px;
-        }}
+        각 레코드는 발견 필드에 전체 경로(full_path)와 스캔 간 안정적인 지문(fingerprint, 기준선과 같은 값)을 더한 딕셔너리이며,
+        code_snippet은 라인 번호 접두사를 뗀 코드만 담습니다 (라인은 line 필드).
         
-        .vulnerability-body {{
-            padding: 20px;
-        }}
+        Args:
+            vulnerabilities: 취약점 리스트
+        """
+        for vuln in vulnerabilities:
+            for occurrence in vuln.get('occurrences') or (vuln,):
+                expanded = self.expand_finding_text(occurrence)
+                record = expanded.to_dict() if isinstance(expanded, Finding) else dict(expanded)
+                for key in ('occurrences', 'lines', 'occurrence_count'):
+                    record.pop(key, None)
+                record['full_path'] = os.path.abspath(record['file_path']) if record.get('file_path') else ''
+                record['code_snippet'] = FindingIndex.clean_snippet(record.get('code_snippet'))
+                record['fingerprint'] = self.baseline_fingerprint(occurrence)
+                yield record
+    
+    def export_findings(self, vulnerabilities):
+        """
+        설정된 형식(SARIF, NDJSON, CSV)으로 발견을 스트리밍 내보내기
         
-        .section {{
-            margin: 15px 0;
-        }}
+        모든 내보내기 파일을 먼저 열고 발견을 한 번만 훑으며 각 파일에 한 건씩 씁니다.
+        결과 전체를 다시 직렬화하지 않으므로 추가 메모리는 발견 한 건 분량입니다.
         
-        .section h4 {{
-            color: #667eea;
-            margin-bottom: 8px;
-            font-size: 1.1em;
-        }}
+        Args:
+            vulnerabilities: 취약점 리스트
+            
+        Returns:
+            {형식: 내보낸 발견 수}
+        """
+        targets = [(SarifExporter, self.export_sarif_path), (NdjsonExporter, self.export_ndjson_path),
+                   (CsvExporter, self.export_csv_path)]
+        exporters = []
+        try:
+            for exporter_class, path in targets:
+                if not path:
+                    continue
+                if exporter_class is SarifExporter:
+                    exporters.append(SarifExporter(path, root=self.scan_root))
+                else:
+                    exporters.append(exporter_class(path))
+            for record in self.export_records(vulnerabilities):
+                for exporter in exporters:
+                    exporter.write(record)
+        except OSError as e:
+            print(f"⚠ 발견 내보내기 실패: {e}")
+        finally:
+            for exporter in exporters:
+                exporter.close()
+        
+        for exporter in exporters:
+            target = "표준 출력" if exporter.path == '-' else exporter.path
+            print(f"✓ {exporter.FORMAT} 내보내기 완료: {target} ({exporter.count}개)")
+        return {exporter.FORMAT: exporter.count for exporter in exporters}
+    
+    def write_findings(self, f, vulnerabilities):
+        """
+        취약점 목록 본문을 파일에 스트리밍 (report_template에 따라 카드 또는 가상 스크롤 목록)
         
-        .recommendation {{
-            background-color: #d4edda;
-            padding: 15px;
-            border-radius: 4px;
-            border-left: 4px solid #28a745;
-        }}
+        Args:
+            f: 보고서 파일 객체
+            vulnerabilities: 취약점 리스트
+            
+        Returns:
+            작성한 발견 수
+        """
+        if self.report_template == 'virtual':
+            count = self.write_virtual_findings(f, vulnerabilities)
+        else:
+            chunk = []
+            count = 0
+            for idx, vuln in enumerate(vulnerabilities, 1):
+                chunk.append(self.render_finding_card(idx, vuln))
+                count += 1
+                if len(chunk) >= self.report_chunk_cards:
+                    f.write("".join(chunk))
+                    chunk.clear()
+            f.write("".join(chunk))
+        if not count:
+            f.write("<p>발견된 취약점이 없습니다.</p>")
+        return count
+    
+    def report_directory(self, file_path):
+        """
+        분할 보고서의 디렉토리 키 (scan_root 기준 상대 디렉토리, 경로가 없으면 '(경로 없음)')
+        """
+        if not file_path:
+            return '(경로 없음)'
+        directory = os.path.dirname(file_path)
+        if self.scan_root:
+            try:
+                directory = os.path.relpath(directory, self.scan_root)
+            except ValueError:
+                pass
+        return directory.replace(os.sep, '/')
+    
+    def plan_report_shards(self, store):
+        """
+        분할 보고서의 샤드 목록 계산 (발견 저장소의 인덱스로 심각도/디렉토리별 발견 조회)
         
-        .recommendation h4 {{
-            color: #155724;
-        }}
+        Args:
+            store: FindingStore
+            
+        Returns:
+            [{'key', 'file', 'title', 'findings'}, ...]
+        """
+        shards = []
+        if self.report_shards == 'severity':
+            severities = list(REPORT_SEVERITY_COLORS) + sorted(set(store.values('severity')) - set(REPORT_SEVERITY_COLORS))
+            for severity in severities:
+                findings = store.query(severity=severity)
+                if findings:
+                    name = re.sub(r'[^a-z0-9]+', '-', (severity or 'none').lower()).strip('-') or 'none'
+                    shards.append({'key': severity, 'file': f"severity-{name}.html",
+                                   'title': f"심각도 {severity or '(없음)'}", 'findings': findings})
+        else:
+            directories = {}
+            for file_path in store.values('file_path'):
+                directories.setdefault(self.report_directory(file_path), []).append(file_path)
+            for directory in sorted(directories):
+                findings = store.query(file_path=directories[directory])
+                slug = re.sub(r'[^A-Za-z0-9]+', '-', directory).strip('-')[:40] or 'root'
+                digest = hashlib.sha1(directory.encode('utf-8')).hexdigest()[:8]
+                shards.append({'key': directory, 'file': f"dir-{slug}-{digest}.html",
+                               'title': f"디렉토리 {directory}", 'findings': findings})
+        return shards
+    
+    def shard_content_hash(self, shard):
+        """
+        샤드 내용 해시 (발견 필드와 보고서 템플릿/언어) - 증분 스캔에서 바뀌지 않은 샤드를 건너뛰는 데 사용
+        """
+        digest = hashlib.sha1(f"{self.report_template}|{self.report_language}|{shard['title']}".encode('utf-8'))
+        for vuln in shard['findings']:
+            record = vuln.to_dict() if isinstance(vuln, Finding) else vuln
+            digest.update(json.dumps(record, sort_keys=True, ensure_ascii=False, default=str).encode('utf-8'))
+        return digest.hexdigest()
+    
+    def write_report_shard(self, shard, path, index_name):
+        """
+        샤드 페이지 하나를 작성 (임시 파일에 쓴 뒤 교체)
         
-        code {{
-            background-color: #f4f4f4;
-            padding: 2px 6px;
-            border-radius: 3px;
-            font-family: 'Courier New', monospace;
-        }}
+        Args:
+            shard: plan_report_shards()의 샤드
+            path: 샤드 파일 경로
+            index_name: 색인 페이지 파일명 (돌아가기 링크)
+        """
+        store = FindingStore(shard['findings'])
+        shard_data = {
+            'summary': store.summary(),
+            'overall_assessment': f"{shard['title']}: 발견 {len(store)}개",
+        }
+        navigation = f'<p class="shard-nav"><a href="../{html.escape(index_name)}">← 색인으로 돌아가기</a></p>'
+        temp_path = f"{path}.tmp"
+        with open(temp_path, 'w', encoding='utf-8', buffering=REPORT_WRITE_BUFFER) as f:
+            f.write(self.render_report_header(shard_data, None, None, navigation=navigation))
+            self.write_findings(f, store.records)
+            f.write(self.render_report_footer())
+        os.replace(temp_path, path)
+    
+    def render_shard_index(self, store, shards, shard_dir_name):
+        """
+        분할 보고서 색인 페이지의 샤드 표 HTML (심각도별, 디렉토리별 개수와 샤드 링크)
         
-        pre {{
-            background-color: #282c34;
-            color: #abb2bf;
-            padding: 15px;
-            border-radius: 4px;
-            overflow-x: auto;
-            margin: 10px 0;
-        }}
+        Args:
+            store: 전체 발견의 FindingStore
+            shards: plan_report_shards()의 샤드 목록
+            shard_dir_name: 샤드 디렉토리 이름 (색인 기준 상대 경로)
+            
+        Returns:
+            HTML 문자열
+        """
+        links = {shard['key']: f"{shard_dir_name}/{shard['file']}" for shard in shards}
+        
+        def cell(text, key, linked):
+            text = html.escape(str(text))
+            if linked and key in links:
+                return f'<a href="{html.escape(links[key])}">{text}</a>'
+            return text
+        
+        by_severity = self.report_shards == 'severity'
+        severity_rows = "".join(
+            f"<tr><td>{cell(severity, severity, by_severity)}</td><td>{count}</td></tr>"
+            for severity, count in sorted(store.occurrence_values('severity').items(),
+                                          key=lambda item: SEVERITY_ORDER.get(item[0], 0), reverse=True))
+        
+        directory_counts = {}
+        for vuln in store:
+            counts = directory_counts.setdefault(self.report_directory(vuln.get('file_path')), {})
+            for occurrence in vuln.get('occurrences') or (vuln,):
+                counts[occurrence.get('severity')] = counts.get(occurrence.get('severity'), 0) + 1
+        directory_rows = "".join(
+            f"<tr><td>{cell(directory, directory, not by_severity)}</td><td>{sum(counts.values())}</td>"
+            + "".join(f"<td>{counts.get(severity, 0)}</td>" for severity in REPORT_SEVERITY_COLORS) + "</tr>"
+            for directory, counts in sorted(directory_counts.items()))
+        severity_headers = "".join(f"<th>{severity}</th>" for severity in REPORT_SEVERITY_COLORS)
+        
+        return f"""
+            <p>발견 {store.occurrence_total}개를 {'심각도' if by_severity else '디렉토리'}별 페이지 {len(shards)}개로 나누었습니다. 링크를 누르면 해당 페이지를 엽니다.</p>
+            <h3>심각도별</h3>
+            <table class="shard-table">
+                <tr><th>심각도</th><th>발견</th></tr>
+                {severity_rows}
+            </table>
+            <h3>디렉토리별</h3>
+            <table class="shard-table">
+                <tr><th>디렉토리</th><th>전체</th>{severity_headers}</tr>
+                {directory_rows}
+            </table>
+"""
+    
+    def generate_sharded_report(self, analysis_data, semgrep_data, bandit_data, output_path):
+        """
+        분할 보고서 생성: 가벼운 색인 페이지(요약, 심각도/디렉토리별 개수)와 샤드 페이지들
         
-        pre code {{
-            background: none;
-            padding: 0;
-            color: inherit;
-        }}
+        샤드는 <보고서 이름>_shards/ 디렉토리에 report_shard_workers개 스레드로 동시에 작성합니다.
+        manifest.json에 샤드별 내용 해시를 기록하여, 다음 스캔에서 내용이 같은 샤드는 다시 쓰지 않고
+        더 이상 없는 샤드 파일은 지웁니다.
         
-        .cwe {{
-            margin-top: 10px;
-            color: #666;
-            font-size: 0.9em;
-        }}
+        Args:
+            analysis_data: 파싱된 LLM 분석 결과 딕셔너리
+            semgrep_data: Semgrep 분석 결과
+            bandit_data: Bandit 분석 결과
+            output_path: 색인 페이지 경로
+        """
+        store = FindingStore(analysis_data.get("vulnerabilities", []))
+        shards = self.plan_report_shards(store)
+        
+        index_name = os.path.basename(output_path)
+        shard_dir_name = f"{Path(output_path).stem}_shards"
+        shard_dir = os.path.join(os.path.dirname(output_path), shard_dir_name)
+        os.makedirs(shard_dir, exist_ok=True)
+        manifest_path = os.path.join(shard_dir, "manifest.json")
+        try:
+            with open(manifest_path, 'r', encoding='utf-8') as f:
+                previous = json.load(f).get('shards', {})
+        except (OSError, ValueError):
+            previous = {}
+        
+        manifest = {}
+        pending = []
+        for shard in shards:
+            content_hash = self.shard_content_hash(shard)
+            manifest[shard['file']] = content_hash
+            path = os.path.join(shard_dir, shard['file'])
+            if previous.get(shard['file']) != content_hash or not os.path.exists(path):
+                pending.append((shard, path))
+        
+        if pending:
+            with ThreadPoolExecutor(max_workers=max(1, min(self.report_shard_workers, len(pending)))) as executor:
+                futures = [executor.submit(self.write_report_shard, shard, path, index_name) for shard, path in pending]
+                for future in as_completed(futures):
+                    future.result()
+        
+        # 이번 스캔에 없는 샤드 파일 정리
+        for name in set(previous) - set(manifest):
+            try:
+                os.remove(os.path.join(shard_dir, name))
+            except OSError:
+                pass
+        with open(manifest_path, 'w', encoding='utf-8') as f:
+            json.dump({'version': 1, 'mode': self.report_shards, 'shards': manifest}, f, ensure_ascii=False, indent=2)
+        
+        temp_path = f"{output_path}.tmp"
+        with open(temp_path, 'w', encoding='utf-8', buffering=REPORT_WRITE_BUFFER) as f:
+            f.write(self.render_report_header(analysis_data, semgrep_data, bandit_data))
+            f.write(self.render_shard_index(store, shards, shard_dir_name))
+            f.write(self.render_report_footer())
+        os.replace(temp_path, output_path)
+        
+        print(f"✓ 분할 HTML 보고서 생성 완료: {output_path} "
+              f"(샤드 {len(shards)}개, 작성 {len(pending)}개, 변경 없음 {len(shards) - len(pending)}개 건너뜀)")
+        return output_path
+    
+    def render_report_header(self, analysis_data, semgrep_data, bandit_data, navigation=""):
+        """
+        보고서 앞부분 HTML (스타일, 도구 요약, 프로젝트 정보, 요약 카드, 종합 평가, 취약점 목록 제목까지)
         
-        .footer {{
-            background-color: #f8f9fa;
-            padding: 20px;
-            text-align: center;
-            color: #666;
-            border-top: 1px solid #e0e0e0;
-        }}
+        Args:
+            analysis_data: 파싱된 LLM 분석 결과 딕셔너리
+            semgrep_data: Semgrep 분석 결과
+            bandit_data: Bandit 분석 결과
+            navigation: 머리말 아래에 넣을 링크 HTML (분할 보고서의 샤드 페이지용)
+            
+        Returns:
+            HTML 문자열
+        """
+        summary = analysis_data.get("summary", {})
+        assessment = analysis_data.get("overall_assessment", "")
+        semgrep_summary_html = self.render_tool_summaries(semgrep_data, None)
+        bandit_summary_html = self.render_tool_summaries(None, bandit_data)
+        project_info_html = self.render_project_info(analysis_data.get("project_info", {}))
+        history_html = self.render_history_trend(analysis_data.get("history"))
         
-        @media print {{
-            body {{
-                background-color: white;
-            }}
-            .container {{
-                box-shadow: none;
-            }}
-        }}
-    </style>
+        return f"""
+<!DOCTYPE html>
+<html lang="ko">
+<head>
+    <meta charset="UTF-8">
+    <meta name="viewport" content="width=device-width, initial-scale=1.0">
+    <title>통합 보안 취약점 분석 보고서</title>
+    <style>
+{REPORT_CSS}{VIRTUAL_REPORT_CSS if self.report_template == 'virtual' else ''}    </style>
 </head>
 <body>
     <div class="container">
@@ -1480,12 +6983,16 @@ class IntegratedSecurityAnalyzer:
             <p class="date">생성 일시: {datetime.now().strftime('%Y년 %m월 %d일 %H:%M:%S')}</p>
         </div>
         
+        {navigation}
+        
         {semgrep_summary_html}
         
         {bandit_summary_html}
         
         {project_info_html}
         
+        {history_html}
+        
         <div class="summary">
             <div class="summary-card total">
                 <div class="label">전체 취약점</div>
@@ -1516,8 +7023,13 @@ class IntegratedSecurityAnalyzer:
         
         <div class="content">
             <h2 style="margin-bottom: 20px; color: #667eea;">🔍 발견된 취약점</h2>
-            {vulnerabilities_html if vulnerabilities_html else '<p>발견된 취약점이 없습니다.</p>'}
-        </div>
+"""
+    
+    def render_report_footer(self):
+        """
+        보고서 뒷부분 HTML (취약점 목록 닫기, 푸터)
+        """
+        return """        </div>
         
         <div class="footer">
             <p><strong>이 보고서는 Semgrep, Bandit 정적 분석 도구와 Claude AI를 사용하여 자동 생성되었습니다.</strong></p>
@@ -1527,10 +7039,34 @@ class IntegratedSecurityAnalyzer:
 </body>
 </html>
         """
+    
+    def generate_html_report(self, analysis_data, semgrep_data, bandit_data, output_path="security_report.html"):
+        """
+        분석 결과를 HTML 보고서로 생성
+        
+        앞부분, 취약점 카드, 뒷부분을 차례로 파일에 스트리밍합니다. 카드는 report_chunk_cards개씩 모아
+        한 번에 쓰므로 발견 수에 비례하는 시간과 작은 메모리로 동작하며, 임시 파일에 다 쓴 뒤 교체합니다.
+        report_template이 'virtual'이면 카드 대신 JSON 데이터와 가상 스크롤 목록을 씁니다.
+        report_shards가 설정되면 색인 페이지와 샤드 페이지로 나누어 씁니다 (generate_sharded_report).
+        
+        Args:
+            analysis_data: 파싱된 LLM 분석 결과 딕셔너리
+            semgrep_data: Semgrep 분석 결과
+            bandit_data: Bandit 분석 결과
+            output_path: 출력 파일 경로
+        """
+        if self.report_shards:
+            return self.generate_sharded_report(analysis_data, semgrep_data, bandit_data, output_path)
         
-        # HTML 파일 저장
-        with open(output_path, 'w', encoding='utf-8') as f:
-            f.write(html_template)
+        vulnerabilities = analysis_data.get("vulnerabilities", [])
+        temp_path = f"{output_path}.tmp"
+        
+        with open(temp_path, 'w', encoding='utf-8', buffering=REPORT_WRITE_BUFFER) as f:
+            f.write(self.render_report_header(analysis_data, semgrep_data, bandit_data))
+            
+            self.write_findings(f, vulnerabilities)
+            f.write(self.render_report_footer())
+        os.replace(temp_path, output_path)
         
         print(f"✓ HTML 보고서 생성 완료: {output_path}")
         return output_path
@@ -1553,6 +7089,53 @@ def main():
     ANTHROPIC_API_KEY = os.getenv("ANTHROPIC_API_KEY", "YOUR_API_KEY")
     # ==========================================
     
+    # ==========================================
+    # LLM 실행 옵션 (환경 변수, 모두 선택사항)
+    #   CODESCANNER_DRY_RUN=1          : LLM 사전 계획(토큰/비용/시간)만 출력하고 종료
+    #   CODESCANNER_BUDGET_USD=0.50    : 예상 비용이 예산을 넘으면 LLM 분석 중단
+    #   CODESCANNER_MAX_PROMPT_TOKENS  : 요청당 코드 토큰 한도 (배치 분할)
+    #   CODESCANNER_CONCURRENCY        : 동시 LLM 요청 수 (AIMD 시작값)
+    #   CODESCANNER_MAX_CONCURRENCY    : AIMD가 늘릴 수 있는 최대 동시 요청 수 (기본 8)
+    #   CODESCANNER_MAX_RETRIES        : 429/529/5xx 재시도 횟수 (기본 5)
+    #   CODESCANNER_USAGE_LOG          : 토큰 추정 오차 기록 파일 (JSON Lines)
+    #   CODESCANNER_AGREEMENT_LOG      : 상관 클러스터별 엔진 합의 기록 파일 (JSON Lines, 정확도 조정용)
+    #   CODESCANNER_BASELINE           : 기준선 파일 - 직전 스캔과 비교해 신규 발견만 트리아지/보고
+    #   CODESCANNER_BASELINE_UPDATE=1  : 이번 스캔의 발견을 모두 기준선에 수용
+    #   CODESCANNER_SUPPRESSIONS=0     : nosec/nosemgrep/codescanner-ignore 억제 주석 무시
+    #   CODESCANNER_REPORT_TEMPLATE=virtual : 카드 대신 JSON 데이터 + 가상 스크롤/필터 보고서 (대규모 결과용)
+    #   CODESCANNER_REPORT_SHARDS=directory : 색인 페이지 + 디렉토리(또는 severity)별 샤드 페이지로 분할, 바뀐 샤드만 다시 작성
+    #   CODESCANNER_EXPORT_SARIF=results.sarif : SARIF 2.1.0 내보내기 (코드 스캐닝 UI용)
+    #   CODESCANNER_EXPORT_NDJSON=-    : JSON Lines 내보내기 ('-'이면 표준 출력, 진행 메시지는 표준 오류로)
+    #   CODESCANNER_EXPORT_CSV=results.csv : CSV 내보내기 (스프레드시트용)
+    #   CODESCANNER_HISTORY_DB=scan_history.db : 스캔 이력 SQLite 파일 - 실행마다 기록하고 보고서에 추이 표시
+    #   CODESCANNER_AGGREGATE_MIN=3    : 같은 파일에서 같은 규칙이 이 횟수 이상 반복되면 하나로 묶음 (0이면 끔)
+    #   CODESCANNER_MESSAGE_BATCHES=1  : Message Batches API로 일괄 제출 (야간 대규모 스캔용)
+    #   CODESCANNER_BATCH_STATE        : 배치 작업 ID 저장 파일 (기본 llm_batch_state.json)
+    #   CODESCANNER_LLM_MODE=triage    : 고위험 도구 발견만 LLM으로 검증 (PR 게이트용)
+    #   CODESCANNER_LLM_MODE=mapreduce : 모듈별 맵 분석 + 요약 리듀스 (대형 프로젝트용)
+    #   CODESCANNER_COMPACT_RESPONSE=1 : LLM은 CWE/심각도/위치/짧은 보충만 응답, 문장은 로컬 템플릿으로 작성
+    #   CODESCANNER_REPORT_LANG=en     : LLM 응답, 템플릿, 도구 발견 문구의 언어 (ko, en)
+    #   CODESCANNER_COMPACT_FINDINGS=0 : 도구 발견을 압축 표기 대신 이전 형식으로 전송하고 LLM이 다시 보고
+    #   CODESCANNER_MINIFY=1           : 프롬프트에서 주석/독스트링/빈 줄 제거 (각 줄에 원본 라인 번호 표시)
+    #   CODESCANNER_DEDUP=1            : 거의 같은 파일은 대표 파일과의 차이만 LLM에 전송
+    #   CODESCANNER_CROSS_FILE=1       : import 그래프로 관련 파일의 호출 대상 정의를 프롬프트에 추가
+    #   CODESCANNER_TIERED=1           : 빠른 모델로 선별 후 위험 파일만 큰 모델로 재분석
+    #   CODESCANNER_ESCALATION_THRESHOLD=0.5 : 재분석할 파일 위험도 임계값 (0.0~1.0)
+    #   CODESCANNER_STRUCTURED_OUTPUT=0: 도구 사용 대신 JSON 텍스트 응답 사용
+    #   ANTHROPIC_BASE_URL             : API 엔드포인트 변경 (로컬 테스트 서버 등)
+    #   CODESCANNER_LLM_BACKEND        : anthropic (기본) | record | replay | stub
+    #   CODESCANNER_LLM_RECORD_PATH    : 녹화/재생 파일 (기본 llm_recording.jsonl)
+    #   CODESCANNER_STUB_LATENCY, CODESCANNER_STUB_LATENCY_STDDEV : 스텁/재생 지연 시간 (초)
+    #   CODESCANNER_STUB_ERRORS="429:0.05,529:0.02" : 스텁/재생 오류 확률
+    #   CODESCANNER_STUB_SEED          : 스텁/재생 난수 시드
+    # ==========================================
+    DRY_RUN = os.getenv("CODESCANNER_DRY_RUN", "").strip().lower() in ('1', 'true', 'yes', 'y')
+    LLM_BACKEND = os.getenv("CODESCANNER_LLM_BACKEND", "anthropic").strip().lower()
+    
+    # NDJSON을 표준 출력으로 내보낼 때는 진행 메시지를 표준 오류로 보내 파이프라인 출력과 섞이지 않게 함
+    if os.getenv("CODESCANNER_EXPORT_NDJSON", "").strip() == '-':
+        sys.stdout = sys.stderr
+    
     print("=" * 70)
     print("🔒 통합 보안 취약점 분석 시스템 (Semgrep + Bandit + Claude AI)")
     print("=" * 70)
@@ -1586,7 +7169,7 @@ def main():
         print(f"\n✅ Semgrep 규칙: {rules_dir}")
     
     # API 키 확인
-    if ANTHROPIC_API_KEY == "YOUR_API_KEY":
+    if ANTHROPIC_API_KEY == "YOUR_API_KEY" and not DRY_RUN and LLM_BACKEND not in ('replay', 'stub'):
         print("\n❌ API 키를 설정해주세요!")
         print("환경변수 ANTHROPIC_API_KEY를 설정하거나")
         print("main.py 파일의 ANTHROPIC_API_KEY를 수정하세요.")
@@ -1614,13 +7197,97 @@ def main():
     if not output_file:
         output_file = "integrated_security_report.html"
     
-    # 분석기 초기화
+    # 분석기 초기화 (LLM 백엔드 선택 포함)
     try:
-        analyzer = IntegratedSecurityAnalyzer(ANTHROPIC_API_KEY)
+        record_path = os.getenv("CODESCANNER_LLM_RECORD_PATH") or "llm_recording.jsonl"
+        stub_options = {
+            'latency_mean': float(os.getenv("CODESCANNER_STUB_LATENCY") or 0),
+            'latency_stddev': float(os.getenv("CODESCANNER_STUB_LATENCY_STDDEV") or 0),
+            'error_rates': parse_error_rates(os.getenv("CODESCANNER_STUB_ERRORS", "")),
+            'seed': int(os.getenv("CODESCANNER_STUB_SEED") or 0),
+        }
+        if LLM_BACKEND == 'anthropic':
+            backend = None
+        elif LLM_BACKEND == 'record':
+            backend = RecordingBackend(AnthropicBackend(ANTHROPIC_API_KEY), record_path)
+        elif LLM_BACKEND == 'replay':
+            backend = ReplayBackend(record_path, **stub_options)
+        elif LLM_BACKEND == 'stub':
+            backend = StubBackend(**stub_options)
+        else:
+            print(f"\n❌ 알 수 없는 LLM 백엔드: {LLM_BACKEND} (anthropic, record, replay, stub)")
+            return 1
+        analyzer = IntegratedSecurityAnalyzer(ANTHROPIC_API_KEY, backend=backend)
     except Exception as e:
         print(f"\n❌ 분석기 초기화 실패: {e}")
         return 1
     
+    analyzer.dry_run = DRY_RUN
+    analyzer.use_message_batches = os.getenv("CODESCANNER_MESSAGE_BATCHES", "").strip().lower() in ('1', 'true', 'yes', 'y')
+    analyzer.structured_output = os.getenv("CODESCANNER_STRUCTURED_OUTPUT", "1").strip().lower() not in ('0', 'false', 'no', 'n')
+    analyzer.llm_mode = os.getenv("CODESCANNER_LLM_MODE", "full").strip().lower()
+    if analyzer.llm_mode not in ('full', 'triage', 'mapreduce'):
+        print(f"\n❌ 알 수 없는 LLM 모드: {analyzer.llm_mode} (full, triage, mapreduce)")
+        return 1
+    analyzer.tiered_routing = os.getenv("CODESCANNER_TIERED", "").strip().lower() in ('1', 'true', 'yes', 'y')
+    analyzer.compact_response = os.getenv("CODESCANNER_COMPACT_RESPONSE", "").strip().lower() in ('1', 'true', 'yes', 'y')
+    analyzer.report_language = os.getenv("CODESCANNER_REPORT_LANG", "ko").strip().lower()
+    if analyzer.report_language not in REPORT_LANGUAGE_NAMES:
+        print(f"\n❌ 지원하지 않는 보고서 언어: {analyzer.report_language} ({', '.join(REPORT_LANGUAGE_NAMES)})")
+        return 1
+    analyzer.compact_tool_findings = os.getenv("CODESCANNER_COMPACT_FINDINGS", "1").strip().lower() not in ('0', 'false', 'no', 'n')
+    analyzer.minify_prompts = os.getenv("CODESCANNER_MINIFY", "").strip().lower() in ('1', 'true', 'yes', 'y')
+    analyzer.near_duplicate_detection = os.getenv("CODESCANNER_DEDUP", "").strip().lower() in ('1', 'true', 'yes', 'y')
+    analyzer.cross_file_context = os.getenv("CODESCANNER_CROSS_FILE", "").strip().lower() in ('1', 'true', 'yes', 'y')
+    if os.getenv("CODESCANNER_BATCH_STATE"):
+        analyzer.batch_state_path = os.getenv("CODESCANNER_BATCH_STATE")
+    analyzer.token_usage_log_path = os.getenv("CODESCANNER_USAGE_LOG") or None
+    analyzer.agreement_log_path = os.getenv("CODESCANNER_AGREEMENT_LOG") or None
+    analyzer.baseline_path = os.getenv("CODESCANNER_BASELINE") or None
+    analyzer.scan_root = directory
+    analyzer.report_template = os.getenv("CODESCANNER_REPORT_TEMPLATE", "cards").strip().lower()
+    if analyzer.report_template not in ('cards', 'virtual'):
+        print(f"\n❌ 지원하지 않는 보고서 템플릿: {analyzer.report_template} (cards, virtual)")
+        return 1
+    analyzer.report_shards = os.getenv("CODESCANNER_REPORT_SHARDS", "").strip().lower() or None
+    if analyzer.report_shards not in (None, 'directory', 'severity'):
+        print(f"\n❌ 지원하지 않는 보고서 분할 방식: {analyzer.report_shards} (directory, severity)")
+        return 1
+    analyzer.export_sarif_path = os.getenv("CODESCANNER_EXPORT_SARIF") or None
+    analyzer.export_ndjson_path = os.getenv("CODESCANNER_EXPORT_NDJSON", "").strip() or None
+    analyzer.export_csv_path = os.getenv("CODESCANNER_EXPORT_CSV") or None
+    analyzer.history_path = os.getenv("CODESCANNER_HISTORY_DB") or None
+    analyzer.baseline_update = os.getenv("CODESCANNER_BASELINE_UPDATE", "").strip().lower() in ('1', 'true', 'yes', 'y')
+    analyzer.suppressions_enabled = os.getenv("CODESCANNER_SUPPRESSIONS", "1").strip().lower() not in ('0', 'false', 'no', 'n')
+    try:
+        if os.getenv("CODESCANNER_BUDGET_USD"):
+            analyzer.budget_usd = float(os.getenv("CODESCANNER_BUDGET_USD"))
+        if os.getenv("CODESCANNER_MAX_PROMPT_TOKENS"):
+            analyzer.max_prompt_tokens = int(os.getenv("CODESCANNER_MAX_PROMPT_TOKENS"))
+        if os.getenv("CODESCANNER_CONCURRENCY"):
+            analyzer.llm_concurrency = max(1, int(os.getenv("CODESCANNER_CONCURRENCY")))
+        if os.getenv("CODESCANNER_MAX_CONCURRENCY"):
+            analyzer.max_llm_concurrency = max(1, int(os.getenv("CODESCANNER_MAX_CONCURRENCY")))
+        if os.getenv("CODESCANNER_ESCALATION_THRESHOLD"):
+            analyzer.escalation_threshold = float(os.getenv("CODESCANNER_ESCALATION_THRESHOLD"))
+        if os.getenv("CODESCANNER_MAX_RETRIES"):
+            analyzer.llm_max_retries = max(0, int(os.getenv("CODESCANNER_MAX_RETRIES")))
+        if os.getenv("CODESCANNER_AGGREGATE_MIN"):
+            analyzer.aggregate_min_repeats = max(0, int(os.getenv("CODESCANNER_AGGREGATE_MIN")))
+    except ValueError as e:
+        print(f"\n❌ 잘못된 실행 옵션 값: {e}")
+        return 1
+    
+    # 단계별 실행 시간 (스캔 이력에 기록)
+    stage_times = {}
+    stage_clock = [time.monotonic()]
+    
+    def lap(stage):
+        now = time.monotonic()
+        stage_times[stage] = stage_times.get(stage, 0.0) + now - stage_clock[0]
+        stage_clock[0] = now
+        return stage_times[stage]
+    
     # 1단계: 디렉토리 스캔
     code_files_paths = analyzer.scan_directory(directory)
     
@@ -1630,10 +7297,12 @@ def main():
     
     # 2단계: 파일 분류
     categorized = analyzer.categorize_files(code_files_paths)
+    lap('scan')
     
     # 3단계: Semgrep으로 먼저 전체 분석 (OWASP Top 10 포함)
     print(f"\n🎯 정적 분석 도구 실행 중...")
     semgrep_results = analyzer.run_semgrep_analysis(directory)
+    lap('semgrep')
     
     # 4단계: Python 파일이 있으면 Bandit으로 추가 분석
     bandit_results = None
@@ -1642,15 +7311,24 @@ def main():
         bandit_results = analyzer.run_bandit_analysis(directory)
     else:
         print("\n⚠ Python 파일이 없습니다. Bandit 분석을 건너뜁니다.")
+    lap('bandit')
     
     # 5단계: 파일 읽기
     print(f"\n📖 파일 읽기 중...")
     code_files = analyzer.read_code_files(code_files_paths)
+    lap('read')
     
     if not code_files:
         print("\n❌ 읽을 수 있는 파일이 없습니다.")
         return 1
     
+    # 드라이런: LLM 사전 계획만 출력하고 종료
+    if analyzer.dry_run:
+        requests = analyzer.build_llm_requests(code_files, semgrep_results, bandit_results)
+        analyzer.print_llm_plan(analyzer.plan_llm_analysis(code_files, requests))
+        print("\nℹ️ 드라이런 모드: LLM을 호출하지 않고 종료합니다.")
+        return 0
+    
     # 6단계: LLM 보안 분석 (Semgrep + Bandit 결과 포함)
     print(f"\n🔍 통합 보안 분석 시작...")
     analysis_result = analyzer.analyze_security_with_tools(code_files, semgrep_results, bandit_results)
@@ -1661,22 +7339,48 @@ def main():
     
     # 7단계: 결과 파싱
     parsed_result = analyzer.parse_analysis_result(analysis_result)
+    lap('llm')
     
-    # 요약 통계 생성
-    vulnerabilities = parsed_result.get('vulnerabilities', [])
-    summary = {
-        'total_vulnerabilities': len(vulnerabilities),
-        'critical': sum(1 for v in vulnerabilities if v.get('severity') == 'Critical'),
-        'high': sum(1 for v in vulnerabilities if v.get('severity') == 'High'),
-        'medium': sum(1 for v in vulnerabilities if v.get('severity') == 'Medium'),
-        'low': sum(1 for v in vulnerabilities if v.get('severity') == 'Low'),
-        'semgrep_issues': sum(1 for v in vulnerabilities if v.get('source') == 'Semgrep'),
-        'bandit_issues': sum(1 for v in vulnerabilities if v.get('source') == 'Bandit'),
-        'llm_found_issues': sum(1 for v in vulnerabilities if v.get('source') == 'LLM Analysis'),
-    }
+    # 억제 주석과 기준선 반영 (기준선이 있으면 신규 발견만 보고)
+    reported_findings = analyzer.apply_baseline(parsed_result.get('vulnerabilities', []), code_files)
     
-    # 전체 평가 생성
+    # 같은 파일, 같은 규칙 반복 발견은 카드 하나로 묶음 (개별 발견은 occurrences에 유지)
+    reported_findings = analyzer.aggregate_repeated_findings(reported_findings)
+    
+    # 요약 통계 생성 (발견 레코드 저장소의 인덱스에서 한 번에 계산, 묶음은 개별 발견 기준으로 셈)
+    finding_store = FindingStore(reported_findings)
+    vulnerabilities = finding_store.records
+    summary = finding_store.summary()
+    lap('postprocess')
+    
+    # 스캔 이력 기록 (설정된 경우, 보고서에 추이 표시)
     project_name = Path(directory).name
+    history = analyzer.record_scan_history(analyzer.active_findings or [], project_name, directory, stage_times)
+    
+    # 전체 평가 생성
+    prompt_savings_note = ""
+    if analyzer.minify_stats:
+        stats = analyzer.minify_stats
+        prompt_savings_note += (f"\n- 소스 축소: 토큰 ~{stats['original_tokens']:,} → ~{stats['minified_tokens']:,} "
+                                f"(압축률 {stats['ratio']:.0%}, ~{stats['tokens_saved']:,} 절감)")
+    if analyzer.output_token_stats and analyzer.output_token_stats['output_tokens']:
+        stats = analyzer.output_token_stats
+        prompt_savings_note += (f"\n- LLM 출력 토큰: {stats['output_tokens']:,} (발견당 ~{stats['per_finding']:,.0f}"
+                                f"{', 압축 응답' if stats['compact'] else ''})")
+    baseline_note = ""
+    if analyzer.baseline_stats and 'new' in analyzer.baseline_stats:
+        stats = analyzer.baseline_stats
+        baseline_note = (f"\n- 기준선 비교: 신규 {stats['new']}개, 유지 {stats['unchanged']}개, 해결 {stats['fixed']}개, "
+                         f"억제 {stats['suppressed']}개 (신규 발견만 보고)")
+    elif analyzer.baseline_stats:
+        baseline_note = f"\n- 억제 주석으로 제외: {analyzer.baseline_stats['suppressed']}개"
+    if analyzer.aggregation_stats:
+        baseline_note += (f"\n- 같은 파일, 같은 규칙 반복 발견 {analyzer.aggregation_stats['occurrences']}개는 "
+                          f"{analyzer.aggregation_stats['groups']}개 항목으로 묶어 표시")
+    if analyzer.near_duplicate_stats:
+        stats = analyzer.near_duplicate_stats
+        prompt_savings_note += (f"\n- 유사 파일 클러스터링: {stats['clusters']}개 클러스터, "
+                                f"{stats['members']}개 파일은 차이만 분석 (토큰 ~{stats['tokens_saved']:,} 절감)")
     overall_assessment = f"""
 프로젝트 '{project_name}'에 대한 통합 보안 분석이 완료되었습니다.
 
@@ -1690,10 +7394,10 @@ def main():
 【분석 방법】
 1. Semgrep 정적 분석 (OWASP Top 10): {len(semgrep_results.get('results', [])) if semgrep_results else 0}개 이슈 발견
 2. Bandit 정적 분석 (Python): {len(bandit_results.get('results', [])) if bandit_results else 0}개 이슈 발견
-3. Claude AI 분석: 추가 취약점 탐지
+3. Claude AI 분석: 추가 취약점 탐지{prompt_savings_note}
 
 【발견된 취약점】
-- 총 {len(vulnerabilities)}개의 보안 취약점 발견
+- 총 {summary['total_vulnerabilities']}개의 보안 취약점 발견{baseline_note}
 - Critical: {summary['critical']}개
 - High: {summary['high']}개
 - Medium: {summary['medium']}개
@@ -1714,13 +7418,30 @@ def main():
             'frontend_files': len(categorized['frontend']),
             'backend_files': len(categorized['backend']),
             'python_files': len(categorized['python']),
-            'config_files': len(categorized['config'])
-        }
+            'config_files': len(categorized['config']),
+            'minify': analyzer.minify_stats,
+            'output_tokens': analyzer.output_token_stats,
+            'near_duplicates': analyzer.near_duplicate_stats,
+            'baseline': analyzer.baseline_stats,
+        },
+        'history': history,
     }
     
+    if isinstance(analyzer.backend, ReplayBackend) and analyzer.backend.misses:
+        print(f"\n⚠ 녹화에 없어 스텁 응답으로 대신한 요청: {analyzer.backend.misses}개")
+    
     # 8단계: HTML 보고서 생성
     print(f"\n📄 HTML 보고서 생성 중...")
     analyzer.generate_html_report(analysis_data, semgrep_results, bandit_results, output_file)
+    analyzer.record_stage_time('report', lap('report'))
+    
+    # 9단계: 기계 판독용 내보내기 (SARIF / NDJSON / CSV, 설정된 경우)
+    if analyzer.export_sarif_path or analyzer.export_ndjson_path or analyzer.export_csv_path:
+        print(f"\n📤 발견 내보내기 중...")
+        analyzer.export_findings(vulnerabilities)
+        analyzer.record_stage_time('export', lap('export'))
+    if analyzer.scan_history is not None:
+        analyzer.scan_history.close()
     
     print("\n" + "=" * 70)
     print("✅ 분석 완료!")
@@ -0,0 +1,277 @@
+import difflib
+import json
+import os
+import sys
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import main
+
+
+def make_analyzer():
+    return main.IntegratedSecurityAnalyzer("test-key", backend=main.StubBackend())
+
+
+def commented_module(command_line):
+    lines = ['"""', 'Report helpers.', '"""', 'import os', '']
+    for i in range(20):
+        lines += [f"# helper {i}", f"def helper_{i}(value):", f"    return value * {i}", ""]
+    lines += ["def run(cmd):", "    # run the command", f"    {command_line}", ""]
+    return "\n".join(lines)
+
+
+def test_minify_with_dedup_keeps_member_lines_original():
+    analyzer = make_analyzer()
+    analyzer.minify_prompts = True
+    analyzer.near_duplicate_detection = True
+    representative = commented_module("return os.popen(cmd).read()") + "\n# trailing note\n"
+    member = commented_module("os.system(cmd)")
+    other = "# only a comment\n\n\nimport os\nos.system('ls')\n"
+    code_files = {'pkg/reports.py': representative, 'pkg/reports_copy.py': member, 'pkg/other.py': other}
+    
+    analyzer.prepare_prompt_sources(code_files)
+    assert analyzer.duplicate_of == {'pkg/reports_copy.py': 'pkg/reports.py'}
+    assert set(analyzer.minified_sources) == {'pkg/other.py'}
+    
+    # 대표 파일은 원본 그대로, 멤버의 diff는 원본 라인 번호 기준
+    prompt = analyzer.format_code_context(code_files)
+    assert "# helper 3" in prompt
+    expected_diff = "\n".join(list(difflib.unified_diff(
+        representative.splitlines(), member.splitlines(), n=2, lineterm=''))[2:])
+    assert expected_diff in prompt
+    
+    # 클러스터 밖 파일은 축소하되 남은 줄마다 원본 라인 번호를 붙임
+    assert "    4 | import os\n    5 | os.system('ls')" in prompt
+    assert "# only a comment" not in prompt
+
+
+def sql_finding(source, path, line, rule_id):
+    return {'source': source, 'rule_id': rule_id, 'file_path': path, 'line': line,
+            'location': f"{os.path.basename(path)}:{line}", 'cwe_id': 'CWE-89',
+            'code_snippet': f"{line} cursor.execute(query)", 'title': 'SQL injection', 'severity': 'High'}
+
+
+def test_finding_index_keeps_same_snippet_far_apart():
+    index = main.FindingIndex(['/src/app.py'])
+    bandit = sql_finding('Bandit', '/src/app.py', 10, 'B608')
+    semgrep = sql_finding('Semgrep', '/src/app.py', 200, 'python.lang.security.sql-injection')
+    assert index.add(bandit) is None
+    assert index.add(semgrep) is None
+
+
+def test_finding_index_merges_same_snippet_nearby_or_without_line():
+    index = main.FindingIndex(['/src/app.py'])
+    bandit = sql_finding('Bandit', '/src/app.py', 10, 'B608')
+    assert index.add(bandit) is None
+    assert index.add(sql_finding('Semgrep', '/src/app.py', 14, 'python.lang.security.sql-injection')) is bandit
+    
+    llm = {'source': 'LLM Analysis', 'file_path': '/src/app.py', 'location': 'app.py', 'cwe_id': 'CWE-89',
+           'code_snippet': 'cursor.execute(query)', 'title': 'SQL injection'}
+    assert index.add(llm) is bandit
+
+
+def test_finding_index_separates_same_basename_in_different_directories():
+    index = main.FindingIndex(['/src/a/utils.py', '/src/b/utils.py'])
+    first = sql_finding('Bandit', '/src/a/utils.py', 10, 'B608')
+    second = sql_finding('Semgrep', '/src/b/utils.py', 10, 'python.lang.security.sql-injection')
+    assert index.add(first) is None
+    assert index.add(second) is None
+    assert first['fingerprint'] != second['fingerprint']
+
+
+def test_report_language_controls_prompts_and_tool_text():
+    analyzer = make_analyzer()
+    analyzer.report_language = 'en'
+    assert '한국어' not in analyzer.system_prompt and 'English' in analyzer.system_prompt
+    for structured, compact in ((True, True), (True, False), (False, False)):
+        analyzer.structured_output, analyzer.compact_response = structured, compact
+        prompt = analyzer.build_analysis_prompt("CODE", "", "", 0, 0)
+        assert '한글' not in prompt and '한국어' not in prompt
+    
+    semgrep = {'results': [{'check_id': 'python.lang.security.audit.formatted-sql-query', 'path': 'app.py',
+                            'start': {'line': 3}, 'extra': {'severity': 'ERROR', 'message': 'SQL built from input',
+                                                            'lines': 'cursor.execute(q)',
+                                                            'metadata': {'cwe': ['CWE-89: SQL Injection'],
+                                                                         'references': ['https://owasp.org/']}}}]}
+    vuln = analyzer.convert_semgrep_to_vulnerabilities(semgrep)[0]
+    assert '참고' not in vuln['recommendation'] and '(see: https://owasp.org/)' in vuln['recommendation']
+    assert '심각도' not in vuln['impact']
+
+
+def open_circuit(scheduler):
+    def fail():
+        raise main.SimulatedAPIError(503)
+    for _ in range(scheduler.failure_threshold):
+        try:
+            scheduler.call(fail)
+        except main.SimulatedAPIError:
+            pass
+    try:
+        scheduler.call(lambda: 'unreachable')
+    except main.CircuitOpenError:
+        return
+    raise AssertionError("circuit did not open")
+
+
+def start_half_open_probe(scheduler, probe_func):
+    import threading
+    import time
+    time.sleep(scheduler.cooldown_seconds * 1.5)
+    calls = []
+    results = []
+    probe_started = threading.Event()
+    
+    def probe():
+        probe_started.set()
+        return probe_func()
+    
+    def other():
+        calls.append(1)
+        return 'ok'
+    
+    def run(func):
+        try:
+            results.append(scheduler.call(func))
+        except main.CircuitOpenError:
+            results.append('rejected')
+        except main.SimulatedAPIError:
+            results.append('failed')
+    
+    probe_thread = threading.Thread(target=run, args=(probe,))
+    probe_thread.start()
+    assert probe_started.wait(2)
+    others = [threading.Thread(target=run, args=(other,)) for _ in range(3)]
+    for thread in others:
+        thread.start()
+    return probe_thread, others, calls, results
+
+
+def test_half_open_circuit_lets_one_probe_through_then_closes():
+    import threading
+    scheduler = main.LLMRequestScheduler(initial_concurrency=4, max_concurrency=4, max_retries=0,
+                                         failure_threshold=2, cooldown_seconds=0.05)
+    open_circuit(scheduler)
+    release = threading.Event()
+    probe_thread, others, calls, results = start_half_open_probe(scheduler, lambda: release.wait(2) and 'probe')
+    
+    # 시험 요청이 끝나기 전에는 다른 요청이 엔드포인트로 가지 않음
+    probe_thread.join(0.1)
+    assert calls == []
+    release.set()
+    for thread in [probe_thread] + others:
+        thread.join(2)
+    assert len(calls) == 3
+    assert sorted(results) == ['ok', 'ok', 'ok', 'probe']
+
+
+def test_half_open_circuit_reopens_when_probe_fails():
+    import threading
+    scheduler = main.LLMRequestScheduler(initial_concurrency=4, max_concurrency=4, max_retries=0,
+                                         failure_threshold=2, cooldown_seconds=5)
+    open_circuit(scheduler)
+    scheduler.cooldown_seconds = 0.05
+    release = threading.Event()
+    
+    def failing_probe():
+        release.wait(2)
+        scheduler.cooldown_seconds = 5
+        raise main.SimulatedAPIError(503)
+    
+    probe_thread, others, calls, results = start_half_open_probe(scheduler, failing_probe)
+    probe_thread.join(0.1)
+    release.set()
+    for thread in [probe_thread] + others:
+        thread.join(2)
+    assert calls == []
+    assert sorted(results) == ['failed', 'rejected', 'rejected', 'rejected']
+
+
+def test_tiered_screen_findings_dropped_for_escalated_files_in_any_path_form():
+    analyzer = make_analyzer()
+    code_files = {'/src/api/views.py': 'x = 1\n', '/src/util.py': 'y = 2\n'}
+    analyzer.known_paths = list(code_files)
+    escalated = {'/src/api/views.py': code_files['/src/api/views.py']}
+    screen = [
+        {'location': '/src/api/views.py:1', 'title': 'full path'},
+        {'location': 'views.py:1', 'title': 'basename'},
+        {'location': 'util.py:1', 'title': 'not escalated'},
+    ]
+    kept = analyzer.screen_findings_to_keep(screen, code_files, escalated)
+    assert [vuln['title'] for vuln in kept] == ['not escalated']
+    assert kept[0]['model'] == analyzer.screening_model
+
+
+def test_token_usage_log_uses_screening_model_for_screen_tier():
+    from types import SimpleNamespace
+    analyzer = make_analyzer()
+    usage = SimpleNamespace(input_tokens=100, output_tokens=10)
+    analyzer.record_token_usage({'custom_id': 'screen-0001', 'tier': 'screen'}, 90, usage)
+    analyzer.record_token_usage({'custom_id': 'batch-0001'}, 90, usage)
+    assert [record['model'] for record in analyzer.token_usage_records] == [analyzer.screening_model, analyzer.model]
+
+
+def test_summary_counts_aggregated_occurrences():
+    analyzer = make_analyzer()
+    findings = [main.Finding({'source': 'Bandit', 'rule_id': 'B403', 'file_path': '/src/a.py', 'line': line,
+                              'location': f"a.py:{line}", 'severity': 'Low' if line < 30 else 'High',
+                              'cwe_id': 'CWE-502', 'title': 'pickle', 'code_snippet': f"{line} import pickle"})
+                for line in (10, 20, 40)]
+    findings.append(main.Finding({'source': 'Semgrep', 'rule_id': 'x', 'file_path': '/src/b.py', 'line': 1,
+                                  'severity': 'Medium', 'title': 'other'}))
+    aggregated = analyzer.aggregate_repeated_findings(findings)
+    assert len(aggregated) == 2
+    
+    summary = main.FindingStore(aggregated).summary()
+    assert summary['cards'] == 2
+    assert summary['total_vulnerabilities'] == 4
+    assert (summary['low'], summary['medium'], summary['high']) == (2, 1, 1)
+    assert summary['bandit_issues'] == 3
+
+
+def pickle_imports(*lines):
+    return [{'source': 'Bandit', 'rule_id': 'B403', 'file_path': '/src/a.py', 'line': line,
+             'location': f"a.py:{line}", 'severity': 'Low', 'cwe_id': 'CWE-502',
+             'title': 'pickle', 'code_snippet': f"{line} import pickle"} for line in lines]
+
+
+def run_baseline(baseline_path, findings):
+    analyzer = make_analyzer()
+    analyzer.baseline_path = str(baseline_path)
+    analyzer.scan_root = '/src'
+    reported = analyzer.apply_baseline(findings, {})
+    return analyzer, reported
+
+
+def test_baseline_fingerprint_is_unique_per_identical_line(tmp_path):
+    baseline_path = tmp_path / 'baseline.json'
+    findings = pickle_imports(4, 97)
+    analyzer, reported = run_baseline(baseline_path, findings)
+    assert len(reported) == 2
+    assert findings[0]['baseline_fingerprint'] != findings[1]['baseline_fingerprint']
+    
+    # 위쪽 코드가 밀려도 같은 줄끼리의 순서로 지문이 유지됨
+    analyzer, reported = run_baseline(baseline_path, pickle_imports(10, 103))
+    assert reported == []
+    assert analyzer.baseline_stats['unchanged'] == 2
+    
+    # 같은 줄 하나가 사라지면 해결로 집계됨
+    analyzer, reported = run_baseline(baseline_path, pickle_imports(10))
+    assert reported == []
+    assert analyzer.baseline_stats['fixed'] == 1
+
+
+def test_exports_strip_line_number_prefix_from_snippets(tmp_path):
+    analyzer = make_analyzer()
+    analyzer.scan_root = '/src'
+    analyzer.export_sarif_path = str(tmp_path / 'results.sarif')
+    analyzer.export_ndjson_path = str(tmp_path / 'results.ndjson')
+    finding = sql_finding('Bandit', '/src/app.py', 16, 'B608')
+    finding['code_snippet'] = "16     if username == 'admin':\n17         cursor.execute(query)\n"
+    analyzer.export_findings([finding])
+    
+    expected = "    if username == 'admin':\n        cursor.execute(query)"
+    sarif = json.loads((tmp_path / 'results.sarif').read_text(encoding='utf-8'))
+    region = sarif['runs'][0]['results'][0]['locations'][0]['physicalLocation']['region']
+    assert region['snippet']['text'] == expected
+    record = json.loads((tmp_path / 'results.ndjson').read_text(encoding='utf-8').splitlines()[0])
+    assert record['code_snippet'] == expected